@@ -0,0 +1,29 @@
+"""add partial index on admin users
+
+Revision ID: 007_add_admin_partial_index
+Revises: 006_add_api_keys
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '007_add_admin_partial_index'
+down_revision = '006_add_api_keys'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Partial index backing the last-admin guard count
+    op.create_index(
+        'ix_users_admin',
+        'users',
+        ['id'],
+        postgresql_where=sa.text('is_admin = true'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_users_admin', table_name='users')
@@ -0,0 +1,37 @@
+"""add precomputed masked api key and webhook secret
+
+Revision ID: 008_add_masked_secrets
+Revises: 007_add_admin_partial_index
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '008_add_masked_secrets'
+down_revision = '007_add_admin_partial_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('api_key_masked', sa.String(20), nullable=True))
+    op.add_column('users', sa.Column('webhook_secret_masked', sa.String(20), nullable=True))
+    
+    # Backfill existing keys/secrets
+    op.execute("""
+        UPDATE users
+        SET api_key_masked = left(api_key, 6) || '...' || right(api_key, 4)
+        WHERE api_key IS NOT NULL
+    """)
+    op.execute("""
+        UPDATE users
+        SET webhook_secret_masked = 'wh_' || left(webhook_secret, 4) || '...' || right(webhook_secret, 4)
+        WHERE webhook_secret IS NOT NULL
+    """)
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'webhook_secret_masked')
+    op.drop_column('users', 'api_key_masked')
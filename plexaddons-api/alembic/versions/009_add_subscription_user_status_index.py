@@ -0,0 +1,36 @@
+"""add partial index for a user's current subscription
+
+Revision ID: 009_add_subscription_user_status_index
+Revises: 008_add_masked_secrets
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '009_add_subscription_user_status_index'
+down_revision = '008_add_masked_secrets'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_sub_user_status_created',
+            'subscriptions',
+            ['user_id', 'status', sa.text('created_at DESC')],
+            postgresql_where=sa.text("status IN ('ACTIVE', 'TRIALING', 'PAST_DUE')"),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_sub_user_status_created',
+            table_name='subscriptions',
+            postgresql_concurrently=True,
+        )
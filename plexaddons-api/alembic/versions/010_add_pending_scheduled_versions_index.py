@@ -0,0 +1,47 @@
+"""replace scheduled release index with a partial index on pending versions
+
+Revision ID: 010_add_pending_scheduled_versions_index
+Revises: 009_add_subscription_user_status_index
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '010_add_pending_scheduled_versions_index'
+down_revision = '009_add_subscription_user_status_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_versions_sched',
+            'versions',
+            ['scheduled_release_at'],
+            postgresql_where=sa.text('is_published = false'),
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'idx_versions_scheduled_release',
+            table_name='versions',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_versions_scheduled_release',
+            'versions',
+            ['scheduled_release_at'],
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_versions_sched',
+            table_name='versions',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,82 @@
+"""add composite indexes for list endpoints and drop redundant single-column ones
+
+Revision ID: 011_add_composite_list_indexes
+Revises: 010_add_pending_scheduled_versions_index
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '011_add_composite_list_indexes'
+down_revision = '010_add_pending_scheduled_versions_index'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_tickets_status_created_at',
+            'tickets',
+            ['status', 'created_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_tickets_assigned_admin_status',
+            'tickets',
+            ['assigned_admin_id', 'status'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_addons_public_active_slug',
+            'addons',
+            ['is_public', 'is_active', 'slug'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_versions_addon_release_desc',
+            'versions',
+            ['addon_id', sa.text('release_date DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # Tickets were created by create_all, which also emitted ix_tickets_status
+        for name in ('idx_tickets_status', 'ix_tickets_status'):
+            op.drop_index(name, table_name='tickets', postgresql_concurrently=True, if_exists=True)
+        op.drop_index(
+            'idx_versions_release_date',
+            table_name='versions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_versions_release_date',
+            'versions',
+            ['release_date'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_tickets_status',
+            'tickets',
+            ['status'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for name, table in (
+            ('idx_versions_addon_release_desc', 'versions'),
+            ('idx_addons_public_active_slug', 'addons'),
+            ('idx_tickets_assigned_admin_status', 'tickets'),
+            ('idx_tickets_status_created_at', 'tickets'),
+        ):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
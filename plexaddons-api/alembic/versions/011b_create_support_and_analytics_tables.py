@@ -0,0 +1,246 @@
+"""create the support, billing event and analytics tables
+
+Revision ID: 011b_create_support_and_analytics_tables
+Revises: 011_add_composite_list_indexes
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '011b_create_support_and_analytics_tables'
+down_revision = '011_add_composite_list_indexes'
+branch_labels = None
+depends_on = None
+
+
+# These tables used to come only from create_all at startup, and 012 onwards
+# alter them. They are created here exactly as create_all made them at that
+# point (native enums holding member names, serial ids with their own index),
+# and skipped where create_all already did.
+
+# Native enum types create_all made, with member names as labels
+ENUMS = {
+    'paymentprovider': ['STRIPE', 'PAYPAL'],
+    'ticketstatus': ['OPEN', 'IN_PROGRESS', 'RESOLVED', 'CLOSED'],
+    'ticketpriority': ['LOW', 'NORMAL', 'HIGH', 'URGENT'],
+    'ticketcategory': ['GENERAL', 'BILLING', 'TECHNICAL', 'FEATURE_REQUEST', 'BUG_REPORT'],
+}
+
+# Creation order; dropped in reverse
+TABLES = [
+    'subscription_events',
+    'api_request_logs',
+    'tickets',
+    'ticket_messages',
+    'ticket_attachments',
+    'canned_responses',
+    'version_checks',
+    'addon_usage_stats',
+]
+
+
+def _enum(name: str) -> postgresql.ENUM:
+    return postgresql.ENUM(*ENUMS[name], name=name, create_type=False)
+
+
+def _create_subscription_events() -> None:
+    op.create_table(
+        'subscription_events',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('subscription_id', sa.Integer(), nullable=True),
+        sa.Column('event_type', sa.String(length=100), nullable=False),
+        sa.Column('provider', _enum('paymentprovider'), nullable=True),
+        sa.Column('provider_event_id', sa.String(length=255), nullable=True),
+        sa.Column('payload', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+        sa.ForeignKeyConstraint(['subscription_id'], ['subscriptions.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_subscription_events_id', 'subscription_events', ['id'])
+    op.create_index('idx_subscription_events_user_id', 'subscription_events', ['user_id'])
+    op.create_index('idx_subscription_events_created_at', 'subscription_events', ['created_at'])
+
+
+def _create_api_request_logs() -> None:
+    op.create_table(
+        'api_request_logs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('endpoint', sa.String(length=255), nullable=False),
+        sa.Column('method', sa.String(length=10), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('user_agent', sa.String(length=500), nullable=True),
+        sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_api_request_logs_id', 'api_request_logs', ['id'])
+    op.create_index('ix_api_request_logs_timestamp', 'api_request_logs', ['timestamp'])
+    op.create_index('idx_api_request_logs_timestamp', 'api_request_logs', ['timestamp'])
+    op.create_index('idx_api_request_logs_endpoint', 'api_request_logs', ['endpoint'])
+
+
+def _create_tickets() -> None:
+    op.create_table(
+        'tickets',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('subject', sa.String(length=255), nullable=False),
+        sa.Column('category', _enum('ticketcategory'), nullable=False),
+        sa.Column('priority', _enum('ticketpriority'), nullable=False),
+        sa.Column('status', _enum('ticketstatus'), nullable=False),
+        sa.Column('assigned_admin_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('resolved_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('closed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['assigned_admin_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_tickets_id', 'tickets', ['id'])
+    op.create_index('idx_tickets_user_id', 'tickets', ['user_id'])
+    op.create_index('idx_tickets_status_created_at', 'tickets', ['status', 'created_at'])
+    op.create_index('idx_tickets_assigned_admin_status', 'tickets', ['assigned_admin_id', 'status'])
+    op.create_index('idx_tickets_priority', 'tickets', ['priority'])
+    op.create_index('idx_tickets_created_at', 'tickets', ['created_at'])
+
+
+def _create_ticket_messages() -> None:
+    op.create_table(
+        'ticket_messages',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('ticket_id', sa.Integer(), nullable=False),
+        sa.Column('author_id', sa.Integer(), nullable=True),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('is_staff_reply', sa.Boolean(), nullable=True),
+        sa.Column('is_system_message', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('edited_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['ticket_id'], ['tickets.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['author_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_ticket_messages_id', 'ticket_messages', ['id'])
+    op.create_index('idx_ticket_messages_ticket_id', 'ticket_messages', ['ticket_id'])
+    op.create_index('idx_ticket_messages_created_at', 'ticket_messages', ['created_at'])
+
+
+def _create_ticket_attachments() -> None:
+    op.create_table(
+        'ticket_attachments',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('message_id', sa.Integer(), nullable=False),
+        sa.Column('file_path', sa.String(length=500), nullable=False),
+        sa.Column('original_filename', sa.String(length=255), nullable=False),
+        sa.Column('file_size', sa.BigInteger(), nullable=False),
+        sa.Column('compressed_size', sa.BigInteger(), nullable=True),
+        sa.Column('mime_type', sa.String(length=100), nullable=True),
+        sa.Column('is_compressed', sa.Boolean(), nullable=True),
+        sa.Column('compressed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['message_id'], ['ticket_messages.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_ticket_attachments_id', 'ticket_attachments', ['id'])
+    op.create_index('idx_ticket_attachments_message_id', 'ticket_attachments', ['message_id'])
+    op.create_index('idx_ticket_attachments_created_at', 'ticket_attachments', ['created_at'])
+
+
+def _create_canned_responses() -> None:
+    op.create_table(
+        'canned_responses',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('title', sa.String(length=100), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('category', _enum('ticketcategory'), nullable=True),
+        sa.Column('created_by', sa.Integer(), nullable=True),
+        sa.Column('usage_count', sa.Integer(), nullable=True),
+        sa.Column('is_active', sa.Boolean(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['created_by'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_canned_responses_id', 'canned_responses', ['id'])
+    op.create_index('idx_canned_responses_category', 'canned_responses', ['category'])
+
+
+def _create_version_checks() -> None:
+    op.create_table(
+        'version_checks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('addon_id', sa.Integer(), nullable=False),
+        sa.Column('version_id', sa.Integer(), nullable=True),
+        sa.Column('checked_version', sa.String(length=50), nullable=True),
+        sa.Column('client_ip_hash', sa.String(length=64), nullable=True),
+        sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['addon_id'], ['addons.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['version_id'], ['versions.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_version_checks_id', 'version_checks', ['id'])
+    op.create_index('ix_version_checks_timestamp', 'version_checks', ['timestamp'])
+    op.create_index('idx_version_checks_addon_id', 'version_checks', ['addon_id'])
+    op.create_index('idx_version_checks_timestamp', 'version_checks', ['timestamp'])
+    op.create_index('idx_version_checks_addon_timestamp', 'version_checks', ['addon_id', 'timestamp'])
+
+
+def _create_addon_usage_stats() -> None:
+    op.create_table(
+        'addon_usage_stats',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('addon_id', sa.Integer(), nullable=False),
+        sa.Column('version_id', sa.Integer(), nullable=True),
+        sa.Column('date', sa.Date(), nullable=False),
+        sa.Column('check_count', sa.Integer(), nullable=True),
+        sa.Column('unique_users', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['addon_id'], ['addons.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['version_id'], ['versions.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_addon_usage_stats_id', 'addon_usage_stats', ['id'])
+    op.create_index('ix_addon_usage_stats_date', 'addon_usage_stats', ['date'])
+    op.create_index('idx_addon_usage_stats_addon_date', 'addon_usage_stats', ['addon_id', 'date'])
+    op.create_index(
+        'idx_addon_usage_stats_addon_version_date',
+        'addon_usage_stats',
+        ['addon_id', 'version_id', 'date'],
+        unique=True,
+    )
+
+
+CREATORS = {
+    'subscription_events': _create_subscription_events,
+    'api_request_logs': _create_api_request_logs,
+    'tickets': _create_tickets,
+    'ticket_messages': _create_ticket_messages,
+    'ticket_attachments': _create_ticket_attachments,
+    'canned_responses': _create_canned_responses,
+    'version_checks': _create_version_checks,
+    'addon_usage_stats': _create_addon_usage_stats,
+}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    for name, labels in ENUMS.items():
+        postgresql.ENUM(*labels, name=name).create(bind, checkfirst=True)
+
+    existing = set(sa.inspect(bind).get_table_names())
+    for table in TABLES:
+        if table not in existing:
+            CREATORS[table]()
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        op.execute(f'DROP TABLE IF EXISTS {table}')
+    for name in ENUMS:
+        op.execute(f'DROP TYPE IF EXISTS {name}')
@@ -0,0 +1,70 @@
+"""convert JSON text columns to JSONB and index subscription event payloads
+
+Revision ID: 012_convert_json_text_to_jsonb
+Revises: 011b_create_support_and_analytics_tables
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '012_convert_json_text_to_jsonb'
+down_revision = '011b_create_support_and_analytics_tables'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing values were written with json.dumps, so they cast cleanly
+    op.alter_column(
+        'subscription_events', 'payload',
+        type_=postgresql.JSONB(),
+        existing_type=sa.Text(),
+        existing_nullable=True,
+        postgresql_using='payload::jsonb',
+    )
+    op.alter_column(
+        'admin_audit_log', 'details',
+        type_=postgresql.JSONB(),
+        existing_type=sa.Text(),
+        existing_nullable=True,
+        postgresql_using='details::jsonb',
+    )
+    
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_subscription_events_payload_gin',
+            'subscription_events',
+            ['payload'],
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'idx_subscription_events_payload_gin',
+            table_name='subscription_events',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    
+    op.alter_column(
+        'admin_audit_log', 'details',
+        type_=sa.Text(),
+        existing_type=postgresql.JSONB(),
+        existing_nullable=True,
+        postgresql_using='details::text',
+    )
+    op.alter_column(
+        'subscription_events', 'payload',
+        type_=sa.Text(),
+        existing_type=postgresql.JSONB(),
+        existing_nullable=True,
+        postgresql_using='payload::text',
+    )
@@ -0,0 +1,110 @@
+"""partition api_request_logs by month on timestamp
+
+Revision ID: 013_partition_api_request_logs
+Revises: 012_convert_json_text_to_jsonb
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '013_partition_api_request_logs'
+down_revision = '012_convert_json_text_to_jsonb'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = 'id, endpoint, method, status_code, user_id, ip_address, user_agent, timestamp'
+
+# One partition per month from the oldest row through next month.
+# The app's scheduler keeps creating them ahead (see main.py).
+CREATE_MONTHLY_PARTITIONS = """
+DO $$
+DECLARE
+    month_start timestamptz;
+BEGIN
+    SELECT date_trunc('month', COALESCE(min(timestamp), now()) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+        INTO month_start FROM api_request_logs_unpartitioned;
+    WHILE month_start <= now() + interval '1 month' LOOP
+        EXECUTE format(
+            'CREATE TABLE api_request_logs_%s PARTITION OF api_request_logs FOR VALUES FROM (%L) TO (%L)',
+            to_char(month_start AT TIME ZONE 'UTC', 'YYYY_MM'),
+            month_start,
+            month_start + interval '1 month'
+        );
+        month_start := month_start + interval '1 month';
+    END LOOP;
+END $$;
+"""
+
+
+def upgrade() -> None:
+    op.execute('ALTER TABLE api_request_logs RENAME TO api_request_logs_unpartitioned')
+    for index in (
+        'idx_api_request_logs_timestamp',
+        'idx_api_request_logs_endpoint',
+        'ix_api_request_logs_id',
+        'ix_api_request_logs_timestamp',
+    ):
+        op.execute(f'DROP INDEX IF EXISTS {index}')
+    op.execute('ALTER TABLE api_request_logs_unpartitioned RENAME CONSTRAINT api_request_logs_pkey TO api_request_logs_unpartitioned_pkey')
+    
+    # The partition key must be part of the primary key; keep the id sequence
+    op.execute("""
+        CREATE TABLE api_request_logs (
+            id INTEGER NOT NULL DEFAULT nextval('api_request_logs_id_seq'),
+            endpoint VARCHAR(255) NOT NULL,
+            method VARCHAR(10) NOT NULL,
+            status_code INTEGER,
+            user_id INTEGER REFERENCES users(id) ON DELETE SET NULL,
+            ip_address VARCHAR(45),
+            user_agent VARCHAR(500),
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT api_request_logs_pkey PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute(CREATE_MONTHLY_PARTITIONS)
+    op.execute(
+        f'INSERT INTO api_request_logs ({COLUMNS}) '
+        f'SELECT {COLUMNS} FROM api_request_logs_unpartitioned WHERE timestamp IS NOT NULL'
+    )
+    
+    op.execute('ALTER SEQUENCE api_request_logs_id_seq OWNED BY api_request_logs.id')
+    op.drop_table('api_request_logs_unpartitioned')
+    
+    op.create_index('idx_api_request_logs_timestamp', 'api_request_logs', ['timestamp'])
+    op.create_index('idx_api_request_logs_endpoint', 'api_request_logs', ['endpoint'])
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE api_request_logs RENAME TO api_request_logs_partitioned')
+    op.execute('DROP INDEX IF EXISTS idx_api_request_logs_timestamp')
+    op.execute('DROP INDEX IF EXISTS idx_api_request_logs_endpoint')
+    op.execute('ALTER TABLE api_request_logs_partitioned RENAME CONSTRAINT api_request_logs_pkey TO api_request_logs_partitioned_pkey')
+    
+    op.create_table(
+        'api_request_logs',
+        sa.Column('id', sa.Integer(), nullable=False, server_default=sa.text("nextval('api_request_logs_id_seq')")),
+        sa.Column('endpoint', sa.String(length=255), nullable=False),
+        sa.Column('method', sa.String(length=10), nullable=False),
+        sa.Column('status_code', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('ip_address', sa.String(length=45), nullable=True),
+        sa.Column('user_agent', sa.String(length=500), nullable=True),
+        sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute(
+        f'INSERT INTO api_request_logs ({COLUMNS}) '
+        f'SELECT {COLUMNS} FROM api_request_logs_partitioned'
+    )
+    
+    op.execute('ALTER SEQUENCE api_request_logs_id_seq OWNED BY api_request_logs.id')
+    # Dropping the parent drops every partition with it
+    op.drop_table('api_request_logs_partitioned')
+    
+    op.create_index('ix_api_request_logs_id', 'api_request_logs', ['id'])
+    op.create_index('idx_api_request_logs_timestamp', 'api_request_logs', ['timestamp'])
+    op.create_index('idx_api_request_logs_endpoint', 'api_request_logs', ['endpoint'])
@@ -0,0 +1,78 @@
+"""use BRIN indexes for append-only log timestamps
+
+Revision ID: 014_use_brin_for_log_timestamps
+Revises: 013_partition_api_request_logs
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '014_use_brin_for_log_timestamps'
+down_revision = '013_partition_api_request_logs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Partitioned tables cannot build indexes concurrently
+    op.create_index(
+        'idx_api_request_logs_timestamp_brin',
+        'api_request_logs',
+        ['timestamp'],
+        postgresql_using='brin',
+        postgresql_with={'pages_per_range': 32},
+    )
+    op.drop_index('idx_api_request_logs_timestamp', table_name='api_request_logs')
+    
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_subscription_events_created_at_brin',
+            'subscription_events',
+            ['created_at'],
+            postgresql_using='brin',
+            postgresql_with={'pages_per_range': 32},
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'idx_subscription_events_created_at',
+            table_name='subscription_events',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        # Duplicate of ix_admin_audit_log_created_at
+        op.drop_index(
+            'idx_audit_log_created_at',
+            table_name='admin_audit_log',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_audit_log_created_at',
+            'admin_audit_log',
+            ['created_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_subscription_events_created_at',
+            'subscription_events',
+            ['created_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'idx_subscription_events_created_at_brin',
+            table_name='subscription_events',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    
+    op.create_index('idx_api_request_logs_timestamp', 'api_request_logs', ['timestamp'])
+    op.drop_index('idx_api_request_logs_timestamp_brin', table_name='api_request_logs')
@@ -0,0 +1,67 @@
+"""store ticket status, priority and category as smallint codes
+
+Revision ID: 015_store_ticket_enums_as_smallint
+Revises: 014_use_brin_for_log_timestamps
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '015_store_ticket_enums_as_smallint'
+down_revision = '014_use_brin_for_log_timestamps'
+branch_labels = None
+depends_on = None
+
+
+# Member names in declaration order; the code is the position (see SmallIntEnum)
+ENUMS = {
+    'ticketstatus': ['OPEN', 'IN_PROGRESS', 'RESOLVED', 'CLOSED'],
+    'ticketpriority': ['LOW', 'NORMAL', 'HIGH', 'URGENT'],
+    'ticketcategory': ['GENERAL', 'BILLING', 'TECHNICAL', 'FEATURE_REQUEST', 'BUG_REPORT'],
+}
+
+COLUMNS = [
+    ('tickets', 'status', 'ticketstatus', False),
+    ('tickets', 'priority', 'ticketpriority', False),
+    ('tickets', 'category', 'ticketcategory', False),
+    ('canned_responses', 'category', 'ticketcategory', True),
+]
+
+
+def _to_code(column: str, names: list) -> str:
+    whens = ' '.join(f"WHEN '{name}' THEN {code}" for code, name in enumerate(names))
+    return f'CASE {column}::text {whens} END'
+
+
+def _to_name(column: str, names: list, type_name: str) -> str:
+    whens = ' '.join(f"WHEN {code} THEN '{name}'" for code, name in enumerate(names))
+    return f'(CASE {column} {whens} END)::{type_name}'
+
+
+def upgrade() -> None:
+    for table, column, type_name, nullable in COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=sa.SmallInteger(),
+            existing_type=postgresql.ENUM(name=type_name, create_type=False),
+            existing_nullable=nullable,
+            postgresql_using=_to_code(column, ENUMS[type_name]),
+        )
+    for type_name in ENUMS:
+        op.execute(f'DROP TYPE IF EXISTS {type_name}')
+
+
+def downgrade() -> None:
+    for type_name, names in ENUMS.items():
+        postgresql.ENUM(*names, name=type_name).create(op.get_bind(), checkfirst=True)
+    for table, column, type_name, nullable in COLUMNS:
+        op.alter_column(
+            table, column,
+            type_=postgresql.ENUM(name=type_name, create_type=False),
+            existing_type=sa.SmallInteger(),
+            existing_nullable=nullable,
+            postgresql_using=_to_name(column, ENUMS[type_name], type_name),
+        )
@@ -0,0 +1,220 @@
+"""maintain users.storage_used_bytes with triggers
+
+Revision ID: 016_add_storage_usage_triggers
+Revises: 015_store_ticket_enums_as_smallint
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '016_add_storage_usage_triggers'
+down_revision = '015_store_ticket_enums_as_smallint'
+branch_labels = None
+depends_on = None
+
+
+# Snapshot of app/models/storage_triggers.py at this revision
+STORAGE_TRIGGER_DDL = [
+    # Row sizes
+    """
+    CREATE OR REPLACE FUNCTION addon_storage_bytes(a addons) RETURNS bigint
+    LANGUAGE sql IMMUTABLE AS $$
+        SELECT coalesce(octet_length(a.name), 0) + coalesce(octet_length(a.slug), 0)
+             + coalesce(octet_length(a.description), 0) + coalesce(octet_length(a.homepage), 0)
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION version_storage_bytes(v versions) RETURNS bigint
+    LANGUAGE sql IMMUTABLE AS $$
+        SELECT coalesce(octet_length(v.version), 0) + coalesce(octet_length(v.download_url), 0)
+             + coalesce(octet_length(v.changelog_url), 0) + coalesce(octet_length(v.description), 0)
+             + coalesce(octet_length(v.changelog_content), 0)
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION add_user_storage(target_user_id integer, delta bigint) RETURNS void
+    LANGUAGE sql AS $$
+        UPDATE users SET storage_used_bytes = coalesce(storage_used_bytes, 0) + delta
+        WHERE id = target_user_id AND delta <> 0
+    $$
+    """,
+    # Addons
+    """
+    CREATE OR REPLACE FUNCTION track_addon_storage() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    DECLARE
+        versions_bytes bigint;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            PERFORM add_user_storage(NEW.owner_id, addon_storage_bytes(NEW));
+            RETURN NEW;
+        END IF;
+
+        IF TG_OP = 'UPDATE' AND NEW.owner_id = OLD.owner_id THEN
+            PERFORM add_user_storage(NEW.owner_id, addon_storage_bytes(NEW) - addon_storage_bytes(OLD));
+            RETURN NEW;
+        END IF;
+
+        -- Deleted or moved: the addon's versions go with it
+        SELECT coalesce(sum(version_storage_bytes(v)), 0) INTO versions_bytes
+        FROM versions v WHERE v.addon_id = OLD.id;
+        PERFORM add_user_storage(OLD.owner_id, -(addon_storage_bytes(OLD) + versions_bytes));
+        IF TG_OP = 'DELETE' THEN
+            -- Versions cascade after this row is gone and find no owner
+            RETURN OLD;
+        END IF;
+        PERFORM add_user_storage(NEW.owner_id, addon_storage_bytes(NEW) + versions_bytes);
+        RETURN NEW;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS addons_storage_write ON addons",
+    """
+    CREATE TRIGGER addons_storage_write AFTER INSERT OR UPDATE ON addons
+    FOR EACH ROW EXECUTE FUNCTION track_addon_storage()
+    """,
+    "DROP TRIGGER IF EXISTS addons_storage_delete ON addons",
+    """
+    CREATE TRIGGER addons_storage_delete BEFORE DELETE ON addons
+    FOR EACH ROW EXECUTE FUNCTION track_addon_storage()
+    """,
+    # Versions
+    """
+    CREATE OR REPLACE FUNCTION track_version_storage() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP = 'UPDATE' AND NEW.addon_id = OLD.addon_id THEN
+            PERFORM add_user_storage(
+                (SELECT owner_id FROM addons WHERE id = NEW.addon_id),
+                version_storage_bytes(NEW) - version_storage_bytes(OLD)
+            );
+            RETURN NULL;
+        END IF;
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM add_user_storage(
+                (SELECT owner_id FROM addons WHERE id = OLD.addon_id),
+                -version_storage_bytes(OLD)
+            );
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM add_user_storage(
+                (SELECT owner_id FROM addons WHERE id = NEW.addon_id),
+                version_storage_bytes(NEW)
+            );
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS versions_storage ON versions",
+    """
+    CREATE TRIGGER versions_storage AFTER INSERT OR UPDATE OR DELETE ON versions
+    FOR EACH ROW EXECUTE FUNCTION track_version_storage()
+    """,
+    # Ticket attachments (owned by the ticket's user)
+    """
+    CREATE OR REPLACE FUNCTION ticket_message_owner(target_message_id integer) RETURNS integer
+    LANGUAGE sql STABLE AS $$
+        SELECT t.user_id FROM ticket_messages m JOIN tickets t ON t.id = m.ticket_id
+        WHERE m.id = target_message_id
+    $$
+    """,
+    """
+    CREATE OR REPLACE FUNCTION track_attachment_storage() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            PERFORM add_user_storage(ticket_message_owner(OLD.message_id), -coalesce(OLD.file_size, 0));
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            PERFORM add_user_storage(ticket_message_owner(NEW.message_id), coalesce(NEW.file_size, 0));
+        END IF;
+        RETURN NULL;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS ticket_attachments_storage ON ticket_attachments",
+    """
+    CREATE TRIGGER ticket_attachments_storage AFTER INSERT OR UPDATE OF file_size, message_id OR DELETE
+    ON ticket_attachments FOR EACH ROW EXECUTE FUNCTION track_attachment_storage()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION release_message_attachment_storage() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM add_user_storage(
+            ticket_message_owner(OLD.id),
+            -(SELECT coalesce(sum(file_size), 0) FROM ticket_attachments WHERE message_id = OLD.id)
+        );
+        RETURN OLD;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS ticket_messages_storage_delete ON ticket_messages",
+    """
+    CREATE TRIGGER ticket_messages_storage_delete BEFORE DELETE ON ticket_messages
+    FOR EACH ROW EXECUTE FUNCTION release_message_attachment_storage()
+    """,
+    """
+    CREATE OR REPLACE FUNCTION release_ticket_attachment_storage() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        PERFORM add_user_storage(
+            OLD.user_id,
+            -(SELECT coalesce(sum(a.file_size), 0)
+              FROM ticket_attachments a JOIN ticket_messages m ON m.id = a.message_id
+              WHERE m.ticket_id = OLD.id)
+        );
+        RETURN OLD;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS tickets_storage_delete ON tickets",
+    """
+    CREATE TRIGGER tickets_storage_delete BEFORE DELETE ON tickets
+    FOR EACH ROW EXECUTE FUNCTION release_ticket_attachment_storage()
+    """,
+]
+
+
+# Recompute every user's usage once; the triggers keep it current from here
+BACKFILL = """
+UPDATE users u SET storage_used_bytes =
+    coalesce((SELECT sum(addon_storage_bytes(a)) FROM addons a WHERE a.owner_id = u.id), 0)
+  + coalesce((SELECT sum(version_storage_bytes(v)) FROM versions v
+              JOIN addons a ON a.id = v.addon_id WHERE a.owner_id = u.id), 0)
+  + coalesce((SELECT sum(att.file_size) FROM ticket_attachments att
+              JOIN ticket_messages m ON m.id = att.message_id
+              JOIN tickets t ON t.id = m.ticket_id WHERE t.user_id = u.id), 0)
+"""
+
+
+def upgrade() -> None:
+    for statement in STORAGE_TRIGGER_DDL:
+        op.execute(statement)
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    for trigger, table in (
+        ('tickets_storage_delete', 'tickets'),
+        ('ticket_messages_storage_delete', 'ticket_messages'),
+        ('ticket_attachments_storage', 'ticket_attachments'),
+        ('versions_storage', 'versions'),
+        ('addons_storage_delete', 'addons'),
+        ('addons_storage_write', 'addons'),
+    ):
+        op.execute(f'DROP TRIGGER IF EXISTS {trigger} ON {table}')
+    for function in (
+        'release_ticket_attachment_storage()',
+        'release_message_attachment_storage()',
+        'track_attachment_storage()',
+        'ticket_message_owner(integer)',
+        'track_version_storage()',
+        'track_addon_storage()',
+        'add_user_storage(integer, bigint)',
+        'version_storage_bytes(versions)',
+        'addon_storage_bytes(addons)',
+    ):
+        op.execute(f'DROP FUNCTION IF EXISTS {function}')
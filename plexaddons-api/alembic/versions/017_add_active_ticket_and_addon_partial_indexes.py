@@ -0,0 +1,71 @@
+"""add partial indexes for active tickets and active public addons
+
+Revision ID: 017_add_active_ticket_and_addon_partial_indexes
+Revises: 016_add_storage_usage_triggers
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '017_add_active_ticket_and_addon_partial_indexes'
+down_revision = '016_add_storage_usage_triggers'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        # Ticket status codes: OPEN = 0, IN_PROGRESS = 1 (see migration 015)
+        op.create_index(
+            'idx_tickets_open',
+            'tickets',
+            ['created_at'],
+            postgresql_where=sa.text('status IN (0, 1)'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_tickets_unassigned',
+            'tickets',
+            ['priority'],
+            postgresql_where=sa.text('assigned_admin_id IS NULL AND status IN (0, 1)'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_addons_public_active',
+            'addons',
+            ['slug'],
+            postgresql_where=sa.text('is_public = true AND is_active = true'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for name in ('idx_addons_public_active_slug', 'ix_addons_is_public'):
+            op.drop_index(name, table_name='addons', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_addons_is_public',
+            'addons',
+            ['is_public'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_addons_public_active_slug',
+            'addons',
+            ['is_public', 'is_active', 'slug'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for name, table in (
+            ('idx_addons_public_active', 'addons'),
+            ('idx_tickets_unassigned', 'tickets'),
+            ('idx_tickets_open', 'tickets'),
+        ):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
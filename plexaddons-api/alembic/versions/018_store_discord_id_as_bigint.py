@@ -0,0 +1,36 @@
+"""store users.discord_id as bigint
+
+Revision ID: 018_store_discord_id_as_bigint
+Revises: 017_add_active_ticket_and_addon_partial_indexes
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '018_store_discord_id_as_bigint'
+down_revision = '017_add_active_ticket_and_addon_partial_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Rewrites the table and rebuilds the unique index
+    op.alter_column(
+        'users', 'discord_id',
+        type_=sa.BigInteger(),
+        existing_type=sa.String(length=20),
+        existing_nullable=False,
+        postgresql_using='discord_id::bigint',
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'users', 'discord_id',
+        type_=sa.String(length=20),
+        existing_type=sa.BigInteger(),
+        existing_nullable=False,
+        postgresql_using='discord_id::text',
+    )
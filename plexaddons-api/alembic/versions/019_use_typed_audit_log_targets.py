@@ -0,0 +1,73 @@
+"""replace admin_audit_log target_type/target_id with typed target columns
+
+Revision ID: 019_use_typed_audit_log_targets
+Revises: 018_store_discord_id_as_bigint
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '019_use_typed_audit_log_targets'
+down_revision = '018_store_discord_id_as_bigint'
+branch_labels = None
+depends_on = None
+
+
+# target_type value -> typed column; "system" and other targets have no column
+TARGETS = {
+    'user': 'target_user_id',
+    'addon': 'target_addon_id',
+    'version': 'target_version_id',
+    'ticket': 'target_ticket_id',
+    'canned_response': 'target_canned_response_id',
+}
+
+CHECK_NAME = 'ck_admin_audit_log_single_target'
+
+
+def upgrade() -> None:
+    for column in TARGETS.values():
+        op.add_column('admin_audit_log', sa.Column(column, sa.Integer(), nullable=True))
+    for target_type, column in TARGETS.items():
+        op.execute(
+            f"UPDATE admin_audit_log SET {column} = target_id "
+            f"WHERE target_type = '{target_type}'"
+        )
+    op.create_check_constraint(
+        CHECK_NAME, 'admin_audit_log',
+        f"num_nonnulls({', '.join(TARGETS.values())}) <= 1",
+    )
+    op.drop_column('admin_audit_log', 'target_id')
+    op.drop_column('admin_audit_log', 'target_type')
+
+    with op.get_context().autocommit_block():
+        for column in TARGETS.values():
+            op.create_index(
+                f'ix_admin_audit_log_{column}',
+                'admin_audit_log',
+                [column],
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for column in TARGETS.values():
+            op.drop_index(
+                f'ix_admin_audit_log_{column}',
+                table_name='admin_audit_log',
+                postgresql_concurrently=True,
+            )
+
+    op.add_column('admin_audit_log', sa.Column('target_type', sa.String(length=50), nullable=True))
+    op.add_column('admin_audit_log', sa.Column('target_id', sa.Integer(), nullable=True))
+    for target_type, column in TARGETS.items():
+        op.execute(
+            f"UPDATE admin_audit_log SET target_type = '{target_type}', target_id = {column} "
+            f"WHERE {column} IS NOT NULL"
+        )
+    op.drop_constraint(CHECK_NAME, 'admin_audit_log', type_='check')
+    for column in TARGETS.values():
+        op.drop_column('admin_audit_log', column)
@@ -0,0 +1,73 @@
+"""store ticket attachment content in content-addressed blobs
+
+Revision ID: 020_add_attachment_blobs
+Revises: 019_use_typed_audit_log_targets
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '020_add_attachment_blobs'
+down_revision = '019_use_typed_audit_log_targets'
+branch_labels = None
+depends_on = None
+
+
+FK_NAME = 'ticket_attachments_content_hash_fkey'
+
+# Existing files were never hashed; each keeps its own blob under a
+# placeholder key and ages out with the attachment retention window
+LEGACY_KEY = "'legacy-' || id"
+
+
+def upgrade() -> None:
+    op.create_table(
+        'attachment_blobs',
+        sa.Column('content_hash', sa.String(length=64), nullable=False),
+        sa.Column('storage_path', sa.String(length=500), nullable=False),
+        sa.Column('file_size', sa.BigInteger(), nullable=False),
+        sa.Column('compressed_size', sa.BigInteger(), nullable=True),
+        sa.Column('is_compressed', sa.Boolean(), nullable=True),
+        sa.Column('compressed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('content_hash'),
+    )
+    op.execute(f"""
+        INSERT INTO attachment_blobs
+            (content_hash, storage_path, file_size, compressed_size, is_compressed, compressed_at, created_at)
+        SELECT {LEGACY_KEY}, file_path, file_size, compressed_size, is_compressed, compressed_at, created_at
+        FROM ticket_attachments
+    """)
+
+    op.add_column('ticket_attachments', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.execute(f"UPDATE ticket_attachments SET content_hash = {LEGACY_KEY}")
+    op.alter_column('ticket_attachments', 'content_hash', nullable=False)
+    op.create_foreign_key(FK_NAME, 'ticket_attachments', 'attachment_blobs', ['content_hash'], ['content_hash'])
+    op.create_index('ix_ticket_attachments_content_hash', 'ticket_attachments', ['content_hash'])
+
+    for column in ('file_path', 'compressed_size', 'is_compressed', 'compressed_at'):
+        op.drop_column('ticket_attachments', column)
+
+
+def downgrade() -> None:
+    op.add_column('ticket_attachments', sa.Column('file_path', sa.String(length=500), nullable=True))
+    op.add_column('ticket_attachments', sa.Column('compressed_size', sa.BigInteger(), nullable=True))
+    op.add_column('ticket_attachments', sa.Column('is_compressed', sa.Boolean(), nullable=True))
+    op.add_column('ticket_attachments', sa.Column('compressed_at', sa.DateTime(timezone=True), nullable=True))
+    # Deduplicated attachments end up sharing one file path
+    op.execute("""
+        UPDATE ticket_attachments t SET
+            file_path = b.storage_path,
+            compressed_size = b.compressed_size,
+            is_compressed = b.is_compressed,
+            compressed_at = b.compressed_at
+        FROM attachment_blobs b WHERE b.content_hash = t.content_hash
+    """)
+    op.alter_column('ticket_attachments', 'file_path', nullable=False)
+
+    op.drop_index('ix_ticket_attachments_content_hash', table_name='ticket_attachments')
+    op.drop_constraint(FK_NAME, 'ticket_attachments', type_='foreignkey')
+    op.drop_column('ticket_attachments', 'content_hash')
+    op.drop_table('attachment_blobs')
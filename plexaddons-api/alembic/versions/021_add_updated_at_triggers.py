@@ -0,0 +1,51 @@
+"""maintain updated_at with a trigger instead of ORM onupdate
+
+Revision ID: 021_add_updated_at_triggers
+Revises: 020_add_attachment_blobs
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '021_add_updated_at_triggers'
+down_revision = '020_add_attachment_blobs'
+branch_labels = None
+depends_on = None
+
+
+# Snapshot of app/models/timestamp_triggers.py at this revision
+
+# Tables with an updated_at column
+UPDATED_AT_TABLES = ["users", "subscriptions", "addons", "tickets", "canned_responses", "organizations"]
+
+UPDATED_AT_TRIGGER_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF NEW.updated_at IS NOT DISTINCT FROM OLD.updated_at THEN
+            NEW.updated_at = now();
+        END IF;
+        RETURN NEW;
+    END
+    $$
+    """,
+]
+for _table in UPDATED_AT_TABLES:
+    UPDATED_AT_TRIGGER_DDL += [
+        f"DROP TRIGGER IF EXISTS {_table}_set_updated_at ON {_table}",
+        f"CREATE TRIGGER {_table}_set_updated_at BEFORE UPDATE ON {_table} "
+        "FOR EACH ROW EXECUTE FUNCTION set_updated_at()",
+    ]
+
+
+def upgrade() -> None:
+    for statement in UPDATED_AT_TRIGGER_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    for table in UPDATED_AT_TABLES:
+        op.execute(f'DROP TRIGGER IF EXISTS {table}_set_updated_at ON {table}')
+    op.execute('DROP FUNCTION IF EXISTS set_updated_at()')
@@ -0,0 +1,55 @@
+"""replace the per-addon release index with a covering one for the latest version
+
+Revision ID: 022_add_latest_version_covering_index
+Revises: 021_add_updated_at_triggers
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '022_add_latest_version_covering_index'
+down_revision = '021_add_updated_at_triggers'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Index-only scans skip the heap only for pages marked all-visible
+    op.execute('ALTER TABLE versions SET (autovacuum_vacuum_scale_factor = 0.02)')
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_versions_latest_covering',
+            'versions',
+            ['addon_id', sa.text('release_date DESC'), sa.text('created_at DESC')],
+            postgresql_include=['version'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'idx_versions_addon_release_desc',
+            table_name='versions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_versions_addon_release_desc',
+            'versions',
+            ['addon_id', sa.text('release_date DESC')],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.drop_index(
+            'idx_versions_latest_covering',
+            table_name='versions',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+    op.execute('ALTER TABLE versions RESET (autovacuum_vacuum_scale_factor)')
@@ -0,0 +1,100 @@
+"""add composite indexes for ticket, API key and version check lookups
+
+Revision ID: 023_add_composite_lookup_indexes
+Revises: 022_add_latest_version_covering_index
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '023_add_composite_lookup_indexes'
+down_revision = '022_add_latest_version_covering_index'
+branch_labels = None
+depends_on = None
+
+
+# (name, table, columns, partial index predicate)
+NEW_INDEXES = [
+    ('idx_tickets_priority_updated_at', 'tickets', ['priority', 'updated_at'], None),
+    ('idx_tickets_status_priority_updated_at', 'tickets', ['status', 'priority', 'updated_at'], None),
+    ('idx_tickets_assigned_status', 'tickets', ['assigned_admin_id', 'status'], 'assigned_admin_id IS NOT NULL'),
+    ('idx_api_keys_user_active', 'api_keys', ['user_id', 'is_active'], None),
+]
+
+# (name, table); superseded by the indexes above or duplicates
+OLD_INDEXES = [
+    ('idx_tickets_priority', 'tickets'),
+    ('idx_tickets_assigned_admin_status', 'tickets'),
+    ('idx_api_keys_user_id', 'api_keys'),
+    ('ix_api_keys_is_active', 'api_keys'),
+    # Prefix of idx_version_checks_addon_timestamp
+    ('idx_version_checks_addon_id', 'version_checks'),
+    # Duplicate of idx_version_checks_timestamp (column index=True)
+    ('ix_version_checks_timestamp', 'version_checks'),
+]
+
+
+def upgrade() -> None:
+    # Tickets and version checks were created by create_all, hence if_(not_)exists
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in NEW_INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                postgresql_where=sa.text(where) if where else None,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        for name, table in OLD_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_version_checks_timestamp',
+            'version_checks',
+            ['timestamp'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_version_checks_addon_id',
+            'version_checks',
+            ['addon_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_api_keys_is_active',
+            'api_keys',
+            ['is_active'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_api_keys_user_id',
+            'api_keys',
+            ['user_id'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_tickets_assigned_admin_status',
+            'tickets',
+            ['assigned_admin_id', 'status'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'idx_tickets_priority',
+            'tickets',
+            ['priority'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for name, table, _, _ in NEW_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,37 @@
+"""store users.badges as a JSONB array
+
+Revision ID: 024_convert_badges_to_jsonb
+Revises: 023_add_composite_lookup_indexes
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '024_convert_badges_to_jsonb'
+down_revision = '023_add_composite_lookup_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing values were written with json.dumps, so they cast cleanly
+    op.alter_column(
+        'users', 'badges',
+        type_=postgresql.JSONB(),
+        existing_type=sa.Text(),
+        existing_nullable=True,
+        postgresql_using='badges::jsonb',
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'users', 'badges',
+        type_=sa.Text(),
+        existing_type=postgresql.JSONB(),
+        existing_nullable=True,
+        postgresql_using='badges::text',
+    )
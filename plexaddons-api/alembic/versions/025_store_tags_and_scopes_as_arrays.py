@@ -0,0 +1,55 @@
+"""store addons.tags and api_keys.scopes as text arrays
+
+Revision ID: 025_store_tags_and_scopes_as_arrays
+Revises: 024_convert_badges_to_jsonb
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '025_store_tags_and_scopes_as_arrays'
+down_revision = '024_convert_badges_to_jsonb'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = [
+    ('addons', 'tags', True),
+    ('api_keys', 'scopes', False),
+]
+
+
+def upgrade() -> None:
+    # USING cannot contain a subquery, so unpack the JSON arrays in a function
+    op.execute("""
+        CREATE FUNCTION pg_temp.json_to_text_array(j json) RETURNS varchar(32)[]
+        LANGUAGE sql IMMUTABLE AS $$
+            SELECT coalesce(array_agg(e), '{}') FROM json_array_elements_text(j) e
+        $$
+    """)
+    for table, column, nullable in COLUMNS:
+        op.alter_column(table, column, server_default=None)
+        op.alter_column(
+            table, column,
+            type_=postgresql.ARRAY(sa.String(length=32)),
+            existing_type=sa.JSON(),
+            existing_nullable=nullable,
+            postgresql_using=f'pg_temp.json_to_text_array({column})',
+        )
+        op.alter_column(table, column, server_default='{}')
+
+
+def downgrade() -> None:
+    for table, column, nullable in COLUMNS:
+        op.alter_column(table, column, server_default=None)
+        op.alter_column(
+            table, column,
+            type_=sa.JSON(),
+            existing_type=postgresql.ARRAY(sa.String(length=32)),
+            existing_nullable=nullable,
+            postgresql_using=f'to_json({column})',
+        )
+        op.alter_column(table, column, server_default='[]')
@@ -0,0 +1,109 @@
+"""partition version_checks by month on timestamp
+
+Revision ID: 026_partition_version_checks
+Revises: 025_store_tags_and_scopes_as_arrays
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '026_partition_version_checks'
+down_revision = '025_store_tags_and_scopes_as_arrays'
+branch_labels = None
+depends_on = None
+
+
+COLUMNS = 'id, addon_id, version_id, checked_version, client_ip_hash, timestamp'
+
+# One partition per month from the oldest row through next month.
+# The app's scheduler keeps creating them ahead (see main.py).
+CREATE_MONTHLY_PARTITIONS = """
+DO $$
+DECLARE
+    month_start timestamptz;
+BEGIN
+    SELECT date_trunc('month', COALESCE(min(timestamp), now()) AT TIME ZONE 'UTC') AT TIME ZONE 'UTC'
+        INTO month_start FROM version_checks_unpartitioned;
+    WHILE month_start <= now() + interval '1 month' LOOP
+        EXECUTE format(
+            'CREATE TABLE version_checks_%s PARTITION OF version_checks FOR VALUES FROM (%L) TO (%L)',
+            to_char(month_start AT TIME ZONE 'UTC', 'YYYY_MM'),
+            month_start,
+            month_start + interval '1 month'
+        );
+        month_start := month_start + interval '1 month';
+    END LOOP;
+END $$;
+"""
+
+
+def upgrade() -> None:
+    # version_checks was created by 011b (or create_all on older databases)
+    op.execute('ALTER TABLE version_checks RENAME TO version_checks_unpartitioned')
+    for index in (
+        'idx_version_checks_timestamp',
+        'idx_version_checks_addon_timestamp',
+        'idx_version_checks_addon_id',
+        'ix_version_checks_id',
+        'ix_version_checks_timestamp',
+    ):
+        op.execute(f'DROP INDEX IF EXISTS {index}')
+    op.execute('ALTER TABLE version_checks_unpartitioned RENAME CONSTRAINT version_checks_pkey TO version_checks_unpartitioned_pkey')
+    
+    # The partition key must be part of the primary key; keep the id sequence
+    op.execute("""
+        CREATE TABLE version_checks (
+            id INTEGER NOT NULL DEFAULT nextval('version_checks_id_seq'),
+            addon_id INTEGER NOT NULL REFERENCES addons(id) ON DELETE CASCADE,
+            version_id INTEGER REFERENCES versions(id) ON DELETE SET NULL,
+            checked_version VARCHAR(50),
+            client_ip_hash VARCHAR(64),
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT version_checks_pkey PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+    op.execute(CREATE_MONTHLY_PARTITIONS)
+    op.execute(
+        f'INSERT INTO version_checks ({COLUMNS}) '
+        f'SELECT {COLUMNS} FROM version_checks_unpartitioned WHERE timestamp IS NOT NULL'
+    )
+    
+    op.execute('ALTER SEQUENCE version_checks_id_seq OWNED BY version_checks.id')
+    op.drop_table('version_checks_unpartitioned')
+    
+    op.create_index('idx_version_checks_timestamp', 'version_checks', ['timestamp'])
+    op.create_index('idx_version_checks_addon_timestamp', 'version_checks', ['addon_id', 'timestamp'])
+
+
+def downgrade() -> None:
+    op.execute('ALTER TABLE version_checks RENAME TO version_checks_partitioned')
+    op.execute('DROP INDEX IF EXISTS idx_version_checks_timestamp')
+    op.execute('DROP INDEX IF EXISTS idx_version_checks_addon_timestamp')
+    op.execute('ALTER TABLE version_checks_partitioned RENAME CONSTRAINT version_checks_pkey TO version_checks_partitioned_pkey')
+    
+    op.create_table(
+        'version_checks',
+        sa.Column('id', sa.Integer(), nullable=False, server_default=sa.text("nextval('version_checks_id_seq')")),
+        sa.Column('addon_id', sa.Integer(), nullable=False),
+        sa.Column('version_id', sa.Integer(), nullable=True),
+        sa.Column('checked_version', sa.String(length=50), nullable=True),
+        sa.Column('client_ip_hash', sa.String(length=64), nullable=True),
+        sa.Column('timestamp', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['addon_id'], ['addons.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['version_id'], ['versions.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.execute(
+        f'INSERT INTO version_checks ({COLUMNS}) '
+        f'SELECT {COLUMNS} FROM version_checks_partitioned'
+    )
+    
+    op.execute('ALTER SEQUENCE version_checks_id_seq OWNED BY version_checks.id')
+    # Dropping the parent drops every partition with it
+    op.drop_table('version_checks_partitioned')
+    
+    op.create_index('ix_version_checks_id', 'version_checks', ['id'])
+    op.create_index('idx_version_checks_timestamp', 'version_checks', ['timestamp'])
+    op.create_index('idx_version_checks_addon_timestamp', 'version_checks', ['addon_id', 'timestamp'])
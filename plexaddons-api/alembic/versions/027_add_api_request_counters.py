@@ -0,0 +1,49 @@
+"""add api_request_counters for per-minute request counts
+
+Revision ID: 027_add_api_request_counters
+Revises: 026_partition_version_checks
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '027_add_api_request_counters'
+down_revision = '026_partition_version_checks'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'api_request_counters',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('endpoint', sa.String(length=255), nullable=False),
+        sa.Column('method', sa.String(length=10), nullable=False),
+        sa.Column('status_code', sa.SmallInteger(), nullable=False),
+        sa.Column('bucket_minute', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'uq_api_request_counters_key',
+        'api_request_counters',
+        ['endpoint', 'method', 'status_code', 'bucket_minute'],
+        unique=True,
+    )
+    op.create_index('idx_api_request_counters_bucket', 'api_request_counters', ['bucket_minute'])
+
+    # Seed the counters from the rows logged so far so weekly totals carry over
+    op.execute("""
+        INSERT INTO api_request_counters (endpoint, method, status_code, bucket_minute, count)
+        SELECT endpoint, method, COALESCE(status_code, 500), date_trunc('minute', timestamp), count(*)
+        FROM api_request_logs
+        GROUP BY 1, 2, 3, 4
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_api_request_counters_bucket', table_name='api_request_counters')
+    op.drop_index('uq_api_request_counters_key', table_name='api_request_counters')
+    op.drop_table('api_request_counters')
@@ -0,0 +1,56 @@
+"""make the addon_usage_stats unique index treat NULL version_ids as equal
+
+Revision ID: 028_usage_stats_nulls_not_distinct
+Revises: 027_add_api_request_counters
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '028_usage_stats_nulls_not_distinct'
+down_revision = '027_add_api_request_counters'
+branch_labels = None
+depends_on = None
+
+
+INDEX_NAME = 'idx_addon_usage_stats_addon_version_date'
+COLUMNS = ['addon_id', 'version_id', 'date']
+
+
+def upgrade() -> None:
+    # addon_usage_stats was created by create_all, hence if_(not_)exists.
+    # Unresolved versions could get several rows per addon/day; fold them
+    # into the oldest one before the index starts rejecting them
+    op.execute("""
+        WITH merged AS (
+            SELECT min(id) AS keep_id, addon_id, date,
+                   sum(check_count) AS check_count, max(unique_users) AS unique_users
+            FROM addon_usage_stats
+            WHERE version_id IS NULL
+            GROUP BY addon_id, date
+            HAVING count(*) > 1
+        ), updated AS (
+            UPDATE addon_usage_stats s
+            SET check_count = m.check_count, unique_users = m.unique_users
+            FROM merged m WHERE s.id = m.keep_id
+        )
+        DELETE FROM addon_usage_stats s
+        USING merged m
+        WHERE s.version_id IS NULL AND s.addon_id = m.addon_id
+          AND s.date = m.date AND s.id <> m.keep_id
+    """)
+    op.drop_index(INDEX_NAME, table_name='addon_usage_stats', if_exists=True)
+    op.create_index(
+        INDEX_NAME,
+        'addon_usage_stats',
+        COLUMNS,
+        unique=True,
+        postgresql_nulls_not_distinct=True,
+        if_not_exists=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(INDEX_NAME, table_name='addon_usage_stats', if_exists=True)
+    op.create_index(INDEX_NAME, 'addon_usage_stats', COLUMNS, unique=True, if_not_exists=True)
@@ -0,0 +1,34 @@
+"""store api_keys.key_hash as the raw SHA-256 digest
+
+Revision ID: 029_store_api_key_hash_as_bytea
+Revises: 028_usage_stats_nulls_not_distinct
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '029_store_api_key_hash_as_bytea'
+down_revision = '028_usage_stats_nulls_not_distinct'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # idx_api_keys_key_hash is rebuilt as part of the type change
+    op.alter_column(
+        'api_keys',
+        'key_hash',
+        type_=sa.LargeBinary(length=32),
+        postgresql_using="decode(key_hash, 'hex')",
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'api_keys',
+        'key_hash',
+        type_=sa.String(length=128),
+        postgresql_using="encode(key_hash, 'hex')",
+    )
@@ -0,0 +1,72 @@
+"""add users.effective_tier maintained by a trigger
+
+Revision ID: 030_add_users_effective_tier
+Revises: 029_store_api_key_hash_as_bytea
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '030_add_users_effective_tier'
+down_revision = '029_store_api_key_hash_as_bytea'
+branch_labels = None
+depends_on = None
+
+
+# Snapshot of app/models/tier_triggers.py at this revision
+EFFECTIVE_TIER_TRIGGER_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION set_effective_tier() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF NEW.temp_tier IS NOT NULL AND NEW.temp_tier_expires_at > now() THEN
+            NEW.effective_tier = NEW.temp_tier;
+        ELSE
+            NEW.effective_tier = NEW.subscription_tier;
+        END IF;
+        RETURN NEW;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS users_set_effective_tier ON users",
+    "CREATE TRIGGER users_set_effective_tier "
+    "BEFORE INSERT OR UPDATE OF subscription_tier, temp_tier, temp_tier_expires_at ON users "
+    "FOR EACH ROW EXECUTE FUNCTION set_effective_tier()",
+]
+
+
+def upgrade() -> None:
+    op.add_column(
+        'users',
+        # Same type as subscription_tier (String(20) since 001)
+        sa.Column('effective_tier', sa.String(length=20), nullable=True),
+    )
+    for statement in EFFECTIVE_TIER_TRIGGER_DDL:
+        op.execute(statement)
+    # Temp tiers that already lapsed are cleared, as the expiry job would
+    op.execute("""
+        UPDATE users SET
+            temp_tier = NULL,
+            temp_tier_expires_at = NULL,
+            temp_tier_granted_by = NULL,
+            temp_tier_granted_at = NULL
+        WHERE temp_tier IS NOT NULL AND temp_tier_expires_at <= now()
+    """)
+    # Backfill the rest directly, without bumping every user's updated_at
+    op.execute('ALTER TABLE users DISABLE TRIGGER users_set_updated_at')
+    op.execute("""
+        UPDATE users SET effective_tier = CASE
+            WHEN temp_tier IS NOT NULL AND temp_tier_expires_at > now() THEN temp_tier
+            ELSE subscription_tier
+        END
+    """)
+    op.execute('ALTER TABLE users ENABLE TRIGGER users_set_updated_at')
+    op.alter_column('users', 'effective_tier', nullable=False)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER IF EXISTS users_set_effective_tier ON users')
+    op.execute('DROP FUNCTION IF EXISTS set_effective_tier()')
+    op.drop_column('users', 'effective_tier')
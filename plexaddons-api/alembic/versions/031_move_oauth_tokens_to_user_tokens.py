@@ -0,0 +1,46 @@
+"""move the Discord OAuth tokens off users into user_tokens
+
+Revision ID: 031_move_oauth_tokens_to_user_tokens
+Revises: 030_add_users_effective_tier
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '031_move_oauth_tokens_to_user_tokens'
+down_revision = '030_add_users_effective_tier'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'user_tokens',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('discord_access_token', sa.Text(), nullable=True),
+        sa.Column('discord_refresh_token', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id'),
+    )
+    op.execute("""
+        INSERT INTO user_tokens (user_id, discord_access_token, discord_refresh_token)
+        SELECT id, discord_access_token, discord_refresh_token
+        FROM users
+        WHERE discord_access_token IS NOT NULL OR discord_refresh_token IS NOT NULL
+    """)
+    op.drop_column('users', 'discord_refresh_token')
+    op.drop_column('users', 'discord_access_token')
+
+
+def downgrade() -> None:
+    op.add_column('users', sa.Column('discord_access_token', sa.Text(), nullable=True))
+    op.add_column('users', sa.Column('discord_refresh_token', sa.Text(), nullable=True))
+    op.execute("""
+        UPDATE users u SET
+            discord_access_token = t.discord_access_token,
+            discord_refresh_token = t.discord_refresh_token
+        FROM user_tokens t WHERE t.user_id = u.id
+    """)
+    op.drop_table('user_tokens')
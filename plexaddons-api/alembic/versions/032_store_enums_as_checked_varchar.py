@@ -0,0 +1,101 @@
+"""store tier, provider, status and role enums as CHECK-constrained VARCHAR values
+
+Revision ID: 032_store_enums_as_checked_varchar
+Revises: 031_move_oauth_tokens_to_user_tokens
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '032_store_enums_as_checked_varchar'
+down_revision = '031_move_oauth_tokens_to_user_tokens'
+branch_labels = None
+depends_on = None
+
+
+# Enum values as of this revision, copied here so later model changes
+# cannot alter what this migration does
+TIERS = ['free', 'pro', 'premium']
+PROVIDERS = ['stripe', 'paypal']
+STATUSES = [
+    'active', 'past_due', 'canceled', 'unpaid',
+    'trialing', 'paused', 'incomplete', 'incomplete_expired',
+]
+ROLES = ['owner', 'admin', 'member']
+
+# (table, column, values)
+COLUMNS = [
+    ('users', 'subscription_tier', TIERS),
+    ('users', 'temp_tier', TIERS),
+    ('users', 'effective_tier', TIERS),
+    ('subscriptions', 'provider', PROVIDERS),
+    ('subscriptions', 'tier', TIERS),
+    ('subscriptions', 'status', STATUSES),
+    ('subscription_events', 'provider', PROVIDERS),
+    ('organization_members', 'role', ROLES),
+]
+
+# Native types create_all made for these columns (organizationrole also by 005)
+PG_ENUM_TYPES = ['subscriptiontier', 'paymentprovider', 'subscriptionstatus', 'organizationrole']
+
+PARTIAL_INDEX = 'ix_sub_user_status_created'
+
+# Postgres refuses to retype a column named in a trigger's UPDATE OF list,
+# so the effective_tier trigger from 030 is dropped around the ALTERs. The
+# function only copies tier values between columns, so it works unchanged
+# on either representation.
+EFFECTIVE_TIER_TRIGGER = 'users_set_effective_tier'
+
+CREATE_EFFECTIVE_TIER_TRIGGER = (
+    f"CREATE TRIGGER {EFFECTIVE_TIER_TRIGGER} "
+    "BEFORE INSERT OR UPDATE OF subscription_tier, temp_tier, temp_tier_expires_at ON users "
+    "FOR EACH ROW EXECUTE FUNCTION set_effective_tier()"
+)
+
+
+def _create_partial_index(statuses: str) -> None:
+    op.execute(
+        f"CREATE INDEX {PARTIAL_INDEX} ON subscriptions (user_id, status, created_at DESC) "
+        f"WHERE status IN ({statuses})"
+    )
+
+
+def upgrade() -> None:
+    # The predicate compares against the stored strings, which change below
+    op.execute(f'DROP INDEX IF EXISTS {PARTIAL_INDEX}')
+    op.execute(f'DROP TRIGGER IF EXISTS {EFFECTIVE_TIER_TRIGGER} ON users')
+
+    # Columns hold either a PG enum of member names (create_all) or VARCHAR
+    # with whatever was written; every value is its member name lowercased
+    for table, column, _ in COLUMNS:
+        op.execute(
+            f"ALTER TABLE IF EXISTS {table} ALTER COLUMN {column} "
+            f"TYPE VARCHAR(20) USING lower({column}::text)"
+        )
+    op.execute(f"DROP TYPE IF EXISTS {', '.join(PG_ENUM_TYPES)}")
+
+    for table, column, values in COLUMNS:
+        allowed = ", ".join(f"'{value}'" for value in values)
+        op.execute(
+            f"ALTER TABLE IF EXISTS {table} ADD CONSTRAINT ck_{table}_{column} "
+            f"CHECK ({column} IN ({allowed}))"
+        )
+
+    _create_partial_index("'active', 'trialing', 'past_due'")
+    op.execute(CREATE_EFFECTIVE_TIER_TRIGGER)
+
+
+def downgrade() -> None:
+    # Back to member names in VARCHAR columns, which the old SQLEnum binds
+    # and reads as well; the native types are not recreated
+    op.execute(f'DROP INDEX IF EXISTS {PARTIAL_INDEX}')
+    op.execute(f'DROP TRIGGER IF EXISTS {EFFECTIVE_TIER_TRIGGER} ON users')
+    for table, column, _ in COLUMNS:
+        op.execute(f"ALTER TABLE IF EXISTS {table} DROP CONSTRAINT IF EXISTS ck_{table}_{column}")
+        op.execute(
+            f"ALTER TABLE IF EXISTS {table} ALTER COLUMN {column} "
+            f"TYPE VARCHAR(20) USING upper({column})"
+        )
+    _create_partial_index("'ACTIVE', 'TRIALING', 'PAST_DUE'")
+    op.execute(CREATE_EFFECTIVE_TIER_TRIGGER)
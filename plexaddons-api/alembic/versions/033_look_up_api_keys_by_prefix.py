@@ -0,0 +1,39 @@
+"""look up active API keys by key_prefix instead of a unique key_hash index
+
+Revision ID: 033_look_up_api_keys_by_prefix
+Revises: 032_store_enums_as_checked_varchar
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '033_look_up_api_keys_by_prefix'
+down_revision = '032_store_enums_as_checked_varchar'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_api_keys_prefix_active',
+            'api_keys',
+            ['key_prefix'],
+            postgresql_where=sa.text('is_active = true'),
+            postgresql_concurrently=True,
+        )
+        op.drop_index('idx_api_keys_key_hash', table_name='api_keys', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_api_keys_key_hash',
+            'api_keys',
+            ['key_hash'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.drop_index('idx_api_keys_prefix_active', table_name='api_keys', postgresql_concurrently=True)
@@ -0,0 +1,54 @@
+"""index ticket_messages by (ticket_id, created_at) for ordered thread loads
+
+Revision ID: 034_add_ticket_messages_thread_index
+Revises: 033_look_up_api_keys_by_prefix
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '034_add_ticket_messages_thread_index'
+down_revision = '033_look_up_api_keys_by_prefix'
+branch_labels = None
+depends_on = None
+
+
+# Superseded by the composite index (ticket_id is its prefix); nothing
+# orders messages by created_at across tickets
+OLD_INDEXES = [
+    ('idx_ticket_messages_ticket_id', ['ticket_id']),
+    ('idx_ticket_messages_created_at', ['created_at']),
+]
+
+
+def upgrade() -> None:
+    # ticket_messages was created by create_all, hence if_(not_)exists
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'idx_ticket_messages_ticket_created',
+            'ticket_messages',
+            ['ticket_id', 'created_at'],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        for name, _ in OLD_INDEXES:
+            op.drop_index(name, table_name='ticket_messages', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, columns in OLD_INDEXES:
+            op.create_index(
+                name,
+                'ticket_messages',
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+        op.drop_index(
+            'idx_ticket_messages_ticket_created',
+            table_name='ticket_messages',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
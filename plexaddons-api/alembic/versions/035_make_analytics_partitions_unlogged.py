@@ -0,0 +1,42 @@
+"""make the api_request_logs and version_checks partitions UNLOGGED
+
+Revision ID: 035_make_analytics_partitions_unlogged
+Revises: 034_add_ticket_messages_thread_index
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '035_make_analytics_partitions_unlogged'
+down_revision = '034_add_ticket_messages_thread_index'
+branch_labels = None
+depends_on = None
+
+
+# Partitioned parents cannot be unlogged themselves; their partitions can,
+# and the scheduler creates new ones UNLOGGED (see main.py)
+PARENTS = ['api_request_logs', 'version_checks']
+
+SET_PARTITIONS = """
+DO $$
+DECLARE
+    partition regclass;
+BEGIN
+    FOR partition IN
+        SELECT inhrelid::regclass FROM pg_inherits WHERE inhparent = '{parent}'::regclass
+    LOOP
+        EXECUTE format('ALTER TABLE %s SET {mode}', partition);
+    END LOOP;
+END $$;
+"""
+
+
+def upgrade() -> None:
+    for parent in PARENTS:
+        op.execute(SET_PARTITIONS.format(parent=parent, mode='UNLOGGED'))
+
+
+def downgrade() -> None:
+    for parent in PARENTS:
+        op.execute(SET_PARTITIONS.format(parent=parent, mode='LOGGED'))
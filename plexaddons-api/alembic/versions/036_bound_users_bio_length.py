@@ -0,0 +1,49 @@
+"""store users.bio as VARCHAR(500)
+
+Revision ID: 036_bound_users_bio_length
+Revises: 035_make_analytics_partitions_unlogged
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '036_bound_users_bio_length'
+down_revision = '035_make_analytics_partitions_unlogged'
+branch_labels = None
+depends_on = None
+
+
+BIO_MAX_LENGTH = 500
+
+
+def upgrade() -> None:
+    # Bios written around the API would make the ALTER fail halfway; report them instead
+    too_long = op.get_bind().execute(
+        sa.text("SELECT id FROM users WHERE length(bio) > :max ORDER BY id"),
+        {'max': BIO_MAX_LENGTH},
+    ).scalars().all()
+    if too_long:
+        raise RuntimeError(
+            f"users.bio is longer than {BIO_MAX_LENGTH} characters for user ids {too_long}; "
+            "shorten them before running this migration"
+        )
+
+    op.alter_column(
+        'users',
+        'bio',
+        type_=sa.String(length=BIO_MAX_LENGTH),
+        existing_type=sa.Text(),
+        existing_nullable=True,
+    )
+
+
+def downgrade() -> None:
+    op.alter_column(
+        'users',
+        'bio',
+        type_=sa.Text(),
+        existing_type=sa.String(length=BIO_MAX_LENGTH),
+        existing_nullable=True,
+    )
@@ -0,0 +1,41 @@
+"""add the addon_weekly_stats materialized view
+
+Revision ID: 037_add_addon_weekly_stats_view
+Revises: 036_bound_users_bio_length
+Create Date: 2026-10-16
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '037_add_addon_weekly_stats_view'
+down_revision = '036_bound_users_bio_length'
+branch_labels = None
+depends_on = None
+
+
+# The view definition from app/models at this revision
+ADDON_WEEKLY_STATS_VIEW_DDL = [
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS addon_weekly_stats AS
+    SELECT addon_id,
+           date_trunc('week', date)::date AS week,
+           sum(check_count) AS check_count,
+           sum(unique_users) AS unique_users
+    FROM addon_usage_stats
+    GROUP BY addon_id, date_trunc('week', date)::date
+    WITH DATA
+    """,
+    # REFRESH ... CONCURRENTLY needs a unique index
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_addon_weekly_stats_addon_week "
+    "ON addon_weekly_stats (addon_id, week)",
+]
+
+
+def upgrade() -> None:
+    for statement in ADDON_WEEKLY_STATS_VIEW_DDL:
+        op.execute(statement)
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS addon_weekly_stats")
@@ -2,12 +2,12 @@ from typing import Optional, Tuple
 from fastapi import Depends, Request, HTTPException, status, Header
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from app.database import get_db
 from app.models import User, ApiKey
 from app.core.security import decode_access_token
 from app.core.exceptions import UnauthorizedError, ForbiddenError
 from app.core.rate_limit import get_rate_limiter
+from app.core.user_cache import get_cached_user
 
 
 security = HTTPBearer(auto_error=False)
@@ -30,8 +30,7 @@ async def get_current_user(
     if not user_id:
         raise UnauthorizedError("Invalid token payload")
     
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    user = result.scalar_one_or_none()
+    user = await get_cached_user(db, int(user_id))
     
     if not user:
         raise UnauthorizedError("User not found")
@@ -56,8 +55,7 @@ async def get_current_user_optional(
     if not user_id:
         return None
     
-    result = await db.execute(select(User).where(User.id == int(user_id)))
-    return result.scalar_one_or_none()
+    return await get_cached_user(db, int(user_id))
 
 
 async def get_admin_user(
@@ -70,13 +68,8 @@ async def get_admin_user(
 
 
 def get_effective_tier(user: User):
-    """Get effective tier including temp tier if active."""
-    from datetime import datetime, timezone
-    from app.models import SubscriptionTier
-    if user.temp_tier and user.temp_tier_expires_at:
-        if user.temp_tier_expires_at > datetime.now(timezone.utc):
-            return user.temp_tier
-    return user.subscription_tier
+    """Get effective tier including temp tier if active (maintained by a trigger)."""
+    return user.effective_tier
 
 
 async def require_pro(
@@ -177,8 +170,7 @@ async def get_user_from_api_key(
     if not api_key:
         return None
     
-    result = await db.execute(select(User).where(User.id == api_key.user_id))
-    return result.scalar_one_or_none()
+    return await get_cached_user(db, api_key.user_id)
 
 
 async def get_current_user_or_api_key(
@@ -202,8 +194,7 @@ async def get_current_user_or_api_key(
         if payload:
             user_id = payload.get("sub")
             if user_id:
-                result = await db.execute(select(User).where(User.id == int(user_id)))
-                user = result.scalar_one_or_none()
+                user = await get_cached_user(db, int(user_id))
                 if user:
                     # Store that this is JWT auth, not API key
                     request.state.auth_method = "jwt"
@@ -213,8 +204,7 @@ async def get_current_user_or_api_key(
     # Then try API key
     api_key = await get_api_key_from_header(x_api_key, db)
     if api_key:
-        result = await db.execute(select(User).where(User.id == api_key.user_id))
-        user = result.scalar_one_or_none()
+        user = await get_cached_user(db, api_key.user_id)
         if user:
             # Store API key for scope checking
             request.state.auth_method = "api_key"
@@ -223,7 +213,7 @@ async def get_current_user_or_api_key(
             # Record API key usage
             from app.services.api_key_service import ApiKeyService
             client_ip = request.client.host if request.client else None
-            await ApiKeyService.record_usage(db, api_key, client_ip)
+            ApiKeyService.record_usage(api_key, client_ip)
             
             return user
     
@@ -248,21 +238,19 @@ async def get_user_and_api_key(
         if payload:
             user_id = payload.get("sub")
             if user_id:
-                result = await db.execute(select(User).where(User.id == int(user_id)))
-                user = result.scalar_one_or_none()
+                user = await get_cached_user(db, int(user_id))
                 if user:
                     return user, None
     
     # Then try API key
     api_key = await get_api_key_from_header(x_api_key, db)
     if api_key:
-        result = await db.execute(select(User).where(User.id == api_key.user_id))
-        user = result.scalar_one_or_none()
+        user = await get_cached_user(db, api_key.user_id)
         if user:
             # Record API key usage
             from app.services.api_key_service import ApiKeyService
             client_ip = request.client.host if request.client else None
-            await ApiKeyService.record_usage(db, api_key, client_ip)
+            ApiKeyService.record_usage(api_key, client_ip)
             
             return user, api_key
     
@@ -1,11 +1,12 @@
 from fastapi import APIRouter, Depends, Request, Header
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from datetime import datetime, timezone
 from typing import Optional
 from app.database import get_db
 from app.services import AddonService, AnalyticsService
-from app.schemas import PublicVersionsJson, PublicAddonVersion
+from app.schemas import PublicVersionsJson
 from app.api.deps import rate_limit_check
 from app.models import Addon, Version
 
@@ -34,27 +35,30 @@ async def get_versions_json(
     
     addon_data = await AddonService.get_all_public_addons_for_json(db, client_ip_hash=client_ip_hash)
     
+    # Every plugin install polls this, so build the PublicVersionsJson shape
+    # as plain dicts and hand it straight to orjson; returning a Response
+    # skips FastAPI's response_model validation and jsonable_encoder pass
     addons_dict = {}
     for addon in addon_data:
-        addons_dict[addon["name"]] = PublicAddonVersion(
-            version=addon["version"],
-            releaseDate=addon["release_date"],
-            downloadUrl=addon["download_url"],
-            description=addon["description"],
-            breaking=addon["breaking"],
-            urgent=addon["urgent"],
-            external=addon["external"],
-            author=addon["author"],
-            homepage=addon["homepage"],
-            changelog=addon["changelog"],
-        )
+        addons_dict[addon["name"]] = {
+            "version": addon["version"],
+            "releaseDate": addon["release_date"],
+            "downloadUrl": addon["download_url"],
+            "description": addon["description"],
+            "breaking": addon["breaking"],
+            "urgent": addon["urgent"],
+            "external": addon["external"],
+            "author": addon["author"],
+            "homepage": addon["homepage"],
+            "changelog": addon["changelog"],
+        }
     
-    return PublicVersionsJson(
-        addons=addons_dict,
-        lastUpdated=datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
-        repository="https://github.com/Bali0531-RC/PlexAddons",
-        supportContact="https://discord.com/users/yourDiscordId",
-    )
+    return ORJSONResponse({
+        "addons": addons_dict,
+        "lastUpdated": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "repository": "https://github.com/Bali0531-RC/PlexAddons",
+        "supportContact": "https://discord.com/users/yourDiscordId",
+    })
 
 
 @router.get("/api/addons")
@@ -64,7 +68,7 @@ async def public_addon_list(
 ):
     """Get public addon list with basic info."""
     addon_data = await AddonService.get_all_public_addons_for_json(db)
-    return {"addons": addon_data, "count": len(addon_data)}
+    return ORJSONResponse({"addons": addon_data, "count": len(addon_data)})
 
 
 @router.get("/api/addons/{identifier}/latest")
@@ -109,47 +113,37 @@ async def public_addon_latest(
                 # Get client IP
                 client_ip = request.client.host if request.client else "unknown"
                 
-                # Find addon in database by slug or name
+                # Find addon in database by slug or name (ids only, no ORM objects)
                 addon_result = await db.execute(
-                    select(Addon).where(
+                    select(Addon.id).where(
                         (Addon.name == found_addon["name"]) | 
                         (Addon.slug == found_addon.get("slug", ""))
                     )
                 )
-                db_addon = addon_result.scalar_one_or_none()
+                addon_id = addon_result.scalar_one_or_none()
                 
-                if db_addon:
+                if addon_id:
                     # Find the version if it exists
                     version_result = await db.execute(
-                        select(Version).where(
-                            Version.addon_id == db_addon.id,
+                        select(Version.id).where(
+                            Version.addon_id == addon_id,
                             Version.version == x_current_version
                         )
                     )
-                    version = version_result.scalar_one_or_none()
-                    version_id = version.id if version else None
+                    version_id = version_result.scalar_one_or_none()
                     
-                    # Log the version check
-                    await AnalyticsService.log_version_check(
-                        db,
-                        addon_id=db_addon.id,
-                        version_id=version_id,
-                        checked_version=x_current_version,
-                        client_ip=client_ip,
-                    )
-                    
-                    # Update daily stats
+                    # Log the version check (written in batches, rolled up into daily stats)
                     ip_hash = AnalyticsService.hash_ip(client_ip)
-                    await AnalyticsService.update_daily_stats(
-                        db,
-                        addon_id=db_addon.id,
+                    AnalyticsService.log_version_check(
+                        addon_id=addon_id,
                         version_id=version_id,
+                        checked_version=x_current_version,
                         client_ip_hash=ip_hash,
                     )
             except Exception as e:
                 # Don't fail the request if analytics logging fails
                 print(f"Analytics logging error: {e}")
         
-        return found_addon
+        return ORJSONResponse(found_addon)
     
     raise NotFoundError(f"Addon '{identifier}' not found")
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query, BackgroundTasks
+from fastapi import APIRouter, Depends, Query, BackgroundTasks, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, List
 from app.database import get_db
@@ -37,12 +37,15 @@ async def list_addons(
         public_only=True,
     )
     
-    return AddonListResponse(
+    # Serialize once in pydantic-core; returning a Response skips FastAPI's
+    # response_model re-validation and jsonable_encoder pass
+    body = AddonListResponse(
         addons=[AddonResponse(**addon) for addon in addons],
         total=total,
         page=page,
         per_page=per_page,
-    )
+    ).model_dump_json()
+    return Response(content=body, media_type="application/json")
 
 
 @router.get("/mine", response_model=AddonListResponse)
@@ -63,12 +66,13 @@ async def list_my_addons(
         public_only=False,
     )
     
-    return AddonListResponse(
+    body = AddonListResponse(
         addons=[AddonResponse(**addon) for addon in addons],
         total=total,
         page=page,
         per_page=per_page,
-    )
+    ).model_dump_json()
+    return Response(content=body, media_type="application/json")
 
 
 @router.post("", response_model=AddonResponse)
@@ -132,18 +136,11 @@ async def get_addon(
     from app.models import Version
     from sqlalchemy import select, func
     
-    # Get owner
-    owner_result = await db.execute(select(User).where(User.id == addon.owner_id))
-    owner = owner_result.scalar_one_or_none()
+    # Owner is eagerly loaded by get_addon_by_slug
+    owner = addon.owner
     
     # Get latest version
-    latest_result = await db.execute(
-        select(Version)
-        .where(Version.addon_id == addon.id)
-        .order_by(Version.release_date.desc())
-        .limit(1)
-    )
-    latest = latest_result.scalar_one_or_none()
+    latest = await VersionService.get_latest_version_summary(db, addon.id)
     
     # Get version count
     count_result = await db.execute(
@@ -229,7 +226,8 @@ async def list_addon_versions(
     
     versions, total = await VersionService.list_versions(db, addon.id, skip=skip, limit=limit)
     
-    return VersionListResponse(
-        versions=[VersionResponse.model_validate(v) for v in versions],
+    body = VersionListResponse(
+        versions=[VersionResponse.from_orm_fast(v) for v in versions],
         total=total,
-    )
+    ).model_dump_json()
+    return Response(content=body, media_type="application/json")
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, Query, BackgroundTasks, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, delete
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer_group
 from typing import Optional, List
 from datetime import datetime, timedelta, timezone
 import json
@@ -41,6 +41,7 @@ from app.schemas import (
 from app.services import UserService, AddonService, VersionService, ticket_service, email_service, discord_service
 from app.api.deps import get_admin_user, rate_limit_check_authenticated
 from app.core.exceptions import NotFoundError, BadRequestError
+from app.core.user_cache import invalidate_user_cache
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -49,8 +50,11 @@ async def log_admin_action(
     db: AsyncSession,
     admin: User,
     action: str,
-    target_type: Optional[str] = None,
-    target_id: Optional[int] = None,
+    target_user_id: Optional[int] = None,
+    target_addon_id: Optional[int] = None,
+    target_version_id: Optional[int] = None,
+    target_ticket_id: Optional[int] = None,
+    target_canned_response_id: Optional[int] = None,
     details: Optional[dict] = None,
     ip_address: Optional[str] = None,
     request: Optional[Request] = None,
@@ -59,15 +63,18 @@ async def log_admin_action(
     if not ip_address and request:
         forwarded = request.headers.get("X-Forwarded-For")
         if forwarded:
-            ip_address = forwarded.split(",")[-1].strip()
+            ip_address = forwarded[forwarded.rfind(",") + 1:].strip()
         elif request.client:
             ip_address = request.client.host
     log_entry = AdminAuditLog(
         admin_id=admin.id,
         action=action,
-        target_type=target_type,
-        target_id=target_id,
-        details=json.dumps(details) if details else None,
+        target_user_id=target_user_id,
+        target_addon_id=target_addon_id,
+        target_version_id=target_version_id,
+        target_ticket_id=target_ticket_id,
+        target_canned_response_id=target_canned_response_id,
+        details=details or None,
         ip_address=ip_address,
     )
     db.add(log_entry)
@@ -136,16 +143,14 @@ async def list_users(
     db: AsyncSession = Depends(get_db),
     _: None = Depends(rate_limit_check_authenticated),
 ):
-    """List all users with live storage calculation."""
+    """List all users."""
     skip = (page - 1) * per_page
     users, total = await UserService.list_users(
         db, skip=skip, limit=per_page, search=search, tier=tier, is_admin=is_admin
     )
     
-    # Calculate live storage for each user
     user_responses = []
     for u in users:
-        storage_used = await UserService.calculate_storage_used(db, u.id)
         user_responses.append(UserResponse(
             id=u.id,
             discord_id=u.discord_id,
@@ -153,7 +158,7 @@ async def list_users(
             discord_avatar=u.discord_avatar,
             email=u.email,
             subscription_tier=u.subscription_tier,
-            storage_used_bytes=storage_used,
+            storage_used_bytes=u.storage_used_bytes,
             storage_quota_bytes=u.storage_quota_bytes,
             is_admin=u.is_admin,
             created_at=u.created_at,
@@ -178,14 +183,11 @@ async def get_user(
     db: AsyncSession = Depends(get_db),
     _: None = Depends(rate_limit_check_authenticated),
 ):
-    """Get user details with live storage calculation."""
+    """Get user details."""
     user = await UserService.get_user_by_id(db, user_id)
     if not user:
         raise NotFoundError("User not found")
     
-    # Calculate live storage
-    storage_used = await UserService.calculate_storage_used(db, user.id)
-    
     return UserResponse(
         id=user.id,
         discord_id=user.discord_id,
@@ -193,7 +195,7 @@ async def get_user(
         discord_avatar=user.discord_avatar,
         email=user.email,
         subscription_tier=user.subscription_tier,
-        storage_used_bytes=storage_used,
+        storage_used_bytes=user.storage_used_bytes,
         storage_quota_bytes=user.storage_quota_bytes,
         is_admin=user.is_admin,
         created_at=user.created_at,
@@ -233,8 +235,7 @@ async def update_user(
     await log_admin_action(
         db, admin,
         action="update_user",
-        target_type="user",
-        target_id=user_id,
+        target_user_id=user_id,
         details={"changes": data.model_dump(exclude_unset=True)},
         request=request,
     )
@@ -259,12 +260,12 @@ async def promote_to_admin(
     
     user.is_admin = True
     await db.commit()
+    await invalidate_user_cache(user.id)
     
     await log_admin_action(
         db, admin,
         action="promote_admin",
-        target_type="user",
-        target_id=user_id,
+        target_user_id=user_id,
         details={"username": user.discord_username},
     )
     
@@ -291,12 +292,12 @@ async def demote_from_admin(
     
     user.is_admin = False
     await db.commit()
+    await invalidate_user_cache(user.id)
     
     await log_admin_action(
         db, admin,
         action="demote_admin",
-        target_type="user",
-        target_id=user_id,
+        target_user_id=user_id,
         details={"username": user.discord_username},
     )
     
@@ -333,12 +334,12 @@ async def grant_temp_tier(
     user.temp_tier_granted_at = now
     
     await db.commit()
+    await invalidate_user_cache(user.id)
     
     await log_admin_action(
         db, admin,
         action="grant_temp_tier",
-        target_type="user",
-        target_id=user_id,
+        target_user_id=user_id,
         details={
             "username": user.discord_username,
             "tier": request.tier.value,
@@ -392,12 +393,12 @@ async def revoke_temp_tier(
     user.temp_tier_granted_at = None
     
     await db.commit()
+    await invalidate_user_cache(user.id)
     
     await log_admin_action(
         db, admin,
         action="revoke_temp_tier",
-        target_type="user",
-        target_id=user_id,
+        target_user_id=user_id,
         details={
             "username": user.discord_username,
             "revoked_tier": old_tier,
@@ -447,8 +448,7 @@ async def add_user_badge(
     await log_admin_action(
         db, admin,
         action="add_badge",
-        target_type="user",
-        target_id=user_id,
+        target_user_id=user_id,
         details={"username": user.discord_username, "badge": badge},
     )
     
@@ -474,8 +474,7 @@ async def remove_user_badge(
     await log_admin_action(
         db, admin,
         action="remove_badge",
-        target_type="user",
-        target_id=user_id,
+        target_user_id=user_id,
         details={"username": user.discord_username, "badge": badge},
     )
     
@@ -505,11 +504,10 @@ async def sync_all_user_badges(
         synced_count += 1
     
     await db.commit()
+    await invalidate_user_cache(*[u.id for u in users])
     
     await log_admin_action(
         db, admin, "sync_all_badges",
-        target_type="system",
-        target_id=0,
         details={"users_synced": synced_count},
     )
     
@@ -549,7 +547,7 @@ async def admin_get_addon(
     """Get addon details with all versions (admin)."""
     result = await db.execute(
         select(Addon)
-        .options(selectinload(Addon.versions))
+        .options(selectinload(Addon.versions).undefer_group("content"))
         .where(Addon.id == addon_id)
     )
     addon = result.scalar_one_or_none()
@@ -577,7 +575,7 @@ async def admin_get_addon(
             "owner_username": owner.discord_username if owner else None,
             "created_at": addon.created_at,
         },
-        "versions": [VersionResponse.model_validate(v) for v in versions],
+        "versions": [VersionResponse.from_orm_fast(v) for v in versions],
     }
 
 
@@ -615,8 +613,7 @@ async def admin_update_addon(
     await log_admin_action(
         db, admin,
         action="update_addon",
-        target_type="addon",
-        target_id=addon_id,
+        target_addon_id=addon_id,
         details={"changes": update_dict, "old_values": old_values},
     )
     
@@ -656,14 +653,15 @@ async def admin_delete_addon(
         raise NotFoundError("Addon not found")
     
     addon_name = addon.name
+    owner_id = addon.owner_id
     await db.delete(addon)
     await db.commit()
+    await UserService.invalidate_user_stats(owner_id)
     
     await log_admin_action(
         db, admin,
         action="delete_addon",
-        target_type="addon",
-        target_id=addon_id,
+        target_addon_id=addon_id,
         details={"addon_name": addon_name},
     )
     
@@ -688,7 +686,9 @@ async def admin_update_version(
     
     # Get version
     version_result = await db.execute(
-        select(Version).where(Version.id == version_id, Version.addon_id == addon_id)
+        select(Version)
+        .options(undefer_group("content"))
+        .where(Version.id == version_id, Version.addon_id == addon_id)
     )
     version = version_result.scalar_one_or_none()
     if not version:
@@ -707,14 +707,15 @@ async def admin_update_version(
     for key, value in update_dict.items():
         setattr(version, key, value)
     
+    owner_id = addon.owner_id
     await db.commit()
-    await db.refresh(version)
+    await UserService.invalidate_user_stats(owner_id)
+    await VersionService.refresh_version(db, version)
     
     await log_admin_action(
         db, admin,
         action="update_version",
-        target_type="version",
-        target_id=version_id,
+        target_version_id=version_id,
         details={
             "addon_id": addon_id,
             "addon_name": addon.name,
@@ -751,14 +752,15 @@ async def admin_delete_version(
         raise NotFoundError("Version not found")
     
     version_str = version.version
+    owner_id = addon.owner_id
     await db.delete(version)
     await db.commit()
+    await UserService.invalidate_user_stats(owner_id)
     
     await log_admin_action(
         db, admin,
         action="delete_version",
-        target_type="version",
-        target_id=version_id,
+        target_version_id=version_id,
         details={
             "addon_id": addon_id,
             "addon_name": addon.name,
@@ -809,7 +811,8 @@ async def get_audit_log(
             action=entry.action,
             target_type=entry.target_type,
             target_id=entry.target_id,
-            details=entry.details,
+            # The API keeps returning details as a JSON string
+            details=json.dumps(entry.details) if entry.details is not None else None,
             ip_address=entry.ip_address,
             created_at=entry.created_at,
         ))
@@ -1107,8 +1110,7 @@ async def admin_add_message(
     await log_admin_action(
         db, admin,
         action="ticket_reply",
-        target_type="ticket",
-        target_id=ticket_id,
+        target_ticket_id=ticket_id,
         details={"message_id": message.id},
     )
     
@@ -1154,8 +1156,7 @@ async def update_ticket_status(
     await log_admin_action(
         db, admin,
         action="ticket_status_change",
-        target_type="ticket",
-        target_id=ticket_id,
+        target_ticket_id=ticket_id,
         details={"old_status": old_status.value, "new_status": data.status.value},
     )
     
@@ -1199,8 +1200,7 @@ async def update_ticket_priority(
     await log_admin_action(
         db, admin,
         action="ticket_priority_change",
-        target_type="ticket",
-        target_id=ticket_id,
+        target_ticket_id=ticket_id,
         details={"old_priority": old_priority.value, "new_priority": data.priority.value},
     )
     
@@ -1247,8 +1247,7 @@ async def assign_ticket(
     await log_admin_action(
         db, admin,
         action="ticket_assign",
-        target_type="ticket",
-        target_id=ticket_id,
+        target_ticket_id=ticket_id,
         details={
             "old_assigned": old_assigned,
             "new_assigned": data.admin_id,
@@ -1282,8 +1281,7 @@ async def assign_ticket_to_me(
     await log_admin_action(
         db, admin,
         action="ticket_self_assign",
-        target_type="ticket",
-        target_id=ticket_id,
+        target_ticket_id=ticket_id,
         details={"old_assigned": old_assigned},
     )
     
@@ -1353,8 +1351,7 @@ async def create_canned_response(
     await log_admin_action(
         db, admin,
         action="create_canned_response",
-        target_type="canned_response",
-        target_id=canned.id,
+        target_canned_response_id=canned.id,
         details={"title": data.title},
     )
     
@@ -1401,8 +1398,7 @@ async def update_canned_response(
     await log_admin_action(
         db, admin,
         action="update_canned_response",
-        target_type="canned_response",
-        target_id=canned_id,
+        target_canned_response_id=canned_id,
         details=data.model_dump(exclude_unset=True),
     )
     
@@ -1448,8 +1444,7 @@ async def delete_canned_response(
     await log_admin_action(
         db, admin,
         action="delete_canned_response",
-        target_type="canned_response",
-        target_id=canned_id,
+        target_canned_response_id=canned_id,
         details={"title": title},
     )
     
@@ -1518,16 +1513,24 @@ async def cleanup_old_attachments(
     """Manually trigger deletion of old attachments."""
     deleted_count = await ticket_service.delete_old_attachments(db)
     
+    # Content left behind by deleted tickets and messages
+    deleted_blobs = await ticket_service.delete_orphaned_blobs(db)
+    
     # Clean up empty directories
     removed_dirs = await ticket_service.cleanup_empty_directories()
     
     await log_admin_action(
         db, admin,
         action="cleanup_attachments",
-        details={"deleted_count": deleted_count, "removed_dirs": removed_dirs},
+        details={"deleted_count": deleted_count, "deleted_blobs": deleted_blobs, "removed_dirs": removed_dirs},
     )
     
-    return {"status": "completed", "deleted_count": deleted_count, "removed_dirs": removed_dirs}
+    return {
+        "status": "completed",
+        "deleted_count": deleted_count,
+        "deleted_blobs": deleted_blobs,
+        "removed_dirs": removed_dirs,
+    }
 
 
 @router.post("/test-discord-dm")
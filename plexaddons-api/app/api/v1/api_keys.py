@@ -115,7 +115,7 @@ async def list_api_keys(
     max_keys = MAX_KEYS_PER_TIER.get(effective_tier, 0)
     
     return ApiKeyListResponse(
-        keys=[ApiKeyResponse.model_validate(k) for k in keys],
+        keys=[ApiKeyResponse.from_orm_fast(k) for k in keys],
         count=len(keys),
         max_keys=max_keys
     )
@@ -147,7 +147,7 @@ async def create_api_key(
     )
     
     return ApiKeyCreatedResponse(
-        key=ApiKeyResponse.model_validate(api_key_obj),
+        key=ApiKeyResponse.from_orm_fast(api_key_obj),
         api_key=full_key
     )
 
@@ -167,7 +167,7 @@ async def get_api_key(
             detail="API key not found"
         )
     
-    return ApiKeyResponse.model_validate(key)
+    return ApiKeyResponse.from_orm_fast(key)
 
 
 @router.patch("/{key_id}", response_model=ApiKeyResponse)
@@ -200,7 +200,7 @@ async def update_api_key(
         expires_at=data.expires_at
     )
     
-    return ApiKeyResponse.model_validate(updated)
+    return ApiKeyResponse.from_orm_fast(updated)
 
 
 @router.post("/{key_id}/revoke", response_model=ApiKeyResponse)
@@ -223,7 +223,7 @@ async def revoke_api_key(
         )
     
     revoked = await ApiKeyService.revoke_key(db, key)
-    return ApiKeyResponse.model_validate(revoked)
+    return ApiKeyResponse.from_orm_fast(revoked)
 
 
 @router.delete("/{key_id}", status_code=status.HTTP_204_NO_CONTENT)
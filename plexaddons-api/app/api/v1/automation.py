@@ -13,7 +13,7 @@ from datetime import date
 from app.database import get_db
 from app.models import User, ApiKey, ApiKeyScope
 from app.schemas import VersionResponse
-from app.services import AddonService, VersionService
+from app.services import AddonService, VersionService, UserService
 from app.api.deps import require_scope, get_user_and_api_key
 from app.core.exceptions import NotFoundError, ForbiddenError, UnauthorizedError
 
@@ -109,11 +109,12 @@ async def publish_version(
     )
     
     version = await VersionService.create_version(db, addon, user, version_data)
+    await UserService.invalidate_user_stats(addon.owner_id)
     
     return PublishVersionResponse(
         success=True,
         message=f"Version {data.version} published successfully",
-        version=VersionResponse.model_validate(version),
+        version=VersionResponse.from_orm_fast(version),
         addon_slug=addon.slug,
         addon_name=addon.name,
     )
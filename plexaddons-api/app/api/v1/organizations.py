@@ -7,14 +7,14 @@ from typing import List, Optional
 from app.database import get_db
 from app.models import (
     Organization, OrganizationMember, User, Addon, Version,
-    OrganizationRole, SubscriptionTier
+    OrganizationRole
 )
 from app.schemas import (
     OrganizationCreate, OrganizationUpdate, OrganizationResponse,
     OrganizationDetailResponse, OrganizationListResponse,
     OrganizationMemberResponse, InviteMemberRequest, UpdateMemberRoleRequest
 )
-from app.api.deps import get_current_user, require_premium
+from app.api.deps import get_current_user, require_premium, get_effective_tier
 from app.utils import slugify
 from app.config import get_settings
 
@@ -23,15 +23,6 @@ settings = get_settings()
 router = APIRouter(prefix="/organizations", tags=["Organizations"])
 
 
-def get_effective_tier(user: User) -> SubscriptionTier:
-    """Get effective tier including temp tier."""
-    from datetime import datetime, timezone
-    if user.temp_tier and user.temp_tier_expires_at:
-        if user.temp_tier_expires_at > datetime.now(timezone.utc):
-            return user.temp_tier
-    return user.subscription_tier
-
-
 async def calculate_org_storage(db: AsyncSession, org_id: int) -> int:
     """Calculate total storage used by organization addons."""
     result = await db.execute(
@@ -46,12 +37,7 @@ async def check_org_storage_quota(db: AsyncSession, org: Organization, owner: Us
     """Check if organization has storage quota available."""
     effective_tier = get_effective_tier(owner)
     
-    quota_map = {
-        SubscriptionTier.FREE: settings.storage_quota_free,
-        SubscriptionTier.PRO: settings.storage_quota_pro,
-        SubscriptionTier.PREMIUM: settings.storage_quota_premium,
-    }
-    quota = quota_map.get(effective_tier, settings.storage_quota_free)
+    quota = settings.tier_storage_quota.get(effective_tier, settings.storage_quota_free)
     
     current_usage = await calculate_org_storage(db, org.id)
     return (current_usage + additional_bytes) <= quota
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.models import User, SubscriptionTier, PaymentProvider
@@ -17,67 +17,71 @@ settings = get_settings()
 router = APIRouter(prefix="/payments", tags=["Payments"])
 
 
+# The plans are static, so the response body is serialized once at import
+PAYMENT_PLANS = [
+    PaymentPlan(
+        tier=SubscriptionTier.FREE,
+        name="Free",
+        price_monthly=0.0,
+        storage_quota_bytes=5 * 1024 * 1024,  # 5MB
+        version_history_limit=3,
+        rate_limit=100,
+        features=[
+            "5MB storage",
+            "3 version history",
+            "100 requests/min",
+            "Public profile",
+        ],
+    ),
+    PaymentPlan(
+        tier=SubscriptionTier.PRO,
+        name="Pro",
+        price_monthly=1.0,
+        storage_quota_bytes=100 * 1024 * 1024,  # 100MB
+        version_history_limit=10,
+        rate_limit=300,
+        features=[
+            "100MB storage",
+            "10 version history",
+            "300 requests/min",
+            "Custom profile URL",
+            "Profile banner",
+            "Ticket attachments",
+            "Usage analytics (30 days)",
+            "Private addons",
+            "Supporter badge",
+        ],
+    ),
+    PaymentPlan(
+        tier=SubscriptionTier.PREMIUM,
+        name="Premium",
+        price_monthly=5.0,
+        storage_quota_bytes=1024 * 1024 * 1024,  # 1GB
+        version_history_limit=-1,  # Unlimited
+        rate_limit=1000,
+        features=[
+            "1GB storage",
+            "Unlimited version history",
+            "1000 requests/min",
+            "Custom profile URL",
+            "Profile banner",
+            "Accent color customization",
+            "Ticket attachments",
+            "Usage analytics (90 days)",
+            "Private addons",
+            "API key access",
+            "Webhook notifications",
+            "Supporter badge",
+        ],
+    ),
+]
+PAYMENT_PLANS_JSON = PaymentPlansResponse(plans=PAYMENT_PLANS).model_dump_json().encode()
+
+
 @router.get("/plans", response_model=PaymentPlansResponse)
 async def get_plans():
     """Get available subscription plans."""
-    plans = [
-        PaymentPlan(
-            tier=SubscriptionTier.FREE,
-            name="Free",
-            price_monthly=0.0,
-            storage_quota_bytes=5 * 1024 * 1024,  # 5MB
-            version_history_limit=3,
-            rate_limit=100,
-            features=[
-                "5MB storage",
-                "3 version history",
-                "100 requests/min",
-                "Public profile",
-            ],
-        ),
-        PaymentPlan(
-            tier=SubscriptionTier.PRO,
-            name="Pro",
-            price_monthly=1.0,
-            storage_quota_bytes=100 * 1024 * 1024,  # 100MB
-            version_history_limit=10,
-            rate_limit=300,
-            features=[
-                "100MB storage",
-                "10 version history",
-                "300 requests/min",
-                "Custom profile URL",
-                "Profile banner",
-                "Ticket attachments",
-                "Usage analytics (30 days)",
-                "Private addons",
-                "Supporter badge",
-            ],
-        ),
-        PaymentPlan(
-            tier=SubscriptionTier.PREMIUM,
-            name="Premium",
-            price_monthly=5.0,
-            storage_quota_bytes=1024 * 1024 * 1024,  # 1GB
-            version_history_limit=-1,  # Unlimited
-            rate_limit=1000,
-            features=[
-                "1GB storage",
-                "Unlimited version history",
-                "1000 requests/min",
-                "Custom profile URL",
-                "Profile banner",
-                "Accent color customization",
-                "Ticket attachments",
-                "Usage analytics (90 days)",
-                "Private addons",
-                "API key access",
-                "Webhook notifications",
-                "Supporter badge",
-            ],
-        ),
-    ]
-    return PaymentPlansResponse(plans=plans)
+    return Response(content=PAYMENT_PLANS_JSON, media_type="application/json")
 
 
 @router.post("/stripe/create-checkout", response_model=CheckoutResponse)
@@ -5,10 +5,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, or_, func
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
-from datetime import datetime, timezone
 from app.database import get_db
 from app.models import User, Addon, Version
 from app.schemas import UserPublicProfile, AddonResponse
+from app.api.deps import get_effective_tier
+from app.utils import is_discord_id
 
 router = APIRouter(prefix="/u", tags=["Profiles"])
 
@@ -18,19 +19,6 @@ def sanitize_ilike_pattern(search: str) -> str:
     return search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
 
 
-def get_effective_tier(user: User):
-    """Get effective tier considering temp_tier if active."""
-    if user.temp_tier and user.temp_tier_expires_at:
-        # Check if temp tier is still valid
-        now = datetime.now(timezone.utc)
-        expires = user.temp_tier_expires_at
-        if expires.tzinfo is None:
-            expires = expires.replace(tzinfo=timezone.utc)
-        if now < expires:
-            return user.temp_tier
-    return user.subscription_tier
-
-
 @router.get("", response_model=dict)
 async def list_public_users(
     page: int = Query(1, ge=1),
@@ -75,14 +63,7 @@ async def list_public_users(
     
     users_list = []
     for user in users:
-        # Parse badges
-        badges = []
-        if user.badges:
-            import json
-            try:
-                badges = json.loads(user.badges) if isinstance(user.badges, str) else user.badges
-            except Exception:
-                badges = []
+        badges = user.badges or []
         
         # Get effective tier (temp_tier if active)
         effective_tier = get_effective_tier(user)
@@ -122,14 +103,10 @@ async def get_public_profile(
     Returns 404 if user not found or profile is not public.
     """
     # Try to find user by Discord ID or profile slug
-    result = await db.execute(
-        select(User).where(
-            or_(
-                User.discord_id == identifier,
-                User.profile_slug == identifier
-            )
-        )
-    )
+    condition = User.profile_slug == identifier
+    if is_discord_id(identifier):
+        condition = or_(User.discord_id == identifier, condition)
+    result = await db.execute(select(User).where(condition))
     user = result.scalar_one_or_none()
     
     if not user:
@@ -182,7 +159,6 @@ async def get_public_profile(
                 )
             )
     
-    # Parse badges JSON if stored as string
     badges = user.badges if user.badges else []
     
     # Get effective tier (temp_tier if active)
@@ -19,7 +19,7 @@ from app.schemas import (
     TicketMessageResponse,
     TicketAttachmentResponse,
 )
-from app.services import ticket_service, email_service, discord_service
+from app.services import ticket_service, email_service, discord_service, UserService
 from app.api.deps import get_current_user, rate_limit_check_authenticated
 from app.core.exceptions import NotFoundError, ForbiddenError
 
@@ -314,6 +314,8 @@ async def upload_attachment(
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     
+    await UserService.invalidate_user_stats(ticket.user_id)
+    
     return TicketAttachmentResponse(
         id=attachment.id,
         original_filename=attachment.original_filename,
@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, or_
+from sqlalchemy import select, func, or_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import load_only
 from typing import Optional
+import asyncio
+import logging
 import secrets
-from datetime import datetime, timezone
+import stripe
 from app.database import get_db
 from app.models import User, Subscription, SubscriptionStatus, PaymentProvider, SubscriptionTier, Addon
 from app.schemas import (
@@ -13,8 +17,8 @@ from app.schemas import (
     SubscriptionResponse,
     UserProfileUpdate,
     UserPublicProfile,
-    ApiKeyCreate,
-    ApiKeyResponse,
+    UserApiKeyCreatedResponse,
+    UserApiKeyResponse,
     AddonResponse,
     WebhookConfigUpdate,
     WebhookConfigResponse,
@@ -23,9 +27,68 @@ from app.schemas import (
 )
 from app.services import UserService, StripeService, PayPalService, WebhookService, webhook_service
 from app.api.deps import get_current_user, rate_limit_check_authenticated, get_effective_tier
+from app.core.rate_limit import get_redis_client
+from app.core.user_cache import (
+    invalidate_user_cache,
+    user_json_key,
+    USER_CACHE_TTL,
+    get_cached_public_user_json,
+    cache_public_user_json,
+    is_discord_id_missing,
+    mark_discord_id_missing,
+)
+from app.core.exceptions import NotFoundError
+from app.utils import is_discord_id
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
+# Subscription statuses that still bill the user
+ACTIVE_SUBSCRIPTION_STATUSES = (
+    SubscriptionStatus.ACTIVE,
+    SubscriptionStatus.TRIALING,
+    SubscriptionStatus.PAST_DUE,
+)
+
+# Per-user lock TTL in seconds for API key mutations
+API_KEY_LOCK_TTL = 5
+
+
+def is_profile_slug_conflict(exc: IntegrityError) -> bool:
+    """True if the error is the unique index on users.profile_slug rejecting a duplicate."""
+    # asyncpg's exception is chained behind SQLAlchemy's DBAPI adapter
+    constraint = getattr(getattr(exc.orig, "__cause__", None), "constraint_name", None)
+    return constraint is not None and "profile_slug" in constraint
+
+
+# Delete the lock only if it still holds our token; after the TTL it may
+# belong to another request
+RELEASE_LOCK_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+async def acquire_api_key_lock(user_id: int) -> Optional[str]:
+    """Acquire the per-user API key lock. Returns its token, or None if already held."""
+    redis = get_redis_client()
+    if not redis:
+        return ""
+    token = secrets.token_hex(16)
+    if not await redis.set(f"lock:api_key:{user_id}", token, nx=True, ex=API_KEY_LOCK_TTL):
+        return None
+    return token
+
+
+async def release_api_key_lock(user_id: int, token: str) -> None:
+    """Release the per-user API key lock if this caller still holds it."""
+    redis = get_redis_client()
+    if redis:
+        await redis.eval(RELEASE_LOCK_SCRIPT, 1, f"lock:api_key:{user_id}", token)
+
 
 @router.get("/me", response_model=UserResponse)
 async def get_me(
@@ -33,7 +96,17 @@ async def get_me(
     _: None = Depends(rate_limit_check_authenticated),
 ):
     """Get current user profile."""
-    return user
+    # Serve the pre-serialized body from Redis to skip response validation
+    redis = get_redis_client()
+    if redis:
+        cached = await redis.get(user_json_key(user.id))
+        if cached:
+            return Response(content=cached, media_type="application/json")
+    
+    body = UserResponse.model_validate(user).model_dump_json()
+    if redis:
+        await redis.set(user_json_key(user.id), body, ex=USER_CACHE_TTL)
+    return Response(content=body, media_type="application/json")
 
 
 @router.patch("/me", response_model=UserResponse)
@@ -80,13 +153,20 @@ async def get_my_subscription(
     _: None = Depends(rate_limit_check_authenticated),
 ):
     """Get current user's active subscription."""
-    from sqlalchemy import select
-    from app.models import Subscription, SubscriptionStatus
-    
     result = await db.execute(
         select(Subscription)
+        .options(load_only(
+            Subscription.id,
+            Subscription.provider,
+            Subscription.tier,
+            Subscription.status,
+            Subscription.current_period_start,
+            Subscription.current_period_end,
+            Subscription.canceled_at,
+            Subscription.created_at,
+        ))
         .where(Subscription.user_id == user.id)
-        .where(Subscription.status.in_([SubscriptionStatus.ACTIVE, SubscriptionStatus.TRIALING, SubscriptionStatus.PAST_DUE]))
+        .where(Subscription.status.in_(ACTIVE_SUBSCRIPTION_STATUSES))
         .order_by(Subscription.created_at.desc())
         .limit(1)
     )
@@ -105,14 +185,24 @@ async def get_user_public(
     _: None = Depends(rate_limit_check_authenticated),
 ):
     """Get public user profile by Discord ID."""
-    from app.core.exceptions import NotFoundError
+    if not is_discord_id(discord_id):
+        raise NotFoundError("User not found")
+    
+    cached = await get_cached_public_user_json(discord_id)
+    if cached:
+        return Response(content=cached, media_type="application/json")
+    
+    # Unknown IDs are remembered briefly so enumeration doesn't reach Postgres
+    if await is_discord_id_missing(discord_id):
+        raise NotFoundError("User not found")
     
     user = await UserService.get_user_by_discord_id(db, discord_id)
     if not user:
+        await mark_discord_id_missing(discord_id)
         raise NotFoundError("User not found")
     
-    # Return limited public info
-    return UserResponse(
+    # Return limited public info (trusted DB values, skip re-validation)
+    body = UserResponse.model_construct(
         id=user.id,
         discord_id=user.discord_id,
         discord_username=user.discord_username,
@@ -124,7 +214,9 @@ async def get_user_public(
         is_admin=user.is_admin,
         created_at=user.created_at,
         last_login_at=None,
-    )
+    ).model_dump_json()
+    await cache_public_user_json(user.id, body)
+    return Response(content=body, media_type="application/json")
 
 
 @router.delete("/me", status_code=status.HTTP_204_NO_CONTENT)
@@ -145,11 +237,7 @@ async def delete_my_account(
     """
     # Prevent last admin from deleting themselves
     if user.is_admin:
-        admin_count_result = await db.execute(
-            select(func.count(User.id)).where(User.is_admin == True)
-        )
-        admin_count = admin_count_result.scalar() or 0
-        if admin_count <= 1:
+        if not await UserService.other_admin_exists(db, user.id):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Cannot delete the last admin account. Promote another user to admin first."
@@ -159,23 +247,16 @@ async def delete_my_account(
     result = await db.execute(
         select(Subscription)
         .where(Subscription.user_id == user.id)
-        .where(Subscription.status.in_([
-            SubscriptionStatus.ACTIVE,
-            SubscriptionStatus.TRIALING,
-            SubscriptionStatus.PAST_DUE
-        ]))
+        .where(Subscription.status.in_(ACTIVE_SUBSCRIPTION_STATUSES))
     )
     active_subscriptions = result.scalars().all()
     
-    for subscription in active_subscriptions:
+    async def _cancel(subscription: Subscription) -> None:
         try:
             if subscription.provider == PaymentProvider.STRIPE:
-                # Cancel Stripe subscription
-                import stripe
-                from app.config import get_settings
-                settings = get_settings()
-                stripe.api_key = settings.stripe_secret_key
-                stripe.Subscription.cancel(subscription.provider_subscription_id)
+                # Cancel Stripe subscription (sync SDK, keep it off the event loop).
+                # stripe.api_key is set once when stripe_service is imported.
+                await asyncio.to_thread(stripe.Subscription.cancel, subscription.provider_subscription_id)
             elif subscription.provider == PaymentProvider.PAYPAL:
                 # Cancel PayPal subscription
                 await PayPalService.cancel_subscription(
@@ -184,11 +265,15 @@ async def delete_my_account(
                 )
         except Exception as e:
             # Log but don't fail - subscription might already be canceled
-            print(f"Warning: Failed to cancel subscription {subscription.id}: {e}")
+            logger.warning("Failed to cancel subscription %s", subscription.id, exc_info=e)
+    
+    # Provider calls are independent, so run them concurrently
+    await asyncio.gather(*[_cancel(sub) for sub in active_subscriptions], return_exceptions=True)
     
     # Delete the user - CASCADE will handle related records
     await db.delete(user)
     await db.commit()
+    await invalidate_user_cache(user.id)
     
     return None
 
@@ -220,18 +305,7 @@ async def update_my_profile(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Custom profile URLs require Pro or Premium subscription"
             )
-        # Check slug uniqueness
-        existing = await db.execute(
-            select(User).where(
-                User.profile_slug == update_data["profile_slug"],
-                User.id != user.id
-            )
-        )
-        if existing.scalar_one_or_none():
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="This profile URL is already taken"
-            )
+        # Slug uniqueness is enforced by the unique index on the UPDATE below
     
     if "banner_url" in update_data and update_data["banner_url"] is not None:
         if effective_tier != SubscriptionTier.PREMIUM:
@@ -239,13 +313,6 @@ async def update_my_profile(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Custom banners require Premium subscription"
             )
-        # Validate banner URL format
-        banner = update_data["banner_url"]
-        if not banner.startswith(("https://", "http://")):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Banner URL must start with https:// or http://"
-            )
     
     if "accent_color" in update_data and update_data["accent_color"] is not None:
         if effective_tier == SubscriptionTier.FREE:
@@ -254,35 +321,46 @@ async def update_my_profile(
                 detail="Custom accent colors require Pro or Premium subscription"
             )
     
-    # Apply updates
-    for key, value in update_data.items():
-        setattr(user, key, value)
-    
-    await db.commit()
-    await db.refresh(user)
+    # Apply updates in a single UPDATE ... RETURNING
+    if update_data:
+        try:
+            result = await db.execute(
+                update(User)
+                .where(User.id == user.id)
+                .values(**update_data)
+                .returning(User)
+                .execution_options(populate_existing=True)
+            )
+        except IntegrityError as exc:
+            await db.rollback()
+            # Anything else (e.g. a CHECK constraint) is a real error, not a taken slug
+            if not is_profile_slug_conflict(exc):
+                raise
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This profile URL is already taken"
+            )
+        user = result.scalar_one()
+        await db.commit()
+        await invalidate_user_cache(user.id)
     
     return user
 
 
-@router.get("/me/api-key", response_model=ApiKeyResponse)
+@router.get("/me/api-key", response_model=UserApiKeyResponse)
 async def get_my_api_key(
     user: User = Depends(get_current_user),
     _: None = Depends(rate_limit_check_authenticated),
 ):
     """Get current user's API key status."""
-    masked_key = None
-    if user.api_key:
-        # Show first 6 and last 4 characters: pa_xxxx...xxxx
-        masked_key = f"{user.api_key[:6]}...{user.api_key[-4:]}"
-    
-    return ApiKeyResponse(
+    return UserApiKeyResponse(
         has_api_key=user.api_key is not None,
         created_at=user.api_key_created_at,
-        masked_key=masked_key
+        masked_key=user.api_key_masked
     )
 
 
-@router.post("/me/api-key", response_model=ApiKeyCreate)
+@router.post("/me/api-key", response_model=UserApiKeyCreatedResponse)
 async def create_my_api_key(
     user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
@@ -304,18 +382,38 @@ async def create_my_api_key(
             detail="API keys require Premium subscription"
         )
     
-    # Generate new API key with pa_ prefix
-    api_key = f"pa_{secrets.token_hex(32)}"
-    now = datetime.now(timezone.utc)
-    
-    user.api_key = api_key
-    user.api_key_created_at = now
+    lock_token = await acquire_api_key_lock(user.id)
+    if lock_token is None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests"
+        )
     
-    await db.commit()
+    try:
+        # Generate new API key with pa_ prefix
+        api_key = "pa_" + secrets.token_urlsafe(32)
+        
+        result = await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(
+                api_key=api_key,
+                # Show first 6 and last 4 characters: pa_xxxx...xxxx
+                api_key_masked=f"{api_key[:6]}...{api_key[-4:]}",
+                api_key_created_at=func.now(),
+            )
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
+        user = result.scalar_one()
+        await db.commit()
+        await invalidate_user_cache(user.id)
+    finally:
+        await release_api_key_lock(user.id, lock_token)
     
-    return ApiKeyCreate(
+    return UserApiKeyCreatedResponse(
         api_key=api_key,
-        created_at=now
+        created_at=user.api_key_created_at
     )
 
 
@@ -332,10 +430,22 @@ async def revoke_my_api_key(
             detail="No API key to revoke"
         )
     
-    user.api_key = None
-    user.api_key_created_at = None
+    lock_token = await acquire_api_key_lock(user.id)
+    if lock_token is None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many requests"
+        )
     
-    await db.commit()
+    try:
+        user.api_key = None
+        user.api_key_masked = None
+        user.api_key_created_at = None
+        
+        await db.commit()
+        await invalidate_user_cache(user.id)
+    finally:
+        await release_api_key_lock(user.id, lock_token)
     
     return None
 
@@ -348,16 +458,11 @@ async def get_my_webhook_config(
     _: None = Depends(rate_limit_check_authenticated),
 ):
     """Get current user's webhook configuration."""
-    masked_secret = None
-    if user.webhook_secret:
-        # Show first 6 and last 4 characters: wh_xxxx...xxxx
-        masked_secret = f"wh_{user.webhook_secret[:4]}...{user.webhook_secret[-4:]}"
-    
     return WebhookConfigResponse(
         webhook_url=user.webhook_url,
         webhook_enabled=user.webhook_enabled or False,
         has_secret=user.webhook_secret is not None,
-        masked_secret=masked_secret,
+        masked_secret=user.webhook_secret_masked,
     )
 
 
@@ -383,31 +488,24 @@ async def update_my_webhook_config(
     
     update_data = data.model_dump(exclude_unset=True)
     
-    # Validate URL if provided
-    if "webhook_url" in update_data and update_data["webhook_url"]:
-        url = update_data["webhook_url"]
-        if not url.startswith(("http://", "https://")):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Webhook URL must start with http:// or https://"
-            )
-    
-    # Apply updates
-    for key, value in update_data.items():
-        setattr(user, key, value)
-    
-    await db.commit()
-    await db.refresh(user)
-    
-    masked_secret = None
-    if user.webhook_secret:
-        masked_secret = f"wh_{user.webhook_secret[:4]}...{user.webhook_secret[-4:]}"
+    # Apply updates in a single UPDATE ... RETURNING
+    if update_data:
+        result = await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(**update_data)
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
+        user = result.scalar_one()
+        await db.commit()
+        await invalidate_user_cache(user.id)
     
     return WebhookConfigResponse(
         webhook_url=user.webhook_url,
         webhook_enabled=user.webhook_enabled or False,
         has_secret=user.webhook_secret is not None,
-        masked_secret=masked_secret,
+        masked_secret=user.webhook_secret_masked,
     )
 
 
@@ -436,8 +534,11 @@ async def regenerate_webhook_secret(
     # Generate new secret
     new_secret = WebhookService.generate_webhook_secret()
     user.webhook_secret = new_secret
+    # Show first 4 and last 4 characters: wh_xxxx...xxxx
+    user.webhook_secret_masked = f"wh_{new_secret[:4]}...{new_secret[-4:]}"
     
     await db.commit()
+    await invalidate_user_cache(user.id)
     
     return WebhookSecretResponse(webhook_secret=new_secret)
 
@@ -487,8 +588,10 @@ async def disable_my_webhook(
     """Disable and clear webhook configuration."""
     user.webhook_url = None
     user.webhook_secret = None
+    user.webhook_secret_masked = None
     user.webhook_enabled = False
     
     await db.commit()
+    await invalidate_user_cache(user.id)
     
     return None
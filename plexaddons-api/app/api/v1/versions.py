@@ -8,7 +8,7 @@ from app.schemas import (
     VersionUpdate,
     VersionResponse,
 )
-from app.services import AddonService, VersionService
+from app.services import AddonService, VersionService, UserService
 from app.api.deps import get_current_user, get_current_user_optional, rate_limit_check, rate_limit_check_authenticated
 from app.core.exceptions import NotFoundError, ForbiddenError
 
@@ -33,7 +33,8 @@ async def create_version(
         raise ForbiddenError("You don't have permission to add versions to this addon")
     
     version = await VersionService.create_version(db, addon, user, data)
-    return VersionResponse.model_validate(version)
+    await UserService.invalidate_user_stats(addon.owner_id)
+    return VersionResponse.from_orm_fast(version)
 
 
 @router.get("/addons/{slug}/versions/{version_str}", response_model=VersionResponse)
@@ -45,7 +46,7 @@ async def get_version(
     _: None = Depends(rate_limit_check),
 ):
     """Get a specific version of an addon."""
-    addon = await AddonService.get_addon_by_slug(db, slug)
+    addon, version = await VersionService.get_addon_and_version_by_slug(db, slug, version_str)
     if not addon:
         raise NotFoundError("Addon not found")
     
@@ -54,11 +55,10 @@ async def get_version(
         if not user or (addon.owner_id != user.id and not user.is_admin):
             raise NotFoundError("Addon not found")
     
-    version = await VersionService.get_version_by_addon_and_version(db, addon.id, version_str)
     if not version:
         raise NotFoundError("Version not found")
     
-    return VersionResponse.model_validate(version)
+    return VersionResponse.from_orm_fast(version)
 
 
 @router.get("/addons/{slug}/versions/latest", response_model=VersionResponse)
@@ -82,7 +82,7 @@ async def get_latest_version(
     if not version:
         raise NotFoundError("No versions found for this addon")
     
-    return VersionResponse.model_validate(version)
+    return VersionResponse.from_orm_fast(version)
 
 
 @router.patch("/addons/{slug}/versions/{version_str}", response_model=VersionResponse)
@@ -95,7 +95,7 @@ async def update_version(
     _: None = Depends(rate_limit_check_authenticated),
 ):
     """Update a version."""
-    addon = await AddonService.get_addon_by_slug(db, slug)
+    addon, version = await VersionService.get_addon_and_version_by_slug(db, slug, version_str)
     if not addon:
         raise NotFoundError("Addon not found")
     
@@ -103,12 +103,12 @@ async def update_version(
     if addon.owner_id != user.id and not user.is_admin:
         raise ForbiddenError("You don't have permission to update this version")
     
-    version = await VersionService.get_version_by_addon_and_version(db, addon.id, version_str)
     if not version:
         raise NotFoundError("Version not found")
     
     updated = await VersionService.update_version(db, version, user, data)
-    return VersionResponse.model_validate(updated)
+    await UserService.invalidate_user_stats(addon.owner_id)
+    return VersionResponse.from_orm_fast(updated)
 
 
 @router.delete("/addons/{slug}/versions/{version_str}")
@@ -120,7 +120,7 @@ async def delete_version(
     _: None = Depends(rate_limit_check_authenticated),
 ):
     """Delete a version."""
-    addon = await AddonService.get_addon_by_slug(db, slug)
+    addon, version = await VersionService.get_addon_and_version_by_slug(db, slug, version_str)
     if not addon:
         raise NotFoundError("Addon not found")
     
@@ -128,9 +128,9 @@ async def delete_version(
     if addon.owner_id != user.id and not user.is_admin:
         raise ForbiddenError("You don't have permission to delete this version")
     
-    version = await VersionService.get_version_by_addon_and_version(db, addon.id, version_str)
     if not version:
         raise NotFoundError("Version not found")
     
     await VersionService.delete_version(db, version, user)
+    await UserService.invalidate_user_stats(addon.owner_id)
     return {"status": "deleted"}
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
-from functools import lru_cache
-from typing import Optional
+from functools import lru_cache, cached_property
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -17,6 +17,7 @@ class Settings(BaseSettings):
     
     # Redis
     redis_url: str = "redis://localhost:6379/0"
+    redis_max_connections: int = 64
     
     # Discord OAuth2
     discord_client_id: str
@@ -96,9 +97,36 @@ class Settings(BaseSettings):
     ticket_attachment_delete_days: int = 45    # Delete attachments after this many days
     ticket_auto_welcome_message: str = "Thank you for contacting PlexAddons support! A team member will review your ticket shortly."
     
+    # Per-tier lookups, keyed by tier value ("free", "pro", "premium").
+    # SubscriptionTier is a str enum, so its members work as keys too.
+    @cached_property
+    def tier_rate_limit(self) -> Dict[str, int]:
+        return {
+            "free": self.rate_limit_user_free,
+            "pro": self.rate_limit_user_pro,
+            "premium": self.rate_limit_user_premium,
+        }
+    
+    @cached_property
+    def tier_storage_quota(self) -> Dict[str, int]:
+        return {
+            "free": self.storage_quota_free,
+            "pro": self.storage_quota_pro,
+            "premium": self.storage_quota_premium,
+        }
+    
+    @cached_property
+    def tier_version_limit(self) -> Dict[str, int]:
+        return {
+            "free": self.version_limit_free,
+            "pro": self.version_limit_pro,
+            "premium": self.version_limit_premium,
+        }
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
+        frozen = True
 
 
 @lru_cache
@@ -10,5 +10,7 @@ from app.core.exceptions import (
     StorageQuotaExceededError,
     VersionLimitExceededError,
     PaymentError,
+    RateLimitExceededError,
 )
 from app.core.rate_limit import RateLimitMiddleware, RateLimiter, get_rate_limiter, set_rate_limiter, get_redis_client, set_redis_client
+from app.core.user_cache import get_cached_user, get_cached_user_by_discord_id, invalidate_user_cache
@@ -0,0 +1,92 @@
+"""
+Buffered usage tracking for API keys.
+
+Validating a key used to UPDATE its row (usage_count, last_used_at,
+last_used_ip) on every request, taking a row lock and writing WAL on the
+auth path. Usage is now counted in memory and folded into api_keys by one
+executemany UPDATE every API_KEY_USAGE_FLUSH_INTERVAL seconds, so the
+request path only reads. Counts not yet flushed when the process dies are
+lost; last_used_* lag by at most one interval.
+"""
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+from sqlalchemy import bindparam, func, update
+from app.database import engine
+from app.models import ApiKey
+
+logger = logging.getLogger(__name__)
+
+# Seconds between flushes
+API_KEY_USAGE_FLUSH_INTERVAL = 30
+
+_api_keys = ApiKey.__table__
+
+# Plain Core UPDATE so a list of parameter sets runs as one executemany
+_FLUSH_STATEMENT = (
+    update(_api_keys)
+    .where(_api_keys.c.id == bindparam("key_id"))
+    .values(
+        usage_count=func.coalesce(_api_keys.c.usage_count, 0) + bindparam("uses"),
+        last_used_at=bindparam("used_at"),
+        last_used_ip=bindparam("used_ip"),
+    )
+)
+
+
+class ApiKeyUsageTracker:
+    """Count API key uses in memory and write them to api_keys periodically."""
+    
+    def __init__(self):
+        self._uses: Counter = Counter()
+        self._last_used: Dict[int, Tuple[datetime, Optional[str]]] = {}
+        self._task: Optional[asyncio.Task] = None
+    
+    def record(self, api_key_id: int, ip_address: Optional[str] = None) -> None:
+        """Count one use of a key."""
+        self._uses[api_key_id] += 1
+        self._last_used[api_key_id] = (datetime.now(timezone.utc), ip_address)
+    
+    async def flush(self) -> int:
+        """Write the usage gathered so far. Returns the number of keys updated."""
+        uses, self._uses = self._uses, Counter()
+        last_used, self._last_used = self._last_used, {}
+        if not uses:
+            return 0
+        
+        params = [
+            {
+                "key_id": key_id,
+                "uses": count,
+                "used_at": last_used[key_id][0],
+                "used_ip": last_used[key_id][1],
+            }
+            for key_id, count in uses.items()
+        ]
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(_FLUSH_STATEMENT, params)
+        except Exception:
+            logger.exception("Failed to write usage for %d API keys", len(params))
+            return 0
+        return len(params)
+    
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(API_KEY_USAGE_FLUSH_INTERVAL)
+            await self.flush()
+    
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+    
+    async def shutdown(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+
+api_key_usage_tracker = ApiKeyUsageTracker()
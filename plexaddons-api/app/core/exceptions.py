@@ -1,3 +1,4 @@
+from typing import Dict, Optional
 from fastapi import HTTPException, status
 
 
@@ -11,12 +12,16 @@ class NotFoundError(PlexAddonsException):
         super().__init__(status_code=status.HTTP_404_NOT_FOUND, detail=detail)
 
 
+# Shared, never mutated by FastAPI's exception handler
+_BEARER_CHALLENGE_HEADERS = {"WWW-Authenticate": "Bearer"}
+
+
 class UnauthorizedError(PlexAddonsException):
     def __init__(self, detail: str = "Not authenticated"):
         super().__init__(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=detail,
-            headers={"WWW-Authenticate": "Bearer"}
+            headers=_BEARER_CHALLENGE_HEADERS
         )
 
 
@@ -45,6 +50,11 @@ class VersionLimitExceededError(PlexAddonsException):
         super().__init__(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail=detail)
 
 
+class RateLimitExceededError(PlexAddonsException):
+    def __init__(self, detail: str = "Rate limit exceeded. Please try again later.", headers: Optional[Dict[str, str]] = None):
+        super().__init__(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=detail, headers=headers)
+
+
 class PaymentError(PlexAddonsException):
     def __init__(self, detail: str = "Payment processing error"):
         super().__init__(status_code=status.HTTP_402_PAYMENT_REQUIRED, detail=detail)
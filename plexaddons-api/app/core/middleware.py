@@ -0,0 +1,124 @@
+"""
+Pure ASGI middlewares for response headers and request logging.
+
+These wrap `send` and edit the `http.response.start` message directly,
+avoiding the extra task and body streaming that @app.middleware("http")
+(BaseHTTPMiddleware) adds to every request.
+"""
+from datetime import datetime, timezone
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.config import get_settings
+from app.core.rate_limit import get_rate_limiter
+from app.core.request_log import request_log_writer
+
+settings = get_settings()
+
+
+class RateLimitHeaderMiddleware:
+    """Copy the rate limit headers stored on request.state onto the response."""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        # Rate limiting disabled (no Redis): nothing is ever stored
+        if scope["type"] != "http" or get_rate_limiter() is None:
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # request.state is backed by scope["state"]
+                rate_limit_headers = scope.get("state", {}).get("rate_limit_headers")
+                if rate_limit_headers:
+                    MutableHeaders(scope=message).update(rate_limit_headers)
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
+
+
+# Security headers, encoded once as raw ASGI header pairs
+_SECURITY_HEADERS = [
+    # Prevent clickjacking
+    (b"x-frame-options", b"DENY"),
+    # Prevent MIME type sniffing
+    (b"x-content-type-options", b"nosniff"),
+    # XSS Protection (legacy but still useful)
+    (b"x-xss-protection", b"1; mode=block"),
+    # Referrer policy
+    (b"referrer-policy", b"strict-origin-when-cross-origin"),
+    # Permissions policy (disable unnecessary browser features)
+    (b"permissions-policy", b"geolocation=(), microphone=(), camera=()"),
+]
+# HSTS - enforce HTTPS in production
+if settings.environment == "production":
+    _SECURITY_HEADERS.append(
+        (b"strict-transport-security", b"max-age=31536000; includeSubDomains")
+    )
+
+
+class SecurityHeadersMiddleware:
+    """Add security headers to every HTTP response."""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # No route sets these itself, so append rather than replace
+                message["headers"] = list(message.get("headers", [])) + _SECURITY_HEADERS
+            await send(message)
+        
+        await self.app(scope, receive, send_wrapper)
+
+
+class RequestLogMiddleware:
+    """Count every HTTP request and queue a sampled api_request_logs row (written in batches)."""
+    
+    def __init__(self, app: ASGIApp):
+        self.app = app
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        status_code = None
+        
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            now = datetime.now(timezone.utc)
+            path = scope["path"][:255]
+            request_log_writer.count(path, scope["method"], status_code, now)
+            if request_log_writer.sampled():
+                headers = Headers(scope=scope)
+                forwarded = headers.get("x-forwarded-for")
+                if forwarded:
+                    # Rightmost entry, as in RateLimitMiddleware.get_client_ip
+                    ip_address = forwarded[forwarded.rfind(",") + 1:].strip()
+                else:
+                    client = scope.get("client")
+                    ip_address = client[0] if client else None
+                user_agent = headers.get("user-agent")
+                request_log_writer.log((
+                    path,
+                    scope["method"],
+                    status_code,
+                    None,
+                    ip_address[:45] if ip_address else None,
+                    user_agent[:500] if user_agent else None,
+                    now,
+                ))
@@ -1,13 +1,113 @@
 import time
 import logging
+from collections import OrderedDict
 import redis.asyncio as redis
 from fastapi import Request, HTTPException, status
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 from app.config import get_settings
+from app.core.exceptions import RateLimitExceededError
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Limits bound once at import (Settings is frozen), so the hot path does
+# plain dict lookups instead of re-reading settings attributes
+_IP_LIMITS = {
+    "public": settings.rate_limit_public,
+    "auth": settings.rate_limit_auth_endpoints,
+}
+_DEFAULT_IP_LIMIT = settings.rate_limit_public
+_TIER_LIMITS = dict(settings.tier_rate_limit)
+_DEFAULT_TIER_LIMIT = settings.rate_limit_user_free
+
+
+# Approximate sliding window built from two fixed-window counters.
+# Checks one or more limits in order. For limit i:
+#   KEYS[2i-1] = current window counter, KEYS[2i] = previous window counter,
+#   ARGV[2i+1] = limit, ARGV[2i+2] = number of requests to take.
+# ARGV[1] = ms elapsed in the current window, ARGV[2] = window size (seconds).
+# Takes as many requests as are available up to the amount and returns a flat
+# {taken, remaining, ...} list. Stops at the first rejected limit, so nothing
+# is counted for it or for the limits after it.
+SLIDING_WINDOW_SCRIPT = """
+local elapsed_ms = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local weight = 1 - elapsed_ms / (window * 1000)
+local result = {}
+
+for i = 1, #KEYS / 2 do
+    local current_key = KEYS[2 * i - 1]
+    local limit = tonumber(ARGV[2 * i + 1])
+    local amount = tonumber(ARGV[2 * i + 2])
+
+    local current = tonumber(redis.call('GET', current_key) or '0')
+    local previous = tonumber(redis.call('GET', KEYS[2 * i]) or '0')
+    local available = math.ceil(limit - (previous * weight + current))
+    if available <= 0 then
+        table.insert(result, 0)
+        table.insert(result, 0)
+        return result
+    end
+
+    local taken = math.min(available, amount)
+    current = redis.call('INCRBY', current_key, taken)
+    if current == taken then
+        -- Counter must survive its own window and the next one, where it
+        -- is read as the previous window
+        redis.call('EXPIRE', current_key, 2 * window)
+    end
+    table.insert(result, taken)
+    table.insert(result, math.max(0, math.floor(limit - (previous * weight + current))))
+end
+return result
+"""
+
+# Requests borrowed from Redis at once for per-IP limits
+LOCAL_TOKEN_BATCH_SIZE = 10
+# Only the hot, high-limit public path leases; a batch per worker would eat
+# a large share of a small budget like auth's, and unused leased tokens
+# still weigh on the next window
+LEASED_ENDPOINT_TYPES = frozenset({"public"})
+# Max keys with a local lease before the least recently used is evicted
+LOCAL_TOKEN_MAX_ENTRIES = 10_000
+
+
+class LocalTokenBucketCache:
+    """
+    Per-process leases of rate-limit tokens borrowed from Redis in batches.
+    
+    A busy key hits Redis about once per batch instead of once per request.
+    Leases are dropped when the window rolls over; their unused tokens stay
+    counted in Redis, so the limit errs strict by at most one batch per worker.
+    """
+    
+    def __init__(self, batch_size: int = LOCAL_TOKEN_BATCH_SIZE, max_entries: int = LOCAL_TOKEN_MAX_ENTRIES):
+        self.batch_size = batch_size
+        self.max_entries = max_entries
+        # key -> [window, tokens left, remaining in Redis at last borrow]
+        self._leases: "OrderedDict[str, list]" = OrderedDict()
+    
+    def take(self, key: str, window: int) -> Optional[int]:
+        """Use one leased token. Returns the estimated remaining count, or None if none is leased."""
+        lease = self._leases.get(key)
+        if lease is None or lease[0] != window or lease[1] <= 0:
+            return None
+        lease[1] -= 1
+        self._leases.move_to_end(key)
+        return lease[2] + lease[1]
+    
+    def add(self, key: str, window: int, tokens: int, remaining: int) -> None:
+        """Store tokens borrowed from Redis for the given window."""
+        lease = self._leases.get(key)
+        if lease is not None and lease[0] == window:
+            lease[1] += tokens
+            lease[2] = remaining
+        else:
+            self._leases[key] = [window, tokens, remaining]
+        self._leases.move_to_end(key)
+        while len(self._leases) > self.max_entries:
+            self._leases.popitem(last=False)
+
 
 class RateLimiter:
     """Redis-based sliding window rate limiter with per-IP and per-user limits."""
@@ -15,59 +115,129 @@ class RateLimiter:
     def __init__(self, redis_client: redis.Redis):
         self.redis = redis_client
         self.window_size = 60  # 1 minute window
+        self.window_ms = self.window_size * 1000
+        # Runs via EVALSHA and reloads the script on NOSCRIPT automatically
+        self._sliding_window = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+        self.local_tokens = LocalTokenBucketCache()
+    
+    async def load_scripts(self) -> None:
+        """Preload the Lua script so the first request's EVALSHA doesn't miss."""
+        await self.redis.script_load(SLIDING_WINDOW_SCRIPT)
+    
+    async def _take_many(
+        self, limits: List[Tuple[str, int, int]], now_ms: int
+    ) -> List[Tuple[int, int]]:
+        """
+        Take requests from several sliding windows in one round-trip.
+        `limits` holds (key, limit, amount) in check order.
+        Returns one (taken, remaining) per limit; limits after the first
+        rejected one are neither checked nor counted and report (0, 0).
+        
+        The previous window's count is weighted by how much of it still
+        overlaps the sliding window, so each key costs two small counters
+        instead of one sorted-set entry per request.
+        """
+        current_window, elapsed_ms = divmod(now_ms, self.window_ms)
+        
+        keys = []
+        args = [elapsed_ms, self.window_size]
+        for key, limit, amount in limits:
+            keys += [f"{key}:{current_window}", f"{key}:{current_window - 1}"]
+            args += [limit, amount]
+        
+        result = await self._sliding_window(keys=keys, args=args)
+        taken = [(int(result[i]), int(result[i + 1])) for i in range(0, len(result), 2)]
+        return taken + [(0, 0)] * (len(limits) - len(taken))
+    
+    def _reset_time(self, now_ms: int) -> int:
+        return (now_ms // self.window_ms + 1) * self.window_size
+    
+    @staticmethod
+    def _ip_key(ip: str, endpoint_type: str) -> str:
+        return f"ratelimit:ip:{ip}:{endpoint_type}"
+    
+    @staticmethod
+    def _user_key(user_id: int) -> str:
+        return f"ratelimit:user:{user_id}"
     
     async def _check_limit(self, key: str, limit: int) -> Tuple[bool, int, int]:
         """
         Check if the rate limit is exceeded.
         Returns: (is_allowed, remaining, reset_time)
         """
-        now = time.time()
-        window_start = now - self.window_size
-        
-        pipe = self.redis.pipeline()
+        now_ms = time.time_ns() // 1_000_000
+        [(taken, remaining)] = await self._take_many([(key, limit, 1)], now_ms)
+        return taken > 0, remaining, self._reset_time(now_ms)
+    
+    async def check_ip_limit(self, ip: str, endpoint_type: str = "public") -> Tuple[bool, int, int]:
+        """Check IP-based rate limit, serving from a local token lease when possible."""
+        allowed, remaining, reset_time, _ = await self._check_ip_limit(ip, endpoint_type)
+        return allowed, remaining, reset_time
+    
+    async def _check_ip_limit(
+        self,
+        ip: str,
+        endpoint_type: str,
+        extra: Optional[Tuple[str, int]] = None,
+    ) -> Tuple[bool, int, int, Optional[Tuple[bool, int]]]:
+        """
+        Check the IP limit and, if given, one more (key, limit) after it.
+        When the IP needs a Redis round-trip anyway, the extra limit rides
+        along in the same script call.
+        Returns: (is_allowed, remaining, reset_time, extra_result)
+        where extra_result is (is_allowed, remaining) or None if not checked.
+        """
+        limit = _IP_LIMITS.get(endpoint_type, _DEFAULT_IP_LIMIT)
+        key = self._ip_key(ip, endpoint_type)
         
-        # Remove old entries
-        pipe.zremrangebyscore(key, 0, window_start)
-        # Count current requests
-        pipe.zcard(key)
-        # Add current request
-        pipe.zadd(key, {str(now): now})
-        # Set expiry on the key
-        pipe.expire(key, self.window_size + 1)
+        now_ms = time.time_ns() // 1_000_000
+        window = now_ms // self.window_ms
+        reset_time = self._reset_time(now_ms)
         
-        results = await pipe.execute()
-        current_count = results[1]
+        leased = endpoint_type in LEASED_ENDPOINT_TYPES
+        remaining = self.local_tokens.take(key, window) if leased else None
+        if remaining is not None:
+            if extra is None:
+                return True, remaining, reset_time, None
+            [(taken, extra_remaining)] = await self._take_many([(extra[0], extra[1], 1)], now_ms)
+            return True, remaining, reset_time, (taken > 0, extra_remaining)
         
-        remaining = max(0, limit - current_count - 1)
-        reset_time = int(now + self.window_size)
+        limits = [(key, limit, self.local_tokens.batch_size if leased else 1)]
+        if extra is not None:
+            limits.append((extra[0], extra[1], 1))
+        results = await self._take_many(limits, now_ms)
         
-        if current_count >= limit:
-            # Remove the request we just added since it's over limit
-            await self.redis.zrem(key, str(now))
-            return False, 0, reset_time
+        taken, remaining = results[0]
+        if not taken:
+            return False, 0, reset_time, None
         
-        return True, remaining, reset_time
-    
-    async def check_ip_limit(self, ip: str, endpoint_type: str = "public") -> Tuple[bool, int, int]:
-        """Check IP-based rate limit."""
-        limits = {
-            "public": settings.rate_limit_public,
-            "auth": settings.rate_limit_auth_endpoints,
-        }
-        limit = limits.get(endpoint_type, settings.rate_limit_public)
-        key = f"ratelimit:ip:{ip}:{endpoint_type}"
-        return await self._check_limit(key, limit)
+        # Use one token for this request and keep the rest for the next ones
+        if leased:
+            self.local_tokens.add(key, window, taken - 1, remaining)
+        extra_result = None
+        if extra is not None:
+            extra_result = (results[1][0] > 0, results[1][1])
+        return True, remaining + taken - 1, reset_time, extra_result
     
     async def check_user_limit(self, user_id: int, tier: str) -> Tuple[bool, int, int]:
         """Check user-based rate limit based on subscription tier."""
-        limits = {
-            "free": settings.rate_limit_user_free,
-            "pro": settings.rate_limit_user_pro,
-            "premium": settings.rate_limit_user_premium,
-        }
-        limit = limits.get(tier, settings.rate_limit_user_free)
-        key = f"ratelimit:user:{user_id}"
-        return await self._check_limit(key, limit)
+        limit = _TIER_LIMITS.get(tier, _DEFAULT_TIER_LIMIT)
+        return await self._check_limit(self._user_key(user_id), limit)
+    
+    async def check_ip_and_user_limit(
+        self, ip: str, endpoint_type: str, user_id: int, tier: str
+    ) -> Tuple[Tuple[bool, int, int], Optional[Tuple[bool, int, int]]]:
+        """
+        Check the IP limit, then the user limit, in a single Redis round-trip.
+        Returns: ((ip_allowed, ip_remaining, reset_time), user_result)
+        where user_result is None when the IP limit already rejected the request.
+        """
+        user_limit = _TIER_LIMITS.get(tier, _DEFAULT_TIER_LIMIT)
+        ip_allowed, ip_remaining, reset_time, user = await self._check_ip_limit(
+            ip, endpoint_type, extra=(self._user_key(user_id), user_limit)
+        )
+        user_result = (user[0], user[1], reset_time) if user is not None else None
+        return (ip_allowed, ip_remaining, reset_time), user_result
 
 
 class RateLimitMiddleware:
@@ -75,6 +245,14 @@ class RateLimitMiddleware:
     
     def __init__(self, redis_client: redis.Redis):
         self.limiter = RateLimiter(redis_client)
+        # Limit header values never change at runtime, so stringify them once
+        self._ip_limit_headers = {
+            endpoint_type: str(limit) for endpoint_type, limit in _IP_LIMITS.items()
+        }
+        self._user_limit_headers = {
+            tier: str(limit) for tier, limit in _TIER_LIMITS.items()
+        }
+        self._default_user_limit_header = str(_DEFAULT_TIER_LIMIT)
     
     def get_client_ip(self, request: Request) -> str:
         """Extract client IP from request, considering proxies."""
@@ -82,9 +260,10 @@ class RateLimitMiddleware:
         if forwarded:
             # Use the rightmost IP (closest to our trusted reverse proxy)
             # The leftmost can be spoofed by the client
-            ips = [ip.strip() for ip in forwarded.split(",")]
-            return ips[-1]
-        return request.client.host if request.client else "unknown"
+            idx = forwarded.rfind(",")
+            return forwarded[idx + 1:].strip()
+        client = request.client
+        return client.host if client else "unknown"
     
     async def check_rate_limit(
         self,
@@ -95,49 +274,46 @@ class RateLimitMiddleware:
     ) -> dict:
         """
         Check rate limits and return headers.
-        Raises HTTPException if limit exceeded.
+        Raises RateLimitExceededError if limit exceeded.
         """
         ip = self.get_client_ip(request)
         headers = {}
         
         try:
-            # Check IP limit first
-            ip_allowed, ip_remaining, ip_reset = await self.limiter.check_ip_limit(ip, endpoint_type)
+            # IP limit first; the user limit (if any) is checked in the same round-trip
+            if user_id is not None and user_tier is not None:
+                (ip_allowed, ip_remaining, ip_reset), user_result = (
+                    await self.limiter.check_ip_and_user_limit(ip, endpoint_type, user_id, user_tier)
+                )
+            else:
+                ip_allowed, ip_remaining, ip_reset = await self.limiter.check_ip_limit(ip, endpoint_type)
+                user_result = None
             
-            headers["X-RateLimit-Limit-IP"] = str(
-                settings.rate_limit_auth_endpoints if endpoint_type == "auth" else settings.rate_limit_public
+            headers["X-RateLimit-Limit-IP"] = self._ip_limit_headers.get(
+                endpoint_type, self._ip_limit_headers["public"]
             )
             headers["X-RateLimit-Remaining-IP"] = str(ip_remaining)
             headers["X-RateLimit-Reset-IP"] = str(ip_reset)
             
             if not ip_allowed:
-                raise HTTPException(
-                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                    detail="Rate limit exceeded (IP). Please try again later.",
-                    headers=headers
+                raise RateLimitExceededError(
+                    "Rate limit exceeded (IP). Please try again later.",
+                    headers=headers,
                 )
             
-            # Check user limit if authenticated
-            if user_id is not None and user_tier is not None:
-                user_allowed, user_remaining, user_reset = await self.limiter.check_user_limit(
-                    user_id, user_tier
-                )
+            if user_result is not None:
+                user_allowed, user_remaining, user_reset = user_result
                 
-                tier_limits = {
-                    "free": settings.rate_limit_user_free,
-                    "pro": settings.rate_limit_user_pro,
-                    "premium": settings.rate_limit_user_premium,
-                }
-                
-                headers["X-RateLimit-Limit-User"] = str(tier_limits.get(user_tier, settings.rate_limit_user_free))
+                headers["X-RateLimit-Limit-User"] = self._user_limit_headers.get(
+                    user_tier, self._default_user_limit_header
+                )
                 headers["X-RateLimit-Remaining-User"] = str(user_remaining)
                 headers["X-RateLimit-Reset-User"] = str(user_reset)
                 
                 if not user_allowed:
-                    raise HTTPException(
-                        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-                        detail="Rate limit exceeded (User). Please try again later or upgrade your plan.",
-                        headers=headers
+                    raise RateLimitExceededError(
+                        "Rate limit exceeded (User). Please try again later or upgrade your plan.",
+                        headers=headers,
                     )
             
             return headers
@@ -0,0 +1,131 @@
+"""
+Buffered writer for api_request_counters and api_request_logs.
+
+Every request bumps an in-memory counter keyed by endpoint, method, status
+and minute; the counters are upserted into api_request_counters in one
+statement per flush. Only a small random sample of requests is also kept
+as a full row in api_request_logs (written in batches with COPY), so the
+raw table grows with the sample rate instead of with traffic. Anything
+still buffered when the process dies is lost; these are analytics, not
+audit records.
+"""
+import asyncio
+import logging
+import random
+from collections import Counter
+from datetime import datetime
+from typing import List, Optional, Tuple
+from sqlalchemy.dialects.postgresql import insert
+from app.database import engine
+from app.models import ApiRequestCounter
+
+logger = logging.getLogger(__name__)
+
+# Records (and distinct counter keys) held in memory before new ones are dropped
+REQUEST_LOG_QUEUE_SIZE = 1000
+# Seconds between flushes
+REQUEST_LOG_FLUSH_INTERVAL = 0.5
+# Share of requests also written to api_request_logs as a full row
+REQUEST_LOG_SAMPLE_RATE = 0.01
+
+REQUEST_LOG_COLUMNS = ["endpoint", "method", "status_code", "user_id", "ip_address", "user_agent", "timestamp"]
+
+RequestLogRecord = Tuple[str, str, Optional[int], Optional[int], Optional[str], Optional[str], datetime]
+# (endpoint, method, status_code, bucket_minute)
+RequestCounterKey = Tuple[str, str, int, datetime]
+
+
+class RequestLogWriter:
+    """Count requests per minute and COPY a sample of full rows in batches."""
+    
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=REQUEST_LOG_QUEUE_SIZE)
+        self._counts: Counter = Counter()
+        self._task: Optional[asyncio.Task] = None
+    
+    def count(self, endpoint: str, method: str, status_code: Optional[int], timestamp: datetime) -> None:
+        """Add one request to its per-minute counter."""
+        # No status means the app raised before responding
+        key = (endpoint, method, status_code or 500, timestamp.replace(second=0, microsecond=0))
+        # Bounded like the queue, e.g. against scanners probing random paths
+        if key in self._counts or len(self._counts) < REQUEST_LOG_QUEUE_SIZE:
+            self._counts[key] += 1
+    
+    @staticmethod
+    def sampled() -> bool:
+        """Whether the current request should also be logged as a full row."""
+        return random.random() < REQUEST_LOG_SAMPLE_RATE
+    
+    def log(self, record: RequestLogRecord) -> None:
+        """Queue a row; dropped if the buffer is full (the database is falling behind)."""
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            pass
+    
+    async def flush_counts(self) -> int:
+        """Upsert the counters gathered so far. Returns the number of keys written."""
+        counts, self._counts = self._counts, Counter()
+        if not counts:
+            return 0
+        
+        stmt = insert(ApiRequestCounter).values([
+            {
+                "endpoint": endpoint,
+                "method": method,
+                "status_code": status_code,
+                "bucket_minute": bucket_minute,
+                "count": n,
+            }
+            for (endpoint, method, status_code, bucket_minute), n in counts.items()
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["endpoint", "method", "status_code", "bucket_minute"],
+            set_={"count": ApiRequestCounter.count + stmt.excluded.count},
+        )
+        try:
+            async with engine.begin() as conn:
+                await conn.execute(stmt)
+        except Exception:
+            logger.exception("Failed to write %d API request counters", len(counts))
+            return 0
+        return len(counts)
+    
+    async def flush(self) -> int:
+        """Write everything buffered so far. Returns the number of sampled rows written."""
+        await self.flush_counts()
+        
+        records: List[RequestLogRecord] = []
+        while not self._queue.empty():
+            records.append(self._queue.get_nowait())
+        if not records:
+            return 0
+        
+        try:
+            async with engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                await raw.driver_connection.copy_records_to_table(
+                    "api_request_logs", records=records, columns=REQUEST_LOG_COLUMNS
+                )
+        except Exception:
+            logger.exception("Failed to write %d API request log rows", len(records))
+            return 0
+        return len(records)
+    
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(REQUEST_LOG_FLUSH_INTERVAL)
+            await self.flush()
+    
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+    
+    async def shutdown(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+
+request_log_writer = RequestLogWriter()
@@ -0,0 +1,70 @@
+"""
+Minimal asyncio scheduler for the app's periodic jobs.
+
+Each job is a task on the event loop that sleeps until its next run time.
+Cron-style jobs are scheduled in UTC.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[], Awaitable[None]]
+
+
+def seconds_until(hour: int, minute: int, day_of_week: Optional[int] = None) -> float:
+    """Seconds until the next UTC hour:minute (on `day_of_week`, 0 = Monday, if given)."""
+    now = datetime.now(timezone.utc)
+    run_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if day_of_week is not None:
+        run_at += timedelta(days=(day_of_week - now.weekday()) % 7)
+    if run_at <= now:
+        run_at += timedelta(days=1 if day_of_week is None else 7)
+    return (run_at - now).total_seconds()
+
+
+async def _run_job(fn: Job) -> None:
+    # A failing run is logged and the job stays scheduled
+    try:
+        await fn()
+    except Exception:
+        logger.exception("Scheduled job %s failed", fn.__name__)
+
+
+async def _run_at(fn: Job, hour: int, minute: int, day_of_week: Optional[int]) -> None:
+    while True:
+        await asyncio.sleep(seconds_until(hour, minute, day_of_week))
+        await _run_job(fn)
+
+
+async def _run_interval(fn: Job, seconds: float) -> None:
+    while True:
+        await asyncio.sleep(seconds)
+        await _run_job(fn)
+
+
+class Scheduler:
+    """Runs cron-style and interval jobs as asyncio tasks."""
+    
+    def __init__(self):
+        self._jobs: List[Callable[[], Awaitable[None]]] = []
+        self._tasks: List[asyncio.Task] = []
+    
+    def add_cron_job(self, fn: Job, hour: int, minute: int = 0, day_of_week: Optional[int] = None) -> None:
+        """Run `fn` daily (or weekly on `day_of_week`) at hour:minute UTC."""
+        self._jobs.append(lambda: _run_at(fn, hour, minute, day_of_week))
+    
+    def add_interval_job(self, fn: Job, minutes: float) -> None:
+        """Run `fn` every `minutes`, starting one interval after start()."""
+        self._jobs.append(lambda: _run_interval(fn, minutes * 60))
+    
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(job()) for job in self._jobs]
+    
+    async def shutdown(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
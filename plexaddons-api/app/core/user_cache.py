@@ -0,0 +1,212 @@
+"""
+Read-through Redis cache for User rows.
+
+The auth dependencies resolve the current user on every request; this cache
+replaces that SELECT with a Redis GET. Cached rows are re-attached to the
+request's session so handlers can mutate and commit them as usual.
+Call invalidate_user_cache() after committing any change to a user; ORM
+updates to User rows are also invalidated automatically once the session
+commits, so a missed call costs at most one stale read.
+"""
+import asyncio
+import json
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import event, select, DateTime, Enum as SQLEnum
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
+from app.models import User
+from app.core.rate_limit import get_redis_client
+
+# Cache TTL in seconds
+USER_CACHE_TTL = 60
+# How long an unknown discord_id is remembered as missing
+MISSING_USER_CACHE_TTL = 60
+
+
+def _user_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def user_json_key(user_id: int) -> str:
+    """Key for the serialized /users/me response body."""
+    return f"user:{user_id}:json"
+
+
+def public_user_json_key(user_id: int) -> str:
+    """Key for the serialized public profile response body."""
+    return f"user:{user_id}:public"
+
+
+def _discord_key(discord_id: str) -> str:
+    return f"user:discord:{discord_id}"
+
+
+def _missing_discord_key(discord_id: str) -> str:
+    return f"user:discord:{discord_id}:missing"
+
+
+# Deferred columns are left out of the cache and load on demand
+_CACHED_COLUMNS = [
+    column for column in User.__table__.columns
+    if not User.__mapper__.get_property_by_column(column).deferred
+]
+
+
+def _serialize_user(user: User) -> str:
+    """Serialize the cached column values of a user to JSON."""
+    data = {}
+    for column in _CACHED_COLUMNS:
+        value = getattr(user, column.key)
+        if isinstance(value, datetime):
+            value = value.isoformat()
+        elif hasattr(value, "value"):
+            value = value.value
+        data[column.key] = value
+    return json.dumps(data)
+
+
+def _deserialize_user(raw: str) -> User:
+    """Rebuild a detached User from its cached JSON."""
+    data = json.loads(raw)
+    for column in _CACHED_COLUMNS:
+        value = data.get(column.key)
+        if value is None:
+            continue
+        if isinstance(column.type, DateTime):
+            data[column.key] = datetime.fromisoformat(value)
+        elif isinstance(column.type, SQLEnum):
+            data[column.key] = column.type.enum_class(value)
+    user = User(**data)
+    make_transient_to_detached(user)
+    return user
+
+
+async def cache_user(user: User) -> None:
+    """Store a user row in the cache."""
+    redis = get_redis_client()
+    if redis:
+        await redis.set(_user_key(user.id), _serialize_user(user), ex=USER_CACHE_TTL)
+
+
+async def get_cached_user(db: AsyncSession, user_id: int) -> Optional[User]:
+    """
+    Get a user by ID, reading through the Redis cache.
+
+    The returned instance is attached to `db`, so changes to it are
+    flushed on the next commit like any other loaded row.
+    """
+    redis = get_redis_client()
+    if redis:
+        raw = await redis.get(_user_key(user_id))
+        if raw:
+            return await db.merge(_deserialize_user(raw), load=False)
+
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    if user:
+        await cache_user(user)
+    return user
+
+
+async def get_cached_user_by_discord_id(db: AsyncSession, discord_id: str) -> Optional[User]:
+    """Get a user by Discord ID via the cached discord_id -> id mapping."""
+    redis = get_redis_client()
+    if redis:
+        user_id = await redis.get(_discord_key(discord_id))
+        if user_id:
+            return await get_cached_user(db, int(user_id))
+
+    result = await db.execute(select(User).where(User.discord_id == discord_id))
+    user = result.scalar_one_or_none()
+    if user:
+        await cache_user(user)
+        if redis:
+            # discord_id never changes, so the mapping only needs a TTL
+            await redis.set(_discord_key(discord_id), user.id, ex=USER_CACHE_TTL)
+    return user
+
+
+async def get_cached_public_user_json(discord_id: str) -> Optional[str]:
+    """Get the cached public profile body for a Discord ID, if any."""
+    redis = get_redis_client()
+    if not redis:
+        return None
+    user_id = await redis.get(_discord_key(discord_id))
+    if not user_id:
+        return None
+    return await redis.get(public_user_json_key(int(user_id)))
+
+
+async def cache_public_user_json(user_id: int, body: str) -> None:
+    """Store the serialized public profile body for a user."""
+    redis = get_redis_client()
+    if redis:
+        await redis.set(public_user_json_key(user_id), body, ex=USER_CACHE_TTL)
+
+
+async def is_discord_id_missing(discord_id: str) -> bool:
+    """Check whether a Discord ID was recently looked up and not found."""
+    redis = get_redis_client()
+    if not redis:
+        return False
+    return bool(await redis.exists(_missing_discord_key(discord_id)))
+
+
+async def mark_discord_id_missing(discord_id: str) -> None:
+    """Remember that no user exists for a Discord ID."""
+    redis = get_redis_client()
+    if redis:
+        await redis.set(_missing_discord_key(discord_id), 1, ex=MISSING_USER_CACHE_TTL)
+
+
+async def clear_discord_id_missing(discord_id: str) -> None:
+    """Forget a negative lookup. Call after creating a user."""
+    redis = get_redis_client()
+    if redis:
+        await redis.delete(_missing_discord_key(discord_id))
+
+
+async def invalidate_user_cache(*user_ids: int) -> None:
+    """Drop cached user rows. Call after committing changes to the users."""
+    redis = get_redis_client()
+    if redis and user_ids:
+        keys = [_user_key(user_id) for user_id in user_ids]
+        keys += [user_json_key(user_id) for user_id in user_ids]
+        keys += [public_user_json_key(user_id) for user_id in user_ids]
+        await redis.delete(*keys)
+
+
+# Session.info key holding the ids of users updated in the current transaction
+_UPDATED_USERS_KEY = "updated_user_ids"
+
+# Strong references to pending invalidations; the event loop only keeps weak
+# ones, so an unreferenced task could be garbage-collected before it runs
+_invalidation_tasks: set = set()
+
+
+@event.listens_for(User, "after_update")
+def _track_user_update(mapper, connection, target: User) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_UPDATED_USERS_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_updated_users(session: Session) -> None:
+    user_ids = session.info.pop(_UPDATED_USERS_KEY, None)
+    if not user_ids:
+        return
+    try:
+        # Commit listeners are synchronous; AsyncSession runs them on the event loop thread
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(invalidate_user_cache(*user_ids))
+    _invalidation_tasks.add(task)
+    task.add_done_callback(_invalidation_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_updated_users(session: Session) -> None:
+    session.info.pop(_UPDATED_USERS_KEY, None)
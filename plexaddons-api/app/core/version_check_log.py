@@ -0,0 +1,86 @@
+"""
+Buffered writer for version_checks.
+
+Version checks arrive once per plugin poll and are only ever read in
+aggregate, so they are queued in memory and written in batches with COPY,
+like the sampled API request logs. id comes from the column's sequence
+default and nothing is returned to the caller. Rows still queued when the
+process dies are lost.
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import List, Optional, Tuple
+from app.database import engine
+
+logger = logging.getLogger(__name__)
+
+# Rows held in memory before new ones are dropped
+VERSION_CHECK_QUEUE_SIZE = 10_000
+# A flush starts once this many rows are queued...
+VERSION_CHECK_BATCH_SIZE = 1000
+# ...or after this many seconds, whichever comes first
+VERSION_CHECK_FLUSH_INTERVAL = 0.5
+
+VERSION_CHECK_COLUMNS = ["addon_id", "version_id", "checked_version", "client_ip_hash", "timestamp"]
+
+VersionCheckRecord = Tuple[int, Optional[int], Optional[str], Optional[str], datetime]
+
+
+class VersionCheckWriter:
+    """Queue version check rows and COPY them into version_checks in batches."""
+    
+    def __init__(self):
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=VERSION_CHECK_QUEUE_SIZE)
+        self._batch_ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+    
+    def log(self, record: VersionCheckRecord) -> None:
+        """Queue a row; dropped if the buffer is full (the database is falling behind)."""
+        try:
+            self._queue.put_nowait(record)
+        except asyncio.QueueFull:
+            return
+        if self._queue.qsize() >= VERSION_CHECK_BATCH_SIZE:
+            self._batch_ready.set()
+    
+    async def flush(self) -> int:
+        """Write everything queued so far. Returns the number of rows written."""
+        records: List[VersionCheckRecord] = []
+        while not self._queue.empty():
+            records.append(self._queue.get_nowait())
+        if not records:
+            return 0
+        
+        try:
+            async with engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                await raw.driver_connection.copy_records_to_table(
+                    "version_checks", records=records, columns=VERSION_CHECK_COLUMNS
+                )
+        except Exception:
+            logger.exception("Failed to write %d version check rows", len(records))
+            return 0
+        return len(records)
+    
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._batch_ready.wait(), VERSION_CHECK_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._batch_ready.clear()
+            await self.flush()
+    
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+    
+    async def shutdown(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+
+version_check_writer = VersionCheckWriter()
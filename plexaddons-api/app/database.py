@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
-from sqlalchemy.orm import declarative_base
+from sqlalchemy.orm import DeclarativeBase
 from app.config import get_settings
 
 settings = get_settings()
@@ -11,8 +11,18 @@ engine = create_async_engine(
     database_url,
     echo=settings.debug,
     pool_pre_ping=True,
+    # Reuse the most recently returned connection so the rest can sit idle
+    # long enough for a server-side idle timeout to reap them
+    pool_use_lifo=True,
     pool_size=10,
     max_overflow=20,
+    # Room for every distinct statement the app issues (default is 500)
+    query_cache_size=1200,
+    connect_args={
+        # Per-connection cache of asyncpg prepared statements (default is
+        # 100), so hot queries skip the server-side parse/plan as well
+        "prepared_statement_cache_size": 500,
+    },
 )
 
 AsyncSessionLocal = async_sessionmaker(
@@ -23,7 +33,9 @@ AsyncSessionLocal = async_sessionmaker(
     autoflush=False,
 )
 
-Base = declarative_base()
+
+class Base(DeclarativeBase):
+    pass
 
 
 async def get_db() -> AsyncSession:
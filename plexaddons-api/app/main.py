@@ -1,9 +1,12 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import redis.asyncio as redis
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import delete, select, text, update
 from datetime import datetime, timedelta, timezone
 
 from app.config import get_settings
@@ -12,46 +15,149 @@ from app.api.v1 import router as v1_router
 from app.api.public import router as public_router
 from app.webhooks import router as webhooks_router
 from app.core.rate_limit import RateLimitMiddleware, set_rate_limiter, set_redis_client
+from app.core.middleware import RateLimitHeaderMiddleware, RequestLogMiddleware, SecurityHeadersMiddleware
+from app.core.api_key_usage import api_key_usage_tracker
+from app.core.request_log import request_log_writer
+from app.core.version_check_log import version_check_writer
+from app.core.scheduler import Scheduler
 from app.core.exceptions import PlexAddonsException
+from app.core.user_cache import invalidate_user_cache
+from app.models import User, Version, AdminAuditLog, ApiRequestLog, ApiRequestCounter
+from app.services.email_service import email_service
+from app.services.ticket_service import ticket_service
+from app.services.paypal_service import PayPalService
+from app.services.webhook_service import WebhookService
+from app.services.analytics_service import AnalyticsService
 
 settings = get_settings()
 
 # Scheduler for periodic tasks
-scheduler = AsyncIOScheduler()
+scheduler = Scheduler()
+
+# Rows removed per statement by the retention cleanups
+RETENTION_DELETE_BATCH_SIZE = 10_000
+
+# API request logs are kept this long; whole monthly partitions are dropped
+API_REQUEST_LOG_RETENTION_DAYS = 30
+# Per-minute request counters are small, so they outlive the sampled rows
+API_REQUEST_COUNTER_RETENTION_DAYS = 90
+# Raw version checks (and their daily aggregates) are kept this long
+VERSION_CHECK_RETENTION_DAYS = 90
+
+# Log records are handed to a queue; a background thread does the stream I/O
+log_queue: queue.SimpleQueue = queue.SimpleQueue()
+log_listener = QueueListener(log_queue, logging.StreamHandler(), respect_handler_level=True)
+log_handler = QueueHandler(log_queue)
+
+
+def setup_logging():
+    """Route app logging through a non-blocking queue handler."""
+    root = logging.getLogger()
+    if log_handler in root.handlers:
+        # Already configured by an earlier startup in this process
+        return
+    root.addHandler(log_handler)
+    log_listener.start()
+
+
+def teardown_logging():
+    """Flush queued records and detach the queue handler."""
+    root = logging.getLogger()
+    if log_handler not in root.handlers:
+        return
+    root.removeHandler(log_handler)
+    log_listener.stop()
+
+
+async def delete_older_than(model, column, cutoff: datetime) -> int:
+    """
+    Delete rows whose `column` is before `cutoff` in batches.
+    
+    Each batch is its own short transaction, so a large backlog never holds
+    one long-running lock over the whole table.
+    """
+    total = 0
+    async with AsyncSessionLocal() as db:
+        while True:
+            batch = select(model.id).where(column < cutoff).limit(RETENTION_DELETE_BATCH_SIZE)
+            result = await db.execute(delete(model).where(model.id.in_(batch)))
+            await db.commit()
+            total += result.rowcount
+            if result.rowcount < RETENTION_DELETE_BATCH_SIZE:
+                return total
 
 
 async def cleanup_audit_logs():
     """Scheduled task to clean up old audit logs."""
-    from app.models import AdminAuditLog
-    from sqlalchemy import delete
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.audit_log_retention_days)
+    deleted = await delete_older_than(AdminAuditLog, AdminAuditLog.created_at, cutoff)
+    print(f"[Scheduler] Cleaned up {deleted} audit logs older than {cutoff}")
+
+
+def _next_month(month_start: datetime) -> datetime:
+    return (month_start + timedelta(days=32)).replace(day=1)
+
+
+async def maintain_monthly_partitions(table: str, retention_days: int) -> int:
+    """
+    Create the current and next monthly partitions of `table` and drop the
+    ones that are entirely past retention. Returns the number dropped.
     
-    async with AsyncSessionLocal() as db:
-        cutoff = datetime.now(timezone.utc) - timedelta(days=settings.audit_log_retention_days)
-        await db.execute(
-            delete(AdminAuditLog).where(AdminAuditLog.created_at < cutoff)
-        )
-        await db.commit()
-        print(f"[Scheduler] Cleaned up audit logs older than {cutoff}")
+    Partitions are named <table>_YYYY_MM (see migrations 013 and 026). They
+    are UNLOGGED: these are analytics rows, so skipping WAL is worth having
+    a partition truncated after a crash.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = now - timedelta(days=retention_days)
+    this_month = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    
+    async with engine.begin() as conn:
+        for start in (this_month, _next_month(this_month)):
+            await conn.execute(text(
+                f"CREATE UNLOGGED TABLE IF NOT EXISTS {table}_{start:%Y_%m} "
+                f"PARTITION OF {table} "
+                f"FOR VALUES FROM ('{start.isoformat()}') TO ('{_next_month(start).isoformat()}')"
+            ))
+        
+        result = await conn.execute(text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            f"WHERE i.inhparent = '{table}'::regclass"
+        ))
+        dropped = 0
+        for (name,) in result.all():
+            start = datetime.strptime(name[-7:], "%Y_%m").replace(tzinfo=timezone.utc)
+            if _next_month(start) <= cutoff:
+                await conn.execute(text(f"DROP TABLE {name}"))
+                dropped += 1
+    
+    return dropped
 
 
 async def cleanup_api_request_logs():
     """Scheduled task to clean up old API request logs (keep 30 days)."""
-    from app.models import ApiRequestLog
-    from sqlalchemy import delete
+    dropped = await maintain_monthly_partitions("api_request_logs", API_REQUEST_LOG_RETENTION_DAYS)
+    # Trim the remainder of the partition that straddles the cutoff
+    cutoff = datetime.now(timezone.utc) - timedelta(days=API_REQUEST_LOG_RETENTION_DAYS)
+    deleted = await delete_older_than(ApiRequestLog, ApiRequestLog.timestamp, cutoff)
+    print(f"[Scheduler] Dropped {dropped} API request log partitions and {deleted} rows older than {cutoff}")
     
+    cutoff = datetime.now(timezone.utc) - timedelta(days=API_REQUEST_COUNTER_RETENTION_DAYS)
+    deleted = await delete_older_than(ApiRequestCounter, ApiRequestCounter.bucket_minute, cutoff)
+    print(f"[Scheduler] Cleaned up {deleted} API request counters older than {cutoff}")
+
+
+async def cleanup_version_checks():
+    """Scheduled task to clean up old version checks and usage stats (keep 90 days)."""
+    dropped = await maintain_monthly_partitions("version_checks", VERSION_CHECK_RETENTION_DAYS)
+    # Trims the straddling partition and the daily aggregates
     async with AsyncSessionLocal() as db:
-        cutoff = datetime.now(timezone.utc) - timedelta(days=30)
-        await db.execute(
-            delete(ApiRequestLog).where(ApiRequestLog.timestamp < cutoff)
-        )
-        await db.commit()
-        print(f"[Scheduler] Cleaned up API request logs older than {cutoff}")
+        await AnalyticsService.cleanup_old_data(db, retention_days=VERSION_CHECK_RETENTION_DAYS)
+    print(f"[Scheduler] Dropped {dropped} version check partitions and cleaned up older analytics data")
 
 
 async def send_weekly_summary():
     """Send weekly summary email to admin."""
-    from app.services.email_service import email_service
-    
     async with AsyncSessionLocal() as db:
         result = await email_service.send_admin_weekly_summary(db)
         if result:
@@ -62,8 +168,6 @@ async def send_weekly_summary():
 
 async def compress_ticket_attachments():
     """Scheduled task to compress old ticket attachments."""
-    from app.services.ticket_service import ticket_service
-    
     async with AsyncSessionLocal() as db:
         compressed_count = await ticket_service.compress_old_attachments(db)
         print(f"[Scheduler] Compressed {compressed_count} ticket attachments")
@@ -71,40 +175,81 @@ async def compress_ticket_attachments():
 
 async def cleanup_ticket_attachments():
     """Scheduled task to delete very old ticket attachments."""
-    from app.services.ticket_service import ticket_service
-    
     async with AsyncSessionLocal() as db:
         deleted_count = await ticket_service.delete_old_attachments(db)
+        deleted_blobs = await ticket_service.delete_orphaned_blobs(db)
         removed_dirs = await ticket_service.cleanup_empty_directories()
-        print(f"[Scheduler] Deleted {deleted_count} old ticket attachments, removed {removed_dirs} empty directories")
+        print(
+            f"[Scheduler] Deleted {deleted_count} old ticket attachments, {deleted_blobs} unreferenced blobs, "
+            f"removed {removed_dirs} empty directories"
+        )
+
+
+async def rollup_usage_stats():
+    """Scheduled task to refresh today's addon usage stats from the raw version checks."""
+    async with AsyncSessionLocal() as db:
+        rows = await AnalyticsService.rollup_daily_stats(db)
+    print(f"[Scheduler] Rolled up {rows} addon usage stats rows for today")
+
+
+async def finalize_usage_stats():
+    """Scheduled task to roll up yesterday's checks that arrived after the last refresh."""
+    yesterday = datetime.now(timezone.utc).date() - timedelta(days=1)
+    async with AsyncSessionLocal() as db:
+        rows = await AnalyticsService.rollup_daily_stats(db, yesterday)
+        # Yesterday is final now, so fold it into the weekly totals
+        await AnalyticsService.refresh_weekly_stats(db)
+    print(f"[Scheduler] Rolled up {rows} addon usage stats rows for {yesterday}, refreshed weekly stats")
+
+
+async def expire_temp_tiers():
+    """Scheduled task to clear lapsed temp tiers so the effective_tier trigger falls back to the paid tier."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(User)
+            .where(
+                User.temp_tier.isnot(None),
+                User.temp_tier_expires_at <= datetime.now(timezone.utc),
+            )
+            .values(
+                temp_tier=None,
+                temp_tier_expires_at=None,
+                temp_tier_granted_by=None,
+                temp_tier_granted_at=None,
+            )
+            .returning(User.id)
+        )
+        expired = result.scalars().all()
+        
+        if expired:
+            await db.commit()
+            await invalidate_user_cache(*expired)
+            print(f"[Scheduler] Expired temp tiers for {len(expired)} users")
 
 
 async def publish_scheduled_versions():
     """Scheduled task to publish versions that have reached their scheduled release time."""
-    from app.models import Version
-    from sqlalchemy import select, and_
     async with AsyncSessionLocal() as db:
         now = datetime.now(timezone.utc)
         
-        # Find versions that are scheduled and ready to publish
+        # Publish every version that is scheduled and ready in one statement
         result = await db.execute(
-            select(Version).where(
-                and_(
-                    Version.scheduled_release_at.isnot(None),
-                    Version.scheduled_release_at <= now,
-                    Version.is_published == False
-                )
+            update(Version)
+            .where(
+                Version.scheduled_release_at.isnot(None),
+                Version.scheduled_release_at <= now,
+                Version.is_published == False,
             )
+            .values(is_published=True)
+            .returning(Version.version, Version.addon_id)
         )
-        versions = result.scalars().all()
-        
-        for version in versions:
-            version.is_published = True
-            print(f"[Scheduler] Published scheduled version {version.version} for addon {version.addon_id}")
+        published = result.all()
         
-        if versions:
+        if published:
             await db.commit()
-            print(f"[Scheduler] Published {len(versions)} scheduled versions")
+            for version, addon_id in published:
+                print(f"[Scheduler] Published scheduled version {version} for addon {addon_id}")
+            print(f"[Scheduler] Published {len(published)} scheduled versions")
 
 
 async def bootstrap_initial_admin():
@@ -112,9 +257,6 @@ async def bootstrap_initial_admin():
     if not settings.initial_admin_discord_id:
         return
     
-    from app.models import User
-    from sqlalchemy import select
-    
     async with AsyncSessionLocal() as db:
         result = await db.execute(
             select(User).where(User.discord_id == settings.initial_admin_discord_id)
@@ -124,6 +266,7 @@ async def bootstrap_initial_admin():
         if user and not user.is_admin:
             user.is_admin = True
             await db.commit()
+            await invalidate_user_cache(user.id)
             print(f"[Bootstrap] Promoted existing user {user.discord_username} to admin")
         elif not user:
             print(f"[Bootstrap] Initial admin Discord ID configured: {settings.initial_admin_discord_id}")
@@ -134,17 +277,40 @@ async def bootstrap_initial_admin():
 async def lifespan(app: FastAPI):
     """Application lifespan manager."""
     # Startup
-    print("[Startup] Initializing database...")
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    setup_logging()
+    # Production schema is managed by Alembic; create_all would only
+    # re-inspect every table to find nothing to create
+    if settings.environment != "production":
+        print("[Startup] Initializing database...")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    # Make sure this month's log partitions exist before any insert
+    for table, retention_days in (
+        ("api_request_logs", API_REQUEST_LOG_RETENTION_DAYS),
+        ("version_checks", VERSION_CHECK_RETENTION_DAYS),
+    ):
+        try:
+            await maintain_monthly_partitions(table, retention_days)
+        except Exception as e:
+            print(f"[Startup] {table} partition maintenance failed: {e}")
     
     # Initialize Redis for rate limiting
     print("[Startup] Connecting to Redis...")
+    app.state.redis_pool = None
     try:
-        redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+        # One explicit pool shared by the rate limiter, caches and OAuth state
+        redis_pool = redis.ConnectionPool.from_url(
+            settings.redis_url,
+            decode_responses=True,
+            max_connections=settings.redis_max_connections,
+            health_check_interval=30,
+        )
+        redis_client = redis.Redis(connection_pool=redis_pool)
         await redis_client.ping()
+        app.state.redis_pool = redis_pool
         set_redis_client(redis_client)  # Store globally for OAuth state storage
         rate_limiter = RateLimitMiddleware(redis_client)
+        await rate_limiter.limiter.load_scripts()
         set_rate_limiter(rate_limiter)
         print("[Startup] Redis connected successfully")
     except Exception as e:
@@ -155,52 +321,52 @@ async def lifespan(app: FastAPI):
     await bootstrap_initial_admin()
     
     # Start scheduler
-    scheduler.add_job(
-        cleanup_audit_logs,
-        "cron",
-        hour=3,  # Run at 3 AM daily
-        minute=0,
-    )
-    scheduler.add_job(
-        cleanup_api_request_logs,
-        "cron",
-        hour=3,  # Run at 3 AM daily
-        minute=30,
-    )
-    scheduler.add_job(
+    scheduler.add_cron_job(cleanup_audit_logs, hour=3, minute=0)  # Run at 3 AM daily
+    scheduler.add_cron_job(cleanup_api_request_logs, hour=3, minute=30)  # Run at 3:30 AM daily
+    scheduler.add_cron_job(cleanup_version_checks, hour=3, minute=45)  # Run at 3:45 AM daily
+    scheduler.add_cron_job(
         send_weekly_summary,
-        "cron",
-        day_of_week="mon",  # Run every Monday
+        day_of_week=0,  # Run every Monday
         hour=8,  # at 8 AM UTC
         minute=0,
     )
-    scheduler.add_job(
-        compress_ticket_attachments,
-        "cron",
-        hour=4,  # Run at 4 AM daily
-        minute=0,
+    scheduler.add_cron_job(compress_ticket_attachments, hour=4, minute=0)  # Run at 4 AM daily
+    scheduler.add_cron_job(cleanup_ticket_attachments, hour=4, minute=30)  # Run at 4:30 AM daily
+    scheduler.add_cron_job(finalize_usage_stats, hour=0, minute=5)  # Run at 12:05 AM daily
+    scheduler.add_interval_job(
+        rollup_usage_stats,
+        minutes=10,  # Usage stats lag the raw checks by up to 10 minutes
     )
-    scheduler.add_job(
-        cleanup_ticket_attachments,
-        "cron",
-        hour=4,  # Run at 4 AM daily
-        minute=30,
+    scheduler.add_interval_job(
+        expire_temp_tiers,
+        minutes=1,  # A lapsed temp tier is honoured for at most a minute
     )
-    scheduler.add_job(
+    scheduler.add_interval_job(
         publish_scheduled_versions,
-        "interval",
         minutes=5,  # Check every 5 minutes for scheduled versions
     )
     scheduler.start()
     print("[Startup] Scheduler started")
+    request_log_writer.start()
+    version_check_writer.start()
+    api_key_usage_tracker.start()
     
     yield
     
     # Shutdown
     print("[Shutdown] Stopping scheduler...")
-    scheduler.shutdown()
+    await scheduler.shutdown()
+    await request_log_writer.shutdown()
+    await version_check_writer.shutdown()
+    await api_key_usage_tracker.shutdown()
+    await PayPalService.close()
+    await WebhookService.close()
+    if app.state.redis_pool is not None:
+        print("[Shutdown] Closing Redis connections...")
+        await app.state.redis_pool.disconnect()
     print("[Shutdown] Closing database connections...")
     await engine.dispose()
+    teardown_logging()
 
 
 # Create FastAPI app
@@ -211,6 +377,7 @@ app = FastAPI(
     docs_url="/docs" if settings.environment != "production" else None,
     redoc_url="/redoc" if settings.environment != "production" else None,
     openapi_url="/openapi.json",  # Always available for frontend ReDoc
+    default_response_class=ORJSONResponse,
     lifespan=lifespan,
 )
 
@@ -234,51 +401,17 @@ app.add_middleware(
 # Exception handlers
 @app.exception_handler(PlexAddonsException)
 async def plexaddons_exception_handler(request: Request, exc: PlexAddonsException):
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={"detail": exc.detail},
         headers=getattr(exc, "headers", None),
     )
 
 
-# Add rate limit headers to responses
-@app.middleware("http")
-async def add_rate_limit_headers(request: Request, call_next):
-    response = await call_next(request)
-    
-    # Add rate limit headers if available
-    if hasattr(request.state, "rate_limit_headers"):
-        for key, value in request.state.rate_limit_headers.items():
-            response.headers[key] = value
-    
-    return response
-
-
-# Security headers middleware
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    response = await call_next(request)
-    
-    # Prevent clickjacking
-    response.headers["X-Frame-Options"] = "DENY"
-    
-    # Prevent MIME type sniffing
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    
-    # XSS Protection (legacy but still useful)
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    
-    # Referrer policy
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    
-    # Permissions policy (disable unnecessary browser features)
-    response.headers["Permissions-Policy"] = "geolocation=(), microphone=(), camera=()"
-
-    # HSTS - enforce HTTPS in production
-    if settings.environment == "production":
-        response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-
-    return response
+# Rate limit and security headers (pure ASGI; security headers outermost)
+app.add_middleware(RequestLogMiddleware)
+app.add_middleware(RateLimitHeaderMiddleware)
+app.add_middleware(SecurityHeadersMiddleware)
 
 
 # Include routers
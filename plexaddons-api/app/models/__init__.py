@@ -1,10 +1,17 @@
-from sqlalchemy import Column, Integer, String, Boolean, BigInteger, Text, DateTime, ForeignKey, Date, Index, Enum as SQLEnum, JSON
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy import DDL, event, FetchedValue, MetaData, Table, Column, Integer, SmallInteger, String, Boolean, BigInteger, LargeBinary, Text, DateTime, ForeignKey, Date, Index, CheckConstraint, Enum as SQLEnum
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+from sqlalchemy.orm import backref, relationship, deferred
+from sqlalchemy.sql import func, text
+from sqlalchemy.types import TypeDecorator
 from app.database import Base
 import enum
 
 
+# Shared server defaults for timestamp and date columns
+_NOW = func.now()
+_TODAY = func.current_date()
+
+
 class SubscriptionTier(str, enum.Enum):
     FREE = "free"
     PRO = "pro"
@@ -88,34 +95,103 @@ class TicketCategory(str, enum.Enum):
     BUG_REPORT = "bug_report"
 
 
-class SubscriptionStatus(str, enum.Enum):
-    ACTIVE = "active"
-    PAST_DUE = "past_due"
-    CANCELED = "canceled"
-    UNPAID = "unpaid"
-    TRIALING = "trialing"
-    PAUSED = "paused"
-    INCOMPLETE = "incomplete"
-    INCOMPLETE_EXPIRED = "incomplete_expired"
+class SmallIntEnum(TypeDecorator):
+    """
+    Store a Python enum as a 2-byte SMALLINT holding the member's position.
+    
+    Positions follow declaration order, so ORDER BY sorts the same way a PG
+    enum would. Only ever append new members; reordering changes stored data.
+    """
+    impl = SmallInteger
+    cache_ok = True
+    
+    def __init__(self, enum_class):
+        super().__init__()
+        self.enum_class = enum_class
+        self._members = list(enum_class)
+        # Keyed by member and by raw value, so binds are a single dict lookup
+        self._codes = {member: code for code, member in enumerate(self._members)}
+        self._codes.update({member.value: code for member, code in list(self._codes.items())})
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return self._codes[value]
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self._members[value]
+    
+    @property
+    def python_type(self):
+        return self.enum_class
+
+
+class DiscordSnowflake(TypeDecorator):
+    """
+    A Discord ID stored as BIGINT (8 bytes instead of a varchar).
+    
+    Python code and the API keep handling it as a string, since snowflakes
+    overflow JavaScript numbers. Validate untrusted input with
+    app.utils.is_discord_id before binding it.
+    """
+    impl = BigInteger
+    cache_ok = True
+    
+    def process_bind_param(self, value, dialect):
+        return int(value) if value is not None else None
+    
+    def process_result_value(self, value, dialect):
+        return str(value) if value is not None else None
+
+
+def _values_enum(enum_class) -> SQLEnum:
+    """
+    A str enum stored as VARCHAR holding the member values.
+    
+    The values are what the Python enums already carry, so plain strings
+    (e.g. "active") bind as-is. Columns get their CHECK from enum_check().
+    """
+    return SQLEnum(
+        enum_class,
+        native_enum=False,
+        create_constraint=False,
+        length=20,
+        values_callable=lambda members: [member.value for member in members],
+    )
 
 
-class PaymentProvider(str, enum.Enum):
-    STRIPE = "stripe"
-    PAYPAL = "paypal"
+def enum_check(table: str, column: str, enum_class) -> CheckConstraint:
+    """CHECK constraint limiting a VARCHAR enum column to the enum's values."""
+    values = ", ".join(f"'{member.value}'" for member in enum_class)
+    return CheckConstraint(f"{column} IN ({values})", name=f"ck_{table}_{column}")
+
+
+# Column types shared by every column of the same enum, so they compile once
+# and share one cache key
+TIER_ENUM = _values_enum(SubscriptionTier)
+PROVIDER_ENUM = _values_enum(PaymentProvider)
+SUBSCRIPTION_STATUS_ENUM = _values_enum(SubscriptionStatus)
+ORGANIZATION_ROLE_ENUM = _values_enum(OrganizationRole)
+# Ticket enums are stored as SMALLINT codes (half the width of a PG enum)
+TICKET_CATEGORY_ENUM = SmallIntEnum(TicketCategory)
+TICKET_PRIORITY_ENUM = SmallIntEnum(TicketPriority)
+TICKET_STATUS_ENUM = SmallIntEnum(TicketStatus)
 
 
 class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
-    discord_id = Column(String(20), unique=True, nullable=False, index=True)
+    discord_id = Column(DiscordSnowflake, unique=True, nullable=False, index=True)
     discord_username = Column(String(100), nullable=False)
     discord_avatar = Column(String(255), nullable=True)
     email = Column(String(255), nullable=True, index=True)
     
     # Subscription tier (denormalized for quick access)
     subscription_tier = Column(
-        SQLEnum(SubscriptionTier),
+        TIER_ENUM,
         default=SubscriptionTier.FREE,
         nullable=False
     )
@@ -129,7 +205,7 @@ class User(Base):
     
     # ============== PROFILE FIELDS ==============
     # Basic profile info
-    bio = Column(Text, nullable=True)  # Max 500 chars enforced at API level
+    bio = Column(String(500), nullable=True)  # ProfileUpdate allows 500 chars too
     website = Column(String(500), nullable=True)
     github_username = Column(String(100), nullable=True)
     twitter_username = Column(String(100), nullable=True)
@@ -142,44 +218,71 @@ class User(Base):
     show_addons = Column(Boolean, default=True)
     
     # Badges (JSON array of badge IDs)
-    badges = Column(Text, nullable=True)  # e.g., '["pro", "early_adopter", "addon_creator"]'
+    badges = Column(JSONB, nullable=True)  # e.g., ["pro", "early_adopter", "addon_creator"]
     
     # Profile customization (tier-locked)
     banner_url = Column(String(500), nullable=True)  # Pro+ only
     accent_color = Column(String(7), nullable=True)  # Premium only, hex color e.g., "#e9a426"
     
     # ============== API KEY (Premium only) ==============
-    api_key = Column(String(67), unique=True, nullable=True, index=True)  # pa_ + 64 hex chars
+    api_key = Column(String(67), unique=True, nullable=True, index=True)  # pa_ + 43 urlsafe chars (legacy keys: 64 hex)
+    api_key_masked = Column(String(20), nullable=True)  # pa_xxx...xxxx, precomputed for display
     api_key_created_at = Column(DateTime(timezone=True), nullable=True)
     
     # ============== WEBHOOK NOTIFICATIONS (Premium only) ==============
     webhook_url = Column(String(500), nullable=True)  # URL to send notifications to
     webhook_secret = Column(String(64), nullable=True)  # Secret for signing webhook payloads
+    webhook_secret_masked = Column(String(20), nullable=True)  # wh_xxxx...xxxx, precomputed for display
     webhook_enabled = Column(Boolean, default=False)  # Whether webhooks are active
     
     # ============== TEMPORARY TIER (Admin-granted) ==============
     # When set, this overrides subscription_tier until expiration
-    temp_tier = Column(SQLEnum(SubscriptionTier), nullable=True)
+    temp_tier = Column(TIER_ENUM, nullable=True)
     temp_tier_expires_at = Column(DateTime(timezone=True), nullable=True)
     temp_tier_granted_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     temp_tier_granted_at = Column(DateTime(timezone=True), nullable=True)
     temp_tier_reason = Column(String(500), nullable=True)  # Why was temp tier granted
+    # temp_tier while it is active, else subscription_tier; set by a trigger
+    # (models/tier_triggers.py), read this instead of comparing the columns
+    effective_tier = Column(TIER_ENUM, nullable=False, server_default=FetchedValue(), server_onupdate=FetchedValue())
     
-    # OAuth tokens (should be encrypted in production)
-    discord_access_token = Column(Text, nullable=True)
-    discord_refresh_token = Column(Text, nullable=True)
+    # The OAuth tokens themselves live in user_tokens; the expiry stays here
+    # so the refresh check doesn't need them
     discord_token_expires_at = Column(DateTime(timezone=True), nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=_NOW)
+    updated_at = Column(DateTime(timezone=True), server_default=_NOW, server_onupdate=FetchedValue())
     last_login_at = Column(DateTime(timezone=True), nullable=True)
     
-    # Relationships
-    subscriptions = relationship("Subscription", back_populates="user", cascade="all, delete-orphan")
-    addons = relationship("Addon", back_populates="owner", cascade="all, delete-orphan")
-    owned_organizations = relationship("Organization", back_populates="owner", foreign_keys="Organization.owner_id")
-    organization_memberships = relationship("OrganizationMember", back_populates="user", foreign_keys="OrganizationMember.user_id")
+    # Relationships never lazy-load: load them with selectinload() where they are read,
+    # so a missed one fails loudly instead of issuing one query per row
+    subscriptions = relationship("Subscription", back_populates="user", cascade="all, delete-orphan", lazy="raise_on_sql")
+    addons = relationship("Addon", back_populates="owner", cascade="all, delete-orphan", lazy="raise_on_sql")
+    owned_organizations = relationship("Organization", back_populates="owner", foreign_keys="Organization.owner_id", lazy="raise_on_sql")
+    organization_memberships = relationship("OrganizationMember", back_populates="user", foreign_keys="OrganizationMember.user_id", lazy="raise_on_sql")
+    tokens = relationship("UserTokens", uselist=False, cascade="all, delete-orphan", passive_deletes=True, lazy="raise_on_sql")
+    
+    __table_args__ = (
+        # Partial index for the last-admin guard (admins are a tiny subset)
+        Index("ix_users_admin", "id", postgresql_where=(is_admin == True)),
+        enum_check("users", "subscription_tier", SubscriptionTier),
+        enum_check("users", "temp_tier", SubscriptionTier),
+        enum_check("users", "effective_tier", SubscriptionTier),
+    )
+    
+    # Fetch trigger-maintained columns (effective_tier, updated_at) with
+    # RETURNING on flush rather than expiring them
+    __mapper_args__ = {"eager_defaults": True}
+
+
+class UserTokens(Base):
+    """Encrypted Discord OAuth tokens, kept off the hot users row; only the auth flow reads them"""
+    __tablename__ = "user_tokens"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    discord_access_token = Column(Text, nullable=True)
+    discord_refresh_token = Column(Text, nullable=True)
 
 
 class Subscription(Base):
@@ -189,29 +292,38 @@ class Subscription(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Provider info
-    provider = Column(SQLEnum(PaymentProvider), nullable=False)
+    provider = Column(PROVIDER_ENUM, nullable=False)
     provider_subscription_id = Column(String(255), nullable=False)
     provider_customer_id = Column(String(255), nullable=True)
     
     # Plan details
-    tier = Column(SQLEnum(SubscriptionTier), nullable=False)
+    tier = Column(TIER_ENUM, nullable=False)
     
     # Status tracking
-    status = Column(SQLEnum(SubscriptionStatus), nullable=False, index=True)
+    status = Column(SUBSCRIPTION_STATUS_ENUM, nullable=False, index=True)
     
     # Dates
     current_period_start = Column(DateTime(timezone=True), nullable=True)
     current_period_end = Column(DateTime(timezone=True), nullable=True)
     canceled_at = Column(DateTime(timezone=True), nullable=True)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=_NOW)
+    updated_at = Column(DateTime(timezone=True), server_default=_NOW, server_onupdate=FetchedValue())
     
     # Relationships
-    user = relationship("User", back_populates="subscriptions")
+    user = relationship("User", back_populates="subscriptions", lazy="raise_on_sql")
     
     __table_args__ = (
         Index("idx_subscriptions_provider_id", "provider", "provider_subscription_id", unique=True),
+        # Partial index for "current subscription of a user" lookups
+        Index(
+            "ix_sub_user_status_created",
+            "user_id", "status", created_at.desc(),
+            postgresql_where=text("status IN ('active', 'trialing', 'past_due')"),
+        ),
+        enum_check("subscriptions", "provider", PaymentProvider),
+        enum_check("subscriptions", "tier", SubscriptionTier),
+        enum_check("subscriptions", "status", SubscriptionStatus),
     )
 
 
@@ -230,24 +342,26 @@ class Addon(Base):
     description = Column(Text, nullable=True)
     homepage = Column(String(500), nullable=True)
     external = Column(Boolean, default=False)  # true = free community addon
-    tags = Column(JSON, default=list)  # List of AddonTag values
+    tags = Column(ARRAY(String(32)), default=list)  # List of AddonTag values
     
     # Status
     is_active = Column(Boolean, default=True)
-    is_public = Column(Boolean, default=True, index=True)
+    is_public = Column(Boolean, default=True)
     verified = Column(Boolean, default=False, index=True)  # Verified by PlexDevelopment team
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=_NOW)
+    updated_at = Column(DateTime(timezone=True), server_default=_NOW, server_onupdate=FetchedValue())
     
     # Relationships
-    owner = relationship("User", back_populates="addons")
-    organization = relationship("Organization", back_populates="addons")
-    versions = relationship("Version", back_populates="addon", cascade="all, delete-orphan", order_by="desc(Version.release_date)")
+    owner = relationship("User", back_populates="addons", lazy="raise_on_sql")
+    organization = relationship("Organization", back_populates="addons", lazy="raise_on_sql")
+    versions = relationship("Version", back_populates="addon", cascade="all, delete-orphan", order_by="desc(Version.release_date)", lazy="raise_on_sql")
     
     __table_args__ = (
         Index("idx_addons_owner_name", "owner_id", "name", unique=True),
         Index("idx_addons_organization", "organization_id"),
+        # Public listings only ever want active public addons
+        Index("idx_addons_public_active", "slug", postgresql_where=text("is_public = true AND is_active = true")),
     )
 
 
@@ -259,7 +373,7 @@ class Version(Base):
     
     # Version info
     version = Column(String(50), nullable=False)  # semver: "1.3.2"
-    release_date = Column(Date, nullable=False, server_default=func.current_date())
+    release_date = Column(Date, nullable=False, server_default=_TODAY)
     
     # Download & URLs
     download_url = Column(String(500), nullable=False)
@@ -267,7 +381,7 @@ class Version(Base):
     
     # Content
     description = Column(Text, nullable=True)
-    changelog_content = Column(Text, nullable=True)  # Full changelog for quota calculation
+    changelog_content = deferred(Column(Text, nullable=True), group="content")  # Full changelog for quota calculation
     
     # Flags
     breaking = Column(Boolean, default=False)
@@ -283,15 +397,22 @@ class Version(Base):
     # Premium Feature: A/B Rollouts
     rollout_percentage = Column(Integer, default=100)  # 0-100, percentage of users who see this version
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=_NOW)
     
     # Relationships
-    addon = relationship("Addon", back_populates="versions")
+    addon = relationship("Addon", back_populates="versions", lazy="raise_on_sql")
     
     __table_args__ = (
         Index("idx_versions_addon_version", "addon_id", "version", unique=True),
-        Index("idx_versions_release_date", "release_date"),
-        Index("idx_versions_scheduled_release", "scheduled_release_at"),
+        # Matches the per-addon "latest first" ordering, so no sort step is needed;
+        # INCLUDE lets the latest-version summary be an index-only scan
+        Index(
+            "idx_versions_latest_covering",
+            "addon_id", release_date.desc(), created_at.desc(),
+            postgresql_include=["version"],
+        ),
+        # Only pending versions are ever looked up by release time (scheduler)
+        Index("ix_versions_sched", "scheduled_release_at", postgresql_where=(is_published == False)),
     )
 
 
@@ -303,19 +424,53 @@ class AdminAuditLog(Base):
     
     # Action details
     action = Column(String(100), nullable=False)  # e.g., "promote_admin", "demote_admin", "delete_addon"
-    target_type = Column(String(50), nullable=True)  # e.g., "user", "addon", "subscription"
-    target_id = Column(Integer, nullable=True)
+    
+    # At most one target per entry. No foreign keys: entries must outlive
+    # their target (deletions are logged after the row is gone).
+    target_user_id = Column(Integer, nullable=True, index=True)
+    target_addon_id = Column(Integer, nullable=True, index=True)
+    target_version_id = Column(Integer, nullable=True, index=True)
+    target_ticket_id = Column(Integer, nullable=True, index=True)
+    target_canned_response_id = Column(Integer, nullable=True, index=True)
     
     # Additional context
-    details = Column(Text, nullable=True)  # JSON string with additional details
+    details = Column(JSONB, nullable=True)  # Additional details
     ip_address = Column(String(45), nullable=True)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
-    
+    # B-tree rather than BRIN: the audit log page sorts on it with a LIMIT
+    created_at = Column(DateTime(timezone=True), server_default=_NOW, index=True)
+
     __table_args__ = (
-        # Index for efficient 90-day cleanup
-        Index("idx_audit_log_created_at", "created_at"),
+        CheckConstraint(
+            "num_nonnulls(target_user_id, target_addon_id, target_version_id, "
+            "target_ticket_id, target_canned_response_id) <= 1",
+            name="ck_admin_audit_log_single_target",
+        ),
     )
+    
+    @property
+    def target_type(self):
+        """Name of the target kind (e.g. "addon"), or None."""
+        for target_type, key in AUDIT_TARGET_COLUMNS.items():
+            if getattr(self, key) is not None:
+                return target_type
+        return None
+    
+    @property
+    def target_id(self):
+        """ID of the target row, or None."""
+        target_type = self.target_type
+        return getattr(self, AUDIT_TARGET_COLUMNS[target_type]) if target_type else None
+
+
+# Audit log target kind -> typed target column
+AUDIT_TARGET_COLUMNS = {
+    "user": "target_user_id",
+    "addon": "target_addon_id",
+    "version": "target_version_id",
+    "ticket": "target_ticket_id",
+    "canned_response": "target_canned_response_id",
+}
 
 
 class SubscriptionEvent(Base):
@@ -326,15 +481,22 @@ class SubscriptionEvent(Base):
     subscription_id = Column(Integer, ForeignKey("subscriptions.id", ondelete="SET NULL"), nullable=True)
     
     event_type = Column(String(100), nullable=False)
-    provider = Column(SQLEnum(PaymentProvider), nullable=True)
+    provider = Column(PROVIDER_ENUM, nullable=True)
     provider_event_id = Column(String(255), nullable=True)
-    payload = Column(Text, nullable=True)  # JSON string
+    payload = Column(JSONB, nullable=True)  # Raw provider event
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=_NOW)
     
     __table_args__ = (
+        enum_check("subscription_events", "provider", PaymentProvider),
         Index("idx_subscription_events_user_id", "user_id"),
-        Index("idx_subscription_events_created_at", "created_at"),
+        # Append-only, so rows are physically in created_at order
+        Index(
+            "idx_subscription_events_created_at_brin", "created_at",
+            postgresql_using="brin", postgresql_with={"pages_per_range": 32},
+        ),
+        # Containment (@>) lookups on fields inside the provider payload
+        Index("idx_subscription_events_payload_gin", "payload", postgresql_using="gin"),
     )
 
 
@@ -342,7 +504,8 @@ class ApiRequestLog(Base):
     """Track API requests for analytics and weekly summaries"""
     __tablename__ = "api_request_logs"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Range-partitioned by month on timestamp, so the key has to include it
+    id = Column(Integer, primary_key=True, autoincrement=True)
     
     # Request info
     endpoint = Column(String(255), nullable=False)
@@ -357,11 +520,38 @@ class ApiRequestLog(Base):
     user_agent = Column(String(500), nullable=True)
     
     # Timestamp
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=_NOW)
     
     __table_args__ = (
-        Index("idx_api_request_logs_timestamp", "timestamp"),
+        # Only range-scanned (summaries, retention) and physically in insert order
+        Index(
+            "idx_api_request_logs_timestamp_brin", "timestamp",
+            postgresql_using="brin", postgresql_with={"pages_per_range": 32},
+        ),
         Index("idx_api_request_logs_endpoint", "endpoint"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
+    )
+
+
+class ApiRequestCounter(Base):
+    """Per-minute request counts by endpoint; api_request_logs only keeps a sample"""
+    __tablename__ = "api_request_counters"
+
+    id = Column(Integer, primary_key=True)
+    endpoint = Column(String(255), nullable=False)
+    method = Column(String(10), nullable=False)
+    status_code = Column(SmallInteger, nullable=False)
+    bucket_minute = Column(DateTime(timezone=True), nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        # Conflict target for the batched upserts
+        Index(
+            "uq_api_request_counters_key",
+            "endpoint", "method", "status_code", "bucket_minute",
+            unique=True,
+        ),
+        Index("idx_api_request_counters_bucket", "bucket_minute"),
     )
 
 
@@ -376,28 +566,42 @@ class Ticket(Base):
     
     # Ticket details
     subject = Column(String(255), nullable=False)
-    category = Column(SQLEnum(TicketCategory), default=TicketCategory.GENERAL, nullable=False)
-    priority = Column(SQLEnum(TicketPriority), default=TicketPriority.LOW, nullable=False)
-    status = Column(SQLEnum(TicketStatus), default=TicketStatus.OPEN, nullable=False, index=True)
+    category = Column(TICKET_CATEGORY_ENUM, default=TicketCategory.GENERAL, nullable=False)
+    priority = Column(TICKET_PRIORITY_ENUM, default=TicketPriority.LOW, nullable=False)
+    status = Column(TICKET_STATUS_ENUM, default=TicketStatus.OPEN, nullable=False)
     
     # Assignment
     assigned_admin_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=_NOW)
+    updated_at = Column(DateTime(timezone=True), server_default=_NOW, server_onupdate=FetchedValue())
     resolved_at = Column(DateTime(timezone=True), nullable=True)
     closed_at = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships
-    user = relationship("User", foreign_keys=[user_id], backref="tickets")
-    assigned_admin = relationship("User", foreign_keys=[assigned_admin_id])
-    messages = relationship("TicketMessage", back_populates="ticket", cascade="all, delete-orphan", order_by="TicketMessage.created_at")
+    user = relationship("User", foreign_keys=[user_id], backref=backref("tickets", lazy="raise_on_sql"), lazy="raise_on_sql")
+    assigned_admin = relationship("User", foreign_keys=[assigned_admin_id], lazy="raise_on_sql")
+    messages = relationship("TicketMessage", back_populates="ticket", cascade="all, delete-orphan", order_by="TicketMessage.created_at", lazy="raise_on_sql")
     
     __table_args__ = (
         Index("idx_tickets_user_id", "user_id"),
-        Index("idx_tickets_status", "status"),
-        Index("idx_tickets_priority", "priority"),
+        # Status filters ordered by age; also covers status-only lookups
+        Index("idx_tickets_status_created_at", "status", "created_at"),
+        # Only assigned tickets are looked up by admin
+        Index(
+            "idx_tickets_assigned_status", "assigned_admin_id", "status",
+            postgresql_where=text("assigned_admin_id IS NOT NULL"),
+        ),
+        # Active (OPEN = 0, IN_PROGRESS = 1) tickets are a small slice of the table
+        Index("idx_tickets_open", "created_at", postgresql_where=text("status IN (0, 1)")),
+        Index(
+            "idx_tickets_unassigned", "priority",
+            postgresql_where=text("assigned_admin_id IS NULL AND status IN (0, 1)"),
+        ),
+        # Admin list order (priority DESC, updated_at DESC), unfiltered and by status
+        Index("idx_tickets_priority_updated_at", "priority", "updated_at"),
+        Index("idx_tickets_status_priority_updated_at", "status", "priority", "updated_at"),
         Index("idx_tickets_created_at", "created_at"),
     )
 
@@ -416,48 +620,70 @@ class TicketMessage(Base):
     is_system_message = Column(Boolean, default=False)  # Auto-generated messages (welcome, status changes)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=_NOW)
     edited_at = Column(DateTime(timezone=True), nullable=True)
     
     # Relationships
-    ticket = relationship("Ticket", back_populates="messages")
-    author = relationship("User")
-    attachments = relationship("TicketAttachment", back_populates="message", cascade="all, delete-orphan")
+    ticket = relationship("Ticket", back_populates="messages", lazy="raise_on_sql")
+    author = relationship("User", lazy="raise_on_sql")
+    # Every message read renders its attachments, so batch them in with the message load
+    attachments = relationship("TicketAttachment", back_populates="message", cascade="all, delete-orphan", lazy="selectin")
     
     __table_args__ = (
-        Index("idx_ticket_messages_ticket_id", "ticket_id"),
-        Index("idx_ticket_messages_created_at", "created_at"),
+        # Matches the messages relationship's ORDER BY created_at per ticket,
+        # so loading a thread needs no sort step
+        Index("idx_ticket_messages_ticket_created", "ticket_id", "created_at"),
     )
 
 
+class AttachmentBlob(Base):
+    """Stored file content, shared by every attachment with the same bytes"""
+    __tablename__ = "attachment_blobs"
+
+    content_hash = Column(String(64), primary_key=True)  # SHA-256 hex of the original content
+    storage_path = Column(String(500), nullable=False)  # Path on filesystem
+    file_size = Column(BigInteger, nullable=False)  # Original size in bytes
+    compressed_size = Column(BigInteger, nullable=True)  # Size after LZMA compression
+    
+    # Compression status
+    is_compressed = Column(Boolean, default=False)
+    compressed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=_NOW)
+
+
 class TicketAttachment(Base):
     """File attachments for ticket messages"""
     __tablename__ = "ticket_attachments"
 
     id = Column(Integer, primary_key=True, index=True)
     message_id = Column(Integer, ForeignKey("ticket_messages.id", ondelete="CASCADE"), nullable=False)
+    content_hash = Column(String(64), ForeignKey("attachment_blobs.content_hash"), nullable=False, index=True)
     
     # File info
-    file_path = Column(String(500), nullable=False)  # Path on filesystem
     original_filename = Column(String(255), nullable=False)
-    file_size = Column(BigInteger, nullable=False)  # Original size in bytes
-    compressed_size = Column(BigInteger, nullable=True)  # Size after LZMA compression
+    file_size = Column(BigInteger, nullable=False)  # Counted against the ticket owner's storage
     mime_type = Column(String(100), nullable=True)
     
-    # Compression status
-    is_compressed = Column(Boolean, default=False)
-    compressed_at = Column(DateTime(timezone=True), nullable=True)
-    
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=_NOW)
     
     # Relationships
-    message = relationship("TicketMessage", back_populates="attachments")
+    message = relationship("TicketMessage", back_populates="attachments", lazy="raise_on_sql")
+    blob = relationship("AttachmentBlob", lazy="joined")
     
     __table_args__ = (
         Index("idx_ticket_attachments_message_id", "message_id"),
         Index("idx_ticket_attachments_created_at", "created_at"),
     )
+    
+    @property
+    def is_compressed(self) -> bool:
+        return bool(self.blob.is_compressed)
+    
+    @property
+    def compressed_size(self):
+        return self.blob.compressed_size
 
 
 class CannedResponse(Base):
@@ -469,7 +695,7 @@ class CannedResponse(Base):
     # Response details
     title = Column(String(100), nullable=False)
     content = Column(Text, nullable=False)
-    category = Column(SQLEnum(TicketCategory), nullable=True)  # Optional: suggest based on ticket category
+    category = Column(TICKET_CATEGORY_ENUM, nullable=True)  # Optional: suggest based on ticket category
     
     # Metadata
     created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
@@ -479,11 +705,11 @@ class CannedResponse(Base):
     is_active = Column(Boolean, default=True)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=_NOW)
+    updated_at = Column(DateTime(timezone=True), server_default=_NOW, server_onupdate=FetchedValue())
     
     # Relationships
-    creator = relationship("User")
+    creator = relationship("User", lazy="raise_on_sql")
     
     __table_args__ = (
         Index("idx_canned_responses_category", "category"),
@@ -496,7 +722,8 @@ class VersionCheck(Base):
     """Raw version check logs for analytics"""
     __tablename__ = "version_checks"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Range-partitioned by month on timestamp, so the key has to include it
+    id = Column(Integer, primary_key=True, autoincrement=True)
     addon_id = Column(Integer, ForeignKey("addons.id", ondelete="CASCADE"), nullable=False)
     version_id = Column(Integer, ForeignKey("versions.id", ondelete="SET NULL"), nullable=True)
     
@@ -507,12 +734,14 @@ class VersionCheck(Base):
     client_ip_hash = Column(String(64), nullable=True)
     
     # Timestamp
-    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    timestamp = Column(DateTime(timezone=True), primary_key=True, server_default=_NOW)
     
     __table_args__ = (
-        Index("idx_version_checks_addon_id", "addon_id"),
+        # Daily aggregation scans all addons by time
         Index("idx_version_checks_timestamp", "timestamp"),
+        # Also serves addon_id-only lookups
         Index("idx_version_checks_addon_timestamp", "addon_id", "timestamp"),
+        {"postgresql_partition_by": "RANGE (timestamp)"},
     )
 
 
@@ -532,12 +761,52 @@ class AddonUsageStats(Base):
     unique_users = Column(Integer, default=0)  # Unique IP hashes
     
     # Relationships
-    addon = relationship("Addon")
-    version = relationship("Version")
+    addon = relationship("Addon", lazy="raise_on_sql")
+    version = relationship("Version", lazy="raise_on_sql")
     
     __table_args__ = (
         Index("idx_addon_usage_stats_addon_date", "addon_id", "date"),
-        Index("idx_addon_usage_stats_addon_version_date", "addon_id", "version_id", "date", unique=True),
+        # Conflict target of the daily rollup; NULL version_ids must collide too
+        Index(
+            "idx_addon_usage_stats_addon_version_date",
+            "addon_id", "version_id", "date",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+
+
+# Weekly totals for the analytics dashboard, precomputed instead of summed
+# from addon_usage_stats on every load. Installed by migration 037 and, for
+# create_all databases, by the listener at the bottom of this module;
+# finalize_usage_stats refreshes it nightly.
+ADDON_WEEKLY_STATS_VIEW_DDL = [
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS addon_weekly_stats AS
+    SELECT addon_id,
+           date_trunc('week', date)::date AS week,
+           sum(check_count) AS check_count,
+           sum(unique_users) AS unique_users
+    FROM addon_usage_stats
+    GROUP BY addon_id, date_trunc('week', date)::date
+    WITH DATA
+    """,
+    # REFRESH ... CONCURRENTLY needs a unique index
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_addon_weekly_stats_addon_week "
+    "ON addon_weekly_stats (addon_id, week)",
+]
+
+
+class AddonWeeklyStats(Base):
+    """Weekly usage totals per addon (read-only materialized view)"""
+    # Own MetaData so create_all never creates it as a plain table
+    __table__ = Table(
+        "addon_weekly_stats",
+        MetaData(),
+        Column("addon_id", Integer, primary_key=True),
+        Column("week", Date, primary_key=True),  # Monday the week starts on
+        Column("check_count", BigInteger),
+        Column("unique_users", BigInteger),  # Sum of daily unique users
     )
 
 
@@ -558,13 +827,13 @@ class Organization(Base):
     # Avatar/branding
     avatar_url = Column(String(500), nullable=True)
     
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=_NOW)
+    updated_at = Column(DateTime(timezone=True), server_default=_NOW, server_onupdate=FetchedValue())
     
     # Relationships
-    owner = relationship("User", back_populates="owned_organizations", foreign_keys=[owner_id])
-    members = relationship("OrganizationMember", back_populates="organization", cascade="all, delete-orphan")
-    addons = relationship("Addon", back_populates="organization")
+    owner = relationship("User", back_populates="owned_organizations", foreign_keys=[owner_id], lazy="raise_on_sql")
+    members = relationship("OrganizationMember", back_populates="organization", cascade="all, delete-orphan", lazy="raise_on_sql")
+    addons = relationship("Addon", back_populates="organization", lazy="raise_on_sql")
     
     __table_args__ = (
         Index("idx_organizations_owner", "owner_id"),
@@ -580,20 +849,21 @@ class OrganizationMember(Base):
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
     
     # Role
-    role = Column(SQLEnum(OrganizationRole), default=OrganizationRole.MEMBER, nullable=False)
+    role = Column(ORGANIZATION_ROLE_ENUM, default=OrganizationRole.MEMBER, nullable=False)
     
     # Invitation tracking
     invited_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
-    joined_at = Column(DateTime(timezone=True), server_default=func.now())
+    joined_at = Column(DateTime(timezone=True), server_default=_NOW)
     
     # Relationships
-    organization = relationship("Organization", back_populates="members")
-    user = relationship("User", back_populates="organization_memberships", foreign_keys=[user_id])
-    invited_by = relationship("User", foreign_keys=[invited_by_id])
+    organization = relationship("Organization", back_populates="members", lazy="raise_on_sql")
+    user = relationship("User", back_populates="organization_memberships", foreign_keys=[user_id], lazy="raise_on_sql")
+    invited_by = relationship("User", foreign_keys=[invited_by_id], lazy="raise_on_sql")
     
     __table_args__ = (
         Index("idx_org_members_org_user", "organization_id", "user_id", unique=True),
         Index("idx_org_members_user", "user_id"),
+        enum_check("organization_members", "role", OrganizationRole),
     )
 
 
@@ -608,11 +878,11 @@ class ApiKey(Base):
     
     # Key identification
     name = Column(String(100), nullable=False)  # User-friendly name
-    key_prefix = Column(String(10), nullable=False)  # First 8 chars for identification (pa_xxxx)
-    key_hash = Column(String(128), nullable=False, unique=True)  # SHA-256 hash of full key
+    key_prefix = Column(String(10), nullable=False)  # First 10 chars, for identification and lookup (pa_xxxxxxx)
+    key_hash = Column(LargeBinary(32), nullable=False)  # Raw SHA-256 digest of full key
     
-    # Permissions - stored as JSON array of ApiKeyScope values
-    scopes = Column(JSON, nullable=False, default=list)  # ["addons:read", "versions:write"]
+    # Permissions - stored as an array of ApiKeyScope values
+    scopes = Column(ARRAY(String(32)), nullable=False, default=list)  # ["addons:read", "versions:write"]
     
     # Usage tracking
     last_used_at = Column(DateTime(timezone=True), nullable=True)
@@ -623,16 +893,36 @@ class ApiKey(Base):
     expires_at = Column(DateTime(timezone=True), nullable=True)
     
     # Status
-    is_active = Column(Boolean, default=True, index=True)
+    is_active = Column(Boolean, default=True)
     revoked_at = Column(DateTime(timezone=True), nullable=True)
     
     # Timestamps
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=_NOW)
     
     # Relationships
-    user = relationship("User", backref="api_keys")
+    user = relationship("User", backref=backref("api_keys", lazy="raise_on_sql"), lazy="raise_on_sql")
     
     __table_args__ = (
-        Index("idx_api_keys_user_id", "user_id"),
-        Index("idx_api_keys_key_hash", "key_hash"),
+        # Key listing by user, and the active-key count
+        Index("idx_api_keys_user_active", "user_id", "is_active"),
+        # Authentication looks up active keys by their 10-char prefix and
+        # compares key_hash in Python; prefixes may repeat, so not unique
+        Index("idx_api_keys_prefix_active", "key_prefix", postgresql_where=(is_active == True)),
     )
+
+
+# Storage accounting triggers; migrations install them too, this covers create_all
+from app.models.storage_triggers import STORAGE_TRIGGER_DDL
+from app.models.timestamp_triggers import UPDATED_AT_TRIGGER_DDL
+from app.models.tier_triggers import EFFECTIVE_TIER_TRIGGER_DDL
+
+for _statement in (
+    STORAGE_TRIGGER_DDL + UPDATED_AT_TRIGGER_DDL + EFFECTIVE_TIER_TRIGGER_DDL + ADDON_WEEKLY_STATS_VIEW_DDL
+):
+    event.listen(Base.metadata, "after_create", DDL(_statement))
+
+# Vacuum versions often enough to keep its visibility map current for index-only scans
+event.listen(
+    Version.__table__, "after_create",
+    DDL("ALTER TABLE versions SET (autovacuum_vacuum_scale_factor = 0.02)"),
+)
@@ -0,0 +1,30 @@
+"""
+Postgres trigger that maintains users.effective_tier.
+
+A generated column cannot depend on now(), so a BEFORE INSERT/UPDATE trigger
+resolves temp_tier against subscription_tier whenever either changes. The
+expire_temp_tiers job clears temp tiers once they lapse, which fires the
+trigger again and drops the user back to their paid tier.
+
+Installed by migration 030 and, for create_all databases, by models/__init__.
+"""
+
+EFFECTIVE_TIER_TRIGGER_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION set_effective_tier() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF NEW.temp_tier IS NOT NULL AND NEW.temp_tier_expires_at > now() THEN
+            NEW.effective_tier = NEW.temp_tier;
+        ELSE
+            NEW.effective_tier = NEW.subscription_tier;
+        END IF;
+        RETURN NEW;
+    END
+    $$
+    """,
+    "DROP TRIGGER IF EXISTS users_set_effective_tier ON users",
+    "CREATE TRIGGER users_set_effective_tier "
+    "BEFORE INSERT OR UPDATE OF subscription_tier, temp_tier, temp_tier_expires_at ON users "
+    "FOR EACH ROW EXECUTE FUNCTION set_effective_tier()",
+]
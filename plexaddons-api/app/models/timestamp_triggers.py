@@ -0,0 +1,32 @@
+"""
+Postgres trigger that maintains updated_at.
+
+A BEFORE UPDATE trigger stamps now() on every row update, so the ORM no
+longer sends updated_at with each UPDATE. An explicit assignment (the
+column changed in the statement) is kept.
+
+Installed by migration 021 and, for create_all databases, by models/__init__.
+"""
+
+# Tables with an updated_at column
+UPDATED_AT_TABLES = ["users", "subscriptions", "addons", "tickets", "canned_responses", "organizations"]
+
+UPDATED_AT_TRIGGER_DDL = [
+    """
+    CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger
+    LANGUAGE plpgsql AS $$
+    BEGIN
+        IF NEW.updated_at IS NOT DISTINCT FROM OLD.updated_at THEN
+            NEW.updated_at = now();
+        END IF;
+        RETURN NEW;
+    END
+    $$
+    """,
+]
+for _table in UPDATED_AT_TABLES:
+    UPDATED_AT_TRIGGER_DDL += [
+        f"DROP TRIGGER IF EXISTS {_table}_set_updated_at ON {_table}",
+        f"CREATE TRIGGER {_table}_set_updated_at BEFORE UPDATE ON {_table} "
+        "FOR EACH ROW EXECUTE FUNCTION set_updated_at()",
+    ]
@@ -1,13 +1,69 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional, List
+from pydantic import AfterValidator, BaseModel, ConfigDict, Field, field_validator
+from typing import Annotated, Any, ClassVar, Dict, Optional, List, Tuple
 from datetime import datetime, date
-import json
+import re
 from app.models import (
     SubscriptionTier, SubscriptionStatus, PaymentProvider,
     TicketStatus, TicketPriority, TicketCategory, AddonTag, OrganizationRole
 )
 
 
+# Shape check only: addresses are just used for notification mail, so the
+# full RFC/IDN validation in email-validator (and its dnspython import) is
+# not worth it
+_email_match = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s]+").fullmatch
+
+
+def _check_email(value: str) -> str:
+    if len(value) > 254 or not _email_match(value):
+        raise ValueError("value is not a valid email address")
+    return value
+
+
+Email = Annotated[str, AfterValidator(_check_email)]
+
+
+class PageMeta(BaseModel):
+    """Pagination fields shared by the paged list responses."""
+    total: int
+    page: int
+    per_page: int
+
+
+class FastFromORM(BaseModel):
+    """Response built from trusted ORM rows without re-validating them."""
+    # Filled per subclass once its fields are known
+    __orm_field_names__: ClassVar[Tuple[str, ...]] = ()
+    __orm_field_defaults__: ClassVar[Dict[str, Any]] = {}
+    
+    @classmethod
+    def __pydantic_init_subclass__(cls, **kwargs):
+        super().__pydantic_init_subclass__(**kwargs)
+        cls.__orm_field_names__ = tuple(cls.model_fields)
+        cls.__orm_field_defaults__ = {
+            name: field.default
+            for name, field in cls.model_fields.items()
+            if not field.is_required() and field.default is not None
+        }
+    
+    @classmethod
+    def from_orm_fast(cls, obj):
+        """
+        Copy the fields straight off a row with model_construct.
+        
+        Nothing is validated, so a NULL in a nullable column whose field
+        has a default gets that default instead of serializing as null.
+        """
+        defaults = cls.__orm_field_defaults__
+        values = {}
+        for name in cls.__orm_field_names__:
+            value = getattr(obj, name)
+            if value is None and name in defaults:
+                value = defaults[name]
+            values[name] = value
+        return cls.model_construct(**values)
+
+
 # ============== Auth Schemas ==============
 
 class DiscordUser(BaseModel):
@@ -34,7 +90,7 @@ class AuthResponse(BaseModel):
 class UserBase(BaseModel):
     discord_username: str
     discord_avatar: Optional[str] = None
-    email: Optional[EmailStr] = None
+    email: Optional[Email] = None
 
 
 class UserResponse(BaseModel):
@@ -67,18 +123,7 @@ class UserResponse(BaseModel):
     temp_tier: Optional[SubscriptionTier] = None
     temp_tier_expires_at: Optional[datetime] = None
 
-    @field_validator('badges', mode='before')
-    @classmethod
-    def parse_badges(cls, v):
-        if isinstance(v, str):
-            try:
-                return json.loads(v)
-            except json.JSONDecodeError:
-                return []
-        return v
-
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class UserStorageResponse(BaseModel):
@@ -90,7 +135,7 @@ class UserStorageResponse(BaseModel):
 
 
 class UserUpdate(BaseModel):
-    email: Optional[EmailStr] = None
+    email: Optional[Email] = None
 
 
 # ============ Profile Schemas ============
@@ -107,6 +152,13 @@ class UserProfileUpdate(BaseModel):
     banner_url: Optional[str] = Field(None, max_length=500)
     accent_color: Optional[str] = Field(None, pattern=r'^#[0-9A-Fa-f]{6}$')  # Hex color
 
+    @field_validator('banner_url')
+    @classmethod
+    def validate_banner_url(cls, v):
+        if v is not None and not v.startswith(("https://", "http://")):
+            raise ValueError("Banner URL must start with https:// or http://")
+        return v
+
 
 class UserPublicProfile(BaseModel):
     """Public profile data for /u/:identifier endpoint"""
@@ -125,29 +177,18 @@ class UserPublicProfile(BaseModel):
     created_at: datetime
     addons: Optional[List["AddonResponse"]] = None  # Only if show_addons=True
     
-    @field_validator('badges', mode='before')
-    @classmethod
-    def parse_badges(cls, v):
-        if isinstance(v, str):
-            try:
-                return json.loads(v)
-            except json.JSONDecodeError:
-                return []
-        return v
-
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 # ============ API Key Schemas ============
 
-class ApiKeyCreate(BaseModel):
+class UserApiKeyCreatedResponse(BaseModel):
     """Response when creating a new API key"""
     api_key: str  # Full key, only shown once
     created_at: datetime
 
 
-class ApiKeyResponse(BaseModel):
+class UserApiKeyResponse(BaseModel):
     """API key info without the actual key"""
     has_api_key: bool
     created_at: Optional[datetime] = None
@@ -162,6 +203,14 @@ class WebhookConfigUpdate(BaseModel):
     webhook_url: Optional[str] = Field(None, max_length=500)
     webhook_enabled: Optional[bool] = None
 
+    @field_validator('webhook_url')
+    @classmethod
+    def validate_webhook_url(cls, v):
+        # Empty string is allowed and clears the URL
+        if v and not v.startswith(("http://", "https://")):
+            raise ValueError("Webhook URL must start with http:// or https://")
+        return v
+
 
 class WebhookConfigResponse(BaseModel):
     """Webhook configuration status"""
@@ -196,8 +245,7 @@ class SubscriptionResponse(BaseModel):
     canceled_at: Optional[datetime] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CreateCheckoutRequest(BaseModel):
@@ -260,15 +308,11 @@ class AddonResponse(BaseModel):
     latest_release_date: Optional[date] = None
     version_count: int = 0
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
-class AddonListResponse(BaseModel):
+class AddonListResponse(PageMeta):
     addons: List[AddonResponse]
-    total: int
-    page: int
-    per_page: int
 
 
 # ============== Version Schemas ==============
@@ -300,7 +344,7 @@ class VersionUpdate(BaseModel):
     urgent: Optional[bool] = None
 
 
-class VersionResponse(BaseModel):
+class VersionResponse(FastFromORM):
     id: int
     addon_id: int
     version: str
@@ -309,9 +353,9 @@ class VersionResponse(BaseModel):
     description: Optional[str] = None
     changelog_url: Optional[str] = None
     changelog_content: Optional[str] = None
-    breaking: bool
-    urgent: bool
-    storage_size_bytes: int
+    breaking: bool = False
+    urgent: bool = False
+    storage_size_bytes: int = 0
     created_at: datetime
     # Pro+ features
     scheduled_release_at: Optional[datetime] = None
@@ -319,8 +363,7 @@ class VersionResponse(BaseModel):
     # Premium features
     rollout_percentage: int = 100
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class VersionListResponse(BaseModel):
@@ -337,6 +380,13 @@ class DailyStats(BaseModel):
     unique_users: int
 
 
+class WeeklyStats(BaseModel):
+    """Weekly statistics for an addon"""
+    week: date  # Monday the week starts on
+    check_count: int
+    unique_users: int
+
+
 class VersionDistribution(BaseModel):
     """Version usage distribution"""
     version: str
@@ -355,6 +405,7 @@ class AddonAnalyticsResponse(BaseModel):
     total_checks: int
     total_unique_users: int
     daily_stats: List[DailyStats]
+    weekly_stats: List[WeeklyStats] = []  # As of the last nightly refresh
     version_distribution: List[VersionDistribution]
 
 
@@ -410,15 +461,11 @@ class AuditLogEntry(BaseModel):
     ip_address: Optional[str] = None
     created_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
-class AuditLogListResponse(BaseModel):
+class AuditLogListResponse(PageMeta):
     entries: List[AuditLogEntry]
-    total: int
-    page: int
-    per_page: int
 
 
 # ============== Public API Schemas (versions.json compatible) ==============
@@ -480,8 +527,7 @@ class TicketAttachmentResponse(BaseModel):
     is_compressed: bool
     created_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TicketMessageResponse(BaseModel):
@@ -496,8 +542,7 @@ class TicketMessageResponse(BaseModel):
     edited_at: Optional[datetime] = None
     attachments: List[TicketAttachmentResponse] = []
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TicketResponse(BaseModel):
@@ -515,19 +560,15 @@ class TicketResponse(BaseModel):
     resolved_at: Optional[datetime] = None
     closed_at: Optional[datetime] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class TicketDetailResponse(TicketResponse):
     messages: List[TicketMessageResponse] = []
 
 
-class TicketListResponse(BaseModel):
+class TicketListResponse(PageMeta):
     tickets: List[TicketResponse]
-    total: int
-    page: int
-    per_page: int
 
 
 class TicketStatusUpdate(BaseModel):
@@ -569,8 +610,7 @@ class CannedResponseResponse(BaseModel):
     created_at: datetime
     updated_at: datetime
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class CannedResponseListResponse(BaseModel):
@@ -616,8 +656,7 @@ class OrganizationMemberResponse(BaseModel):
     discord_username: Optional[str] = None
     discord_avatar: Optional[str] = None
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class OrganizationResponse(BaseModel):
@@ -634,8 +673,7 @@ class OrganizationResponse(BaseModel):
     addon_count: int = 0
     storage_used_bytes: int = 0
     
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class OrganizationDetailResponse(OrganizationResponse):
@@ -687,19 +725,19 @@ class ApiKeyUpdate(BaseModel):
     expires_at: Optional[datetime] = None
 
 
-class ApiKeyResponse(BaseModel):
+class ApiKeyResponse(FastFromORM):
     """API key information (without the actual key value)."""
     id: int
     name: str
     key_prefix: str  # pa_xxxx... for identification
     scopes: List[str]
-    is_active: bool
+    is_active: bool = True
     expires_at: Optional[datetime] = None
     last_used_at: Optional[datetime] = None
-    usage_count: int
+    usage_count: int = 0
     created_at: datetime
     
-    model_config = {"from_attributes": True}
+    model_config = ConfigDict(from_attributes=True)
 
 
 class ApiKeyCreatedResponse(BaseModel):
@@ -15,7 +15,7 @@ from datetime import datetime, timezone
 from pathlib import Path
 
 import httpx
-from sqlalchemy import select
+from sqlalchemy import insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import AsyncSessionLocal
@@ -71,6 +71,9 @@ async def import_versions(json_path: str, admin_discord_id: str | None = None):
         else:
             addon_list = addons_data
         
+        # New versions are collected and inserted in one multi-row statement
+        new_versions = []
+        
         # Import each addon
         for addon_data in addon_list:
             addon_name = addon_data.get("name")
@@ -113,6 +116,12 @@ async def import_versions(json_path: str, admin_discord_id: str | None = None):
                 # Nested versions array
                 versions_list = addon_data.get("versions", [])
             
+            # Existing versions of this addon, fetched once
+            result = await db.execute(
+                select(Version.version).where(Version.addon_id == addon.id)
+            )
+            existing_versions = set(result.scalars().all())
+            
             # Import versions
             for version_data in versions_list:
                 version_str = version_data.get("version")
@@ -120,15 +129,10 @@ async def import_versions(json_path: str, admin_discord_id: str | None = None):
                     continue
                 
                 # Check if version exists
-                result = await db.execute(
-                    select(Version).where(
-                        Version.addon_id == addon.id,
-                        Version.version == version_str
-                    )
-                )
-                if result.scalar_one_or_none():
+                if version_str in existing_versions:
                     print(f"  Version {version_str} already exists, skipping...")
                     continue
+                existing_versions.add(version_str)
                 
                 # Parse release date
                 release_date_str = version_data.get("releaseDate")
@@ -141,21 +145,23 @@ async def import_versions(json_path: str, admin_discord_id: str | None = None):
                     release_date = datetime.now(timezone.utc)
                 
                 # Create version
-                version = Version(
-                    addon_id=addon.id,
-                    version=version_str,
-                    release_date=release_date,
-                    download_url=version_data.get("downloadUrl", ""),
-                    description=version_data.get("description"),
-                    changelog_url=version_data.get("changelogUrl"),
-                    changelog_content=version_data.get("changelog"),
-                    breaking=version_data.get("breaking", False),
-                    urgent=version_data.get("urgent", False),
-                    storage_size_bytes=0,
-                )
-                db.add(version)
+                new_versions.append({
+                    "addon_id": addon.id,
+                    "version": version_str,
+                    "release_date": release_date,
+                    "download_url": version_data.get("downloadUrl", ""),
+                    "description": version_data.get("description"),
+                    "changelog_url": version_data.get("changelogUrl"),
+                    "changelog_content": version_data.get("changelog"),
+                    "breaking": version_data.get("breaking", False),
+                    "urgent": version_data.get("urgent", False),
+                    "storage_size_bytes": 0,
+                })
                 print(f"  Added version: {version_str}")
         
+        if new_versions:
+            # ORM bulk INSERT: batched by insertmanyvalues instead of one INSERT per object
+            await db.execute(insert(Version), new_versions)
         await db.commit()
         print("\nImport complete!")
 
@@ -2,11 +2,13 @@ from typing import Optional, List
 from fastapi import BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, and_
+from sqlalchemy.orm import selectinload
 from app.models import Addon, Version, User
 from app.schemas import AddonCreate, AddonUpdate
 from app.utils import slugify
 from app.core.exceptions import NotFoundError, ConflictError, ForbiddenError
 from app.services.user_service import UserService
+from app.services.version_service import VersionService
 
 
 def sanitize_ilike_pattern(search: str) -> str:
@@ -25,8 +27,12 @@ class AddonService:
     
     @staticmethod
     async def get_addon_by_slug(db: AsyncSession, slug: str) -> Optional[Addon]:
-        """Get addon by slug."""
-        result = await db.execute(select(Addon).where(Addon.slug == slug))
+        """Get addon by slug, with its owner eagerly loaded."""
+        result = await db.execute(
+            select(Addon)
+            .options(selectinload(Addon.owner))
+            .where(Addon.slug == slug)
+        )
         return result.scalar_one_or_none()
     
     @staticmethod
@@ -61,6 +67,7 @@ class AddonService:
         db.add(addon)
         await db.commit()
         await db.refresh(addon)
+        await UserService.invalidate_user_stats(owner.id)
         
         # Send admin notification for new addon
         if background_tasks:
@@ -105,6 +112,7 @@ class AddonService:
         
         await db.commit()
         await db.refresh(addon)
+        await UserService.invalidate_user_stats(addon.owner_id)
         return addon
     
     @staticmethod
@@ -114,8 +122,10 @@ class AddonService:
         if addon.owner_id != user.id and not user.is_admin:
             raise ForbiddenError("You don't have permission to delete this addon")
         
+        owner_id = addon.owner_id
         await db.delete(addon)
         await db.commit()
+        await UserService.invalidate_user_stats(owner_id)
     
     @staticmethod
     async def list_addons(
@@ -163,13 +173,7 @@ class AddonService:
             owner = owner_result.scalar_one_or_none()
             
             # Get latest version
-            latest_version_result = await db.execute(
-                select(Version)
-                .where(Version.addon_id == addon.id)
-                .order_by(Version.release_date.desc(), Version.created_at.desc())
-                .limit(1)
-            )
-            latest_version = latest_version_result.scalar_one_or_none()
+            latest_version = await VersionService.get_latest_version_summary(db, addon.id)
             
             # Get version count
             version_count_result = await db.execute(
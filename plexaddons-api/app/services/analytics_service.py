@@ -4,13 +4,15 @@ import hashlib
 from datetime import date, datetime, timedelta, timezone
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, and_
+from sqlalchemy import select, func, and_, distinct, literal, text, Date
+from sqlalchemy.dialects.postgresql import insert
 from app.config import get_settings
+from app.core.version_check_log import version_check_writer
 from app.models import (
-    VersionCheck, AddonUsageStats, Addon, Version, User, SubscriptionTier
+    VersionCheck, AddonUsageStats, AddonWeeklyStats, Addon, Version, User, SubscriptionTier
 )
 from app.schemas import (
-    AddonAnalyticsResponse, DailyStats, VersionDistribution, AnalyticsSummary
+    AddonAnalyticsResponse, DailyStats, WeeklyStats, VersionDistribution, AnalyticsSummary
 )
 
 settings = get_settings()
@@ -26,77 +28,28 @@ class AnalyticsService:
         return hashlib.sha256(salted.encode()).hexdigest()[:32]
     
     @staticmethod
-    async def log_version_check(
-        db: AsyncSession,
+    def log_version_check(
         addon_id: int,
         version_id: Optional[int],
         checked_version: str,
-        client_ip: str,
-    ) -> VersionCheck:
+        client_ip_hash: str,
+    ) -> None:
         """
-        Log a version check request.
+        Queue a version check for the batched writer.
         
         Args:
             addon_id: The addon being checked
             version_id: The version ID if resolved, None if version not found
             checked_version: The version string provided by the client
-            client_ip: Client IP address (will be hashed)
-        """
-        ip_hash = AnalyticsService.hash_ip(client_ip)
-        
-        check = VersionCheck(
-            addon_id=addon_id,
-            version_id=version_id,
-            checked_version=checked_version,
-            client_ip_hash=ip_hash,
-        )
-        db.add(check)
-        await db.commit()
-        await db.refresh(check)
-        
-        return check
-    
-    @staticmethod
-    async def update_daily_stats(
-        db: AsyncSession,
-        addon_id: int,
-        version_id: Optional[int],
-        client_ip_hash: str,
-    ):
-        """
-        Update or create daily aggregated statistics.
-        
-        This is called after logging a version check to update the aggregates.
+            client_ip_hash: Client IP address hashed with hash_ip
         """
-        today = date.today()
-        
-        # Try to find existing stats for this addon/version/date
-        query = select(AddonUsageStats).where(
-            AddonUsageStats.addon_id == addon_id,
-            AddonUsageStats.date == today,
-        )
-        if version_id:
-            query = query.where(AddonUsageStats.version_id == version_id)
-        else:
-            query = query.where(AddonUsageStats.version_id.is_(None))
-        
-        result = await db.execute(query)
-        stats = result.scalar_one_or_none()
-        
-        if stats:
-            stats.check_count += 1
-            # Note: unique_users is recalculated via scheduled task for accuracy
-        else:
-            stats = AddonUsageStats(
-                addon_id=addon_id,
-                version_id=version_id,
-                date=today,
-                check_count=1,
-                unique_users=1,  # Will be recalculated
-            )
-            db.add(stats)
-        
-        await db.commit()
+        version_check_writer.log((
+            addon_id,
+            version_id,
+            checked_version[:50],
+            client_ip_hash,
+            datetime.now(timezone.utc),
+        ))
     
     @staticmethod
     async def get_addon_analytics(
@@ -143,6 +96,22 @@ class AnalyticsService:
             for row in daily_rows
         ]
         
+        # Weekly totals come precomputed from the materialized view
+        weekly_result = await db.execute(
+            select(AddonWeeklyStats).where(
+                AddonWeeklyStats.addon_id == addon_id,
+                AddonWeeklyStats.week >= start_date - timedelta(days=start_date.weekday()),
+            ).order_by(AddonWeeklyStats.week)
+        )
+        weekly_stats = [
+            WeeklyStats(
+                week=row.week,
+                check_count=row.check_count or 0,
+                unique_users=row.unique_users or 0,
+            )
+            for row in weekly_result.scalars()
+        ]
+        
         # Get version distribution
         version_query = select(
             AddonUsageStats.version_id,
@@ -196,6 +165,7 @@ class AnalyticsService:
             total_checks=total_checks,
             total_unique_users=total_unique,
             daily_stats=daily_stats,
+            weekly_stats=weekly_stats,
             version_distribution=version_distribution,
         )
     
@@ -268,50 +238,55 @@ class AnalyticsService:
         await db.commit()
     
     @staticmethod
-    async def recalculate_unique_users(
+    async def rollup_daily_stats(
         db: AsyncSession,
         target_date: Optional[date] = None,
-    ):
+    ) -> int:
         """
-        Recalculate unique user counts from version check logs.
+        Rebuild the daily aggregates for one UTC day from the raw version checks.
         
-        This should be run as a scheduled task (e.g., daily).
+        A single INSERT ... SELECT ... ON CONFLICT statement: Postgres groups
+        the day's checks and upserts one row per addon/version, so re-running
+        it for the same day just refreshes the counts. Returns the number of
+        aggregate rows written.
         """
-        target = target_date or date.today()
-        start_of_day = datetime.combine(target, datetime.min.time())
-        end_of_day = datetime.combine(target, datetime.max.time())
+        target = target_date or datetime.now(timezone.utc).date()
+        start_of_day = datetime.combine(target, datetime.min.time(), tzinfo=timezone.utc)
+        end_of_day = start_of_day + timedelta(days=1)
         
-        # Get unique IP hashes per addon/version
-        unique_query = select(
+        rollup = select(
             VersionCheck.addon_id,
             VersionCheck.version_id,
-            func.count(func.distinct(VersionCheck.client_ip_hash)).label("unique_users"),
+            literal(target, Date).label("date"),
+            func.count().label("check_count"),
+            func.count(distinct(VersionCheck.client_ip_hash)).label("unique_users"),
         ).where(
             VersionCheck.timestamp >= start_of_day,
-            VersionCheck.timestamp <= end_of_day,
+            VersionCheck.timestamp < end_of_day,
         ).group_by(VersionCheck.addon_id, VersionCheck.version_id)
         
-        result = await db.execute(unique_query)
-        
-        for row in result.all():
-            # Update the corresponding stats record
-            stats_query = select(AddonUsageStats).where(
-                AddonUsageStats.addon_id == row.addon_id,
-                AddonUsageStats.date == target,
-            )
-            if row.version_id:
-                stats_query = stats_query.where(
-                    AddonUsageStats.version_id == row.version_id
-                )
-            else:
-                stats_query = stats_query.where(
-                    AddonUsageStats.version_id.is_(None)
-                )
-            
-            stats_result = await db.execute(stats_query)
-            stats = stats_result.scalar_one_or_none()
-            
-            if stats:
-                stats.unique_users = row.unique_users
+        stmt = insert(AddonUsageStats).from_select(
+            ["addon_id", "version_id", "date", "check_count", "unique_users"], rollup
+        )
+        stmt = stmt.on_conflict_do_update(
+            # Unique with NULLS NOT DISTINCT, so unresolved versions upsert too
+            index_elements=["addon_id", "version_id", "date"],
+            set_={
+                "check_count": stmt.excluded.check_count,
+                "unique_users": stmt.excluded.unique_users,
+            },
+        )
+        result = await db.execute(stmt)
+        await db.commit()
+        return result.rowcount
+    
+    @staticmethod
+    async def refresh_weekly_stats(db: AsyncSession) -> None:
+        """
+        Recompute addon_weekly_stats from addon_usage_stats.
         
+        CONCURRENTLY keeps the view readable while it refreshes, at the cost
+        of diffing against the old contents (uses the unique index).
+        """
+        await db.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY addon_weekly_stats"))
         await db.commit()
@@ -4,12 +4,14 @@ API Key service for managing user API keys with granular permissions.
 
 import secrets
 import hashlib
+import hmac
 from datetime import datetime, timezone
 from typing import Optional, List, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, lambda_stmt
 from app.models import ApiKey, User, SubscriptionTier, ApiKeyScope
 from app.api.deps import get_effective_tier
+from app.core.api_key_usage import api_key_usage_tracker
 from app.core.exceptions import ForbiddenError, BadRequestError, NotFoundError
 
 
@@ -45,7 +47,7 @@ class ApiKeyService:
     """Service for API key management."""
     
     @staticmethod
-    def generate_key() -> Tuple[str, str, str]:
+    def generate_key() -> Tuple[str, str, bytes]:
         """
         Generate a new API key.
         
@@ -53,20 +55,20 @@ class ApiKeyService:
             Tuple of (full_key, key_prefix, key_hash)
             - full_key: The complete key to show to user (only once!)
             - key_prefix: First 8 chars for display (pa_xxxx)
-            - key_hash: SHA-256 hash for storage
+            - key_hash: SHA-256 digest for storage
         """
         # Generate 32 random bytes = 64 hex chars
         random_bytes = secrets.token_hex(32)
         full_key = f"pa_{random_bytes}"
         key_prefix = full_key[:10]  # pa_ + first 7 hex chars
-        key_hash = hashlib.sha256(full_key.encode()).hexdigest()
+        key_hash = hashlib.sha256(full_key.encode()).digest()
         
         return full_key, key_prefix, key_hash
     
     @staticmethod
-    def hash_key(key: str) -> str:
-        """Hash an API key for lookup."""
-        return hashlib.sha256(key.encode()).hexdigest()
+    def hash_key(key: str) -> bytes:
+        """Hash an API key for lookup (raw 32-byte digest, half the size of hex)."""
+        return hashlib.sha256(key.encode()).digest()
     
     @staticmethod
     def get_available_scopes(user: User) -> List[ApiKeyScope]:
@@ -210,14 +212,23 @@ class ApiKeyService:
         if not key_value or not key_value.startswith("pa_"):
             return None
         
-        key_hash = ApiKeyService.hash_key(key_value)
+        key_prefix = key_value[:10]
+        # Runs on every API key request; as a lambda statement the SELECT is
+        # built once and later calls only bind the new prefix
         result = await db.execute(
-            select(ApiKey)
-            .where(ApiKey.key_hash == key_hash)
-            .where(ApiKey.is_active == True)
+            lambda_stmt(
+                lambda: select(ApiKey)
+                .where(ApiKey.key_prefix == key_prefix)
+                .where(ApiKey.is_active == True)
+            )
         )
-        api_key = result.scalar_one_or_none()
         
+        # Usually a single candidate; the digest is compared in constant time
+        key_hash = ApiKeyService.hash_key(key_value)
+        api_key = next(
+            (candidate for candidate in result.scalars() if hmac.compare_digest(candidate.key_hash, key_hash)),
+            None,
+        )
         if not api_key:
             return None
         
@@ -267,16 +278,12 @@ class ApiKeyService:
         await db.commit()
     
     @staticmethod
-    async def record_usage(
-        db: AsyncSession,
+    def record_usage(
         api_key: ApiKey,
         ip_address: Optional[str] = None,
     ):
-        """Record API key usage for tracking."""
-        api_key.last_used_at = datetime.now(timezone.utc)
-        api_key.last_used_ip = ip_address
-        api_key.usage_count = (api_key.usage_count or 0) + 1
-        await db.commit()
+        """Record API key usage for tracking (written to api_keys in batches)."""
+        api_key_usage_tracker.record(api_key.id, ip_address)
     
     @staticmethod
     def has_scope(api_key: ApiKey, required_scope: str) -> bool:
@@ -6,10 +6,12 @@ from typing import Optional
 from fastapi import BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
 from app.config import get_settings
-from app.models import User, SubscriptionTier
+from app.models import User, UserTokens, SubscriptionTier
 from app.core.security import create_access_token
 from app.core.exceptions import UnauthorizedError, BadRequestError
+from app.core.user_cache import invalidate_user_cache, clear_discord_id_missing
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -135,8 +137,6 @@ class AuthService:
             user.discord_username = discord_user["username"]
             user.discord_avatar = discord_user.get("avatar")
             user.email = discord_user.get("email")
-            user.discord_access_token = _encrypt_token(tokens["access_token"])
-            user.discord_refresh_token = _encrypt_token(tokens["refresh_token"]) if tokens.get("refresh_token") else None
             user.discord_token_expires_at = token_expires_at
             user.last_login_at = datetime.now(timezone.utc)
         else:
@@ -151,8 +151,6 @@ class AuthService:
                 discord_username=discord_user["username"],
                 discord_avatar=discord_user.get("avatar"),
                 email=discord_user.get("email"),
-                discord_access_token=_encrypt_token(tokens["access_token"]),
-                discord_refresh_token=_encrypt_token(tokens["refresh_token"]) if tokens.get("refresh_token") else None,
                 discord_token_expires_at=token_expires_at,
                 subscription_tier=SubscriptionTier.FREE,
                 storage_quota_bytes=settings.storage_quota_free,
@@ -162,8 +160,27 @@ class AuthService:
             db.add(user)
             is_new_user = True
         
+        # Flush first so a new user has an id for its token row
+        await db.flush()
+        stmt = insert(UserTokens).values(
+            user_id=user.id,
+            discord_access_token=_encrypt_token(tokens["access_token"]),
+            discord_refresh_token=_encrypt_token(tokens["refresh_token"]) if tokens.get("refresh_token") else None,
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=["user_id"],
+                set_={
+                    "discord_access_token": stmt.excluded.discord_access_token,
+                    "discord_refresh_token": stmt.excluded.discord_refresh_token,
+                },
+            )
+        )
         await db.commit()
         await db.refresh(user)
+        await invalidate_user_cache(user.id)
+        if is_new_user:
+            await clear_discord_id_missing(user.discord_id)
         
         # Sync automatic badges (early_adopter, beta_tester, addon_creator, etc.)
         await UserService.sync_automatic_badges(db, user)
@@ -190,7 +207,7 @@ class AuthService:
     @classmethod
     async def maybe_refresh_discord_token(cls, db: AsyncSession, user: User) -> User:
         """Refresh Discord token if it's about to expire (within 25% of lifetime)."""
-        if not user.discord_token_expires_at or not user.discord_refresh_token:
+        if not user.discord_token_expires_at:
             return user
         
         # Check if token expires within 25% of the 7-day lifetime (~1.75 days)
@@ -198,21 +215,27 @@ class AuthService:
         if user.discord_token_expires_at - datetime.now(timezone.utc) > refresh_threshold:
             return user
         
+        # The tokens live in their own table; load them only once a refresh is due
+        user_tokens = await db.get(UserTokens, user.id)
+        if not user_tokens or not user_tokens.discord_refresh_token:
+            return user
+        
         try:
             # Decrypt the stored refresh token before sending to Discord
-            decrypted_refresh = _decrypt_token(user.discord_refresh_token)
+            decrypted_refresh = _decrypt_token(user_tokens.discord_refresh_token)
             new_tokens = await cls.refresh_discord_token(decrypted_refresh)
             # Encrypt new tokens before storing
-            user.discord_access_token = _encrypt_token(new_tokens["access_token"])
-            user.discord_refresh_token = (
+            user_tokens.discord_access_token = _encrypt_token(new_tokens["access_token"])
+            user_tokens.discord_refresh_token = (
                 _encrypt_token(new_tokens["refresh_token"])
                 if new_tokens.get("refresh_token")
-                else user.discord_refresh_token
+                else user_tokens.discord_refresh_token
             )
             user.discord_token_expires_at = datetime.now(timezone.utc) + timedelta(
                 seconds=new_tokens.get("expires_in", 604800)
             )
             await db.commit()
+            await invalidate_user_cache(user.id)
         except Exception:
             # If refresh fails, continue with existing token
             pass
@@ -14,7 +14,7 @@ from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.config import get_settings
-from app.models import User, Addon, Subscription, ApiRequestLog
+from app.models import User, Addon, Subscription, ApiRequestCounter
 
 logger = logging.getLogger(__name__)
 
@@ -412,9 +412,9 @@ class EmailService:
         # API requests this week (if tracking enabled)
         try:
             result = await db.execute(
-                select(func.count(ApiRequestLog.id)).where(
-                    ApiRequestLog.timestamp >= week_start,
-                    ApiRequestLog.timestamp < week_end
+                select(func.sum(ApiRequestCounter.count)).where(
+                    ApiRequestCounter.bucket_minute >= week_start,
+                    ApiRequestCounter.bucket_minute < week_end
                 )
             )
             stats["api_requests"] = result.scalar() or 0
@@ -1,6 +1,5 @@
 import httpx
 import base64
-import json
 import logging
 from typing import Optional
 from fastapi import BackgroundTasks
@@ -22,6 +21,23 @@ class PayPalService:
     
     _access_token: Optional[str] = None
     _token_expires_at: Optional[datetime] = None
+    _client: Optional[httpx.AsyncClient] = None
+    
+    @classmethod
+    def _get_client(cls) -> httpx.AsyncClient:
+        """Get the shared HTTP client (keeps TLS connections to PayPal alive)."""
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+            )
+        return cls._client
+    
+    @classmethod
+    async def close(cls) -> None:
+        """Close the shared HTTP client."""
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
     
     @classmethod
     async def _get_access_token(cls) -> str:
@@ -33,25 +49,25 @@ class PayPalService:
             f"{settings.paypal_client_id}:{settings.paypal_client_secret}".encode()
         ).decode()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.paypal_api_base}/v1/oauth2/token",
-                headers={
-                    "Authorization": f"Basic {auth}",
-                    "Content-Type": "application/x-www-form-urlencoded",
-                },
-                data={"grant_type": "client_credentials"},
-            )
-            
-            if response.status_code != 200:
-                raise PaymentError("Failed to get PayPal access token")
-            
-            data = response.json()
-            cls._access_token = data["access_token"]
-            expires_in = data.get("expires_in", 3600)
-            cls._token_expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in - 60)
-            
-            return cls._access_token
+        client = cls._get_client()
+        response = await client.post(
+            f"{settings.paypal_api_base}/v1/oauth2/token",
+            headers={
+                "Authorization": f"Basic {auth}",
+                "Content-Type": "application/x-www-form-urlencoded",
+            },
+            data={"grant_type": "client_credentials"},
+        )
+        
+        if response.status_code != 200:
+            raise PaymentError("Failed to get PayPal access token")
+        
+        data = response.json()
+        cls._access_token = data["access_token"]
+        expires_in = data.get("expires_in", 3600)
+        cls._token_expires_at = datetime.now(timezone.utc) + timedelta(seconds=expires_in - 60)
+        
+        return cls._access_token
     
     @classmethod
     async def get_subscription_link(
@@ -82,19 +98,19 @@ class PayPalService:
         """Verify a PayPal subscription after approval."""
         token = await cls._get_access_token()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{settings.paypal_api_base}/v1/billing/subscriptions/{subscription_id}",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json",
-                },
-            )
-            
-            if response.status_code != 200:
-                raise PaymentError("Failed to verify PayPal subscription")
-            
-            return response.json()
+        client = cls._get_client()
+        response = await client.get(
+            f"{settings.paypal_api_base}/v1/billing/subscriptions/{subscription_id}",
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            },
+        )
+        
+        if response.status_code != 200:
+            raise PaymentError("Failed to verify PayPal subscription")
+        
+        return response.json()
     
     @classmethod
     async def activate_subscription(
@@ -165,17 +181,17 @@ class PayPalService:
         """Cancel a PayPal subscription."""
         token = await cls._get_access_token()
         
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.paypal_api_base}/v1/billing/subscriptions/{subscription_id}/cancel",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json",
-                },
-                json={"reason": reason},
-            )
-            
-            return response.status_code == 204
+        client = cls._get_client()
+        response = await client.post(
+            f"{settings.paypal_api_base}/v1/billing/subscriptions/{subscription_id}/cancel",
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            },
+            json={"reason": reason},
+        )
+        
+        return response.status_code == 204
     
     @classmethod
     async def verify_webhook_signature(cls, headers: dict, payload: dict) -> bool:
@@ -192,22 +208,22 @@ class PayPalService:
             "webhook_event": payload,
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{settings.paypal_api_base}/v1/notifications/verify-webhook-signature",
-                headers={
-                    "Authorization": f"Bearer {token}",
-                    "Content-Type": "application/json",
-                },
-                json=verification_body,
-            )
+        client = cls._get_client()
+        response = await client.post(
+            f"{settings.paypal_api_base}/v1/notifications/verify-webhook-signature",
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Content-Type": "application/json",
+            },
+            json=verification_body,
+        )
 
-            if response.status_code != 200:
-                logger.error(f"PayPal webhook verification request failed: {response.status_code}")
-                return False
+        if response.status_code != 200:
+            logger.error(f"PayPal webhook verification request failed: {response.status_code}")
+            return False
 
-            result = response.json()
-            return result.get("verification_status") == "SUCCESS"
+        result = response.json()
+        return result.get("verification_status") == "SUCCESS"
 
     @classmethod
     async def handle_webhook_event(
@@ -476,7 +492,7 @@ class PayPalService:
             event_type=event_type,
             provider=PaymentProvider.PAYPAL,
             provider_event_id=event_id,
-            payload=json.dumps(resource),
+            payload=resource,
         )
         db.add(event)
         await db.commit()
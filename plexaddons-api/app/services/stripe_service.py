@@ -1,5 +1,9 @@
+import asyncio
 import stripe
 import logging
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional
 from fastapi import BackgroundTasks
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,7 +13,6 @@ from app.config import get_settings
 from app.models import User, Subscription, SubscriptionTier, SubscriptionStatus, PaymentProvider, SubscriptionEvent
 from app.services.user_service import UserService
 from app.core.exceptions import PaymentError, BadRequestError
-import json
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
@@ -18,6 +21,22 @@ logger = logging.getLogger(__name__)
 stripe.api_key = settings.stripe_secret_key
 
 
+def _build_http_session() -> requests.Session:
+    """Build a pooled requests session for the Stripe SDK."""
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=10,
+        pool_maxsize=20,
+        max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=("GET",)),
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+# Reuse keep-alive connections across Stripe API calls
+stripe.default_http_client = stripe.http_client.RequestsClient(session=_build_http_session())
+
+
 class StripeService:
     """Service for Stripe payment operations."""
     
@@ -54,7 +73,8 @@ class StripeService:
         )
         
         try:
-            session = stripe.checkout.Session.create(
+            session = await asyncio.to_thread(
+                stripe.checkout.Session.create,
                 customer=customer_id,
                 mode="subscription",
                 line_items=[{"price": price_id, "quantity": 1}],
@@ -80,7 +100,8 @@ class StripeService:
         customer_id = await StripeService._get_or_create_customer(user)
         
         try:
-            session = stripe.billing_portal.Session.create(
+            session = await asyncio.to_thread(
+                stripe.billing_portal.Session.create,
                 customer=customer_id,
                 return_url=return_url,
             )
@@ -94,7 +115,8 @@ class StripeService:
         """Get existing Stripe customer or create a new one."""
         # Search for existing customer by Discord ID
         try:
-            customers = stripe.Customer.search(
+            customers = await asyncio.to_thread(
+                stripe.Customer.search,
                 query=f"metadata['discord_id']:'{user.discord_id}'"
             )
             if customers.data:
@@ -104,7 +126,8 @@ class StripeService:
         
         # Create new customer
         try:
-            customer = stripe.Customer.create(
+            customer = await asyncio.to_thread(
+                stripe.Customer.create,
                 email=user.email,
                 name=user.discord_username,
                 metadata={
@@ -364,7 +387,7 @@ class StripeService:
     async def _get_user_by_customer(db: AsyncSession, customer_id: str) -> Optional[User]:
         """Get user by Stripe customer ID."""
         try:
-            customer = stripe.Customer.retrieve(customer_id)
+            customer = await asyncio.to_thread(stripe.Customer.retrieve, customer_id)
             discord_id = customer.metadata.get("discord_id")
             if discord_id:
                 result = await db.execute(select(User).where(User.discord_id == discord_id))
@@ -429,7 +452,7 @@ class StripeService:
             event_type=event_type,
             provider=PaymentProvider.STRIPE,
             provider_event_id=event_id,
-            payload=json.dumps(event_data),
+            payload=event_data,
         )
         db.add(event)
         await db.commit()
@@ -3,6 +3,7 @@ Ticket Service for PlexAddons
 Handles support ticket operations including CRUD, attachments, and compression
 """
 import asyncio
+import hashlib
 import logging
 import lzma
 import mimetypes
@@ -13,13 +14,14 @@ from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Optional, List, Dict, Any, Tuple
 
-from sqlalchemy import select, func, and_, or_
+from sqlalchemy import select, delete, func, and_, or_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
 from app.config import get_settings
 from app.models import (
-    User, Ticket, TicketMessage, TicketAttachment, CannedResponse,
+    User, Ticket, TicketMessage, TicketAttachment, AttachmentBlob, CannedResponse,
     TicketStatus, TicketPriority, TicketCategory, SubscriptionTier
 )
 from app.api.deps import get_effective_tier
@@ -143,7 +145,6 @@ class TicketService:
         
         if include_messages:
             query = query.options(
-                selectinload(Ticket.messages).selectinload(TicketMessage.attachments),
                 selectinload(Ticket.messages).selectinload(TicketMessage.author),
                 selectinload(Ticket.user),
                 selectinload(Ticket.assigned_admin)
@@ -376,7 +377,6 @@ class TicketService:
         query = select(TicketMessage).where(
             TicketMessage.id == message_id
         ).options(
-            selectinload(TicketMessage.attachments),
             selectinload(TicketMessage.author)
         )
         result = await db.execute(query)
@@ -407,18 +407,32 @@ class TicketService:
         if file_ext not in self.ALLOWED_EXTENSIONS:
             raise ValueError(f"File type '{file_ext}' is not allowed. Allowed types: {', '.join(sorted(self.ALLOWED_EXTENSIONS))}")
 
-        # Generate unique filename
-        unique_filename = f"{uuid.uuid4().hex}{file_ext}"
-        
-        # Create directory structure: /attachments/ticket_id/message_id/
-        ticket_dir = self.attachments_path / str(message.ticket_id) / str(message.id)
-        ticket_dir.mkdir(parents=True, exist_ok=True)
-        
-        file_path = ticket_dir / unique_filename
-        
-        # Write file
-        with open(file_path, "wb") as f:
-            f.write(file_content)
+        content_hash = hashlib.sha256(file_content).hexdigest()
+        
+        # Identical content is stored once; later uploads only add a row pointing at it.
+        # Upsert the blob row before touching the file: DO UPDATE (unlike DO NOTHING)
+        # locks the row until this attachment commits, so _delete_blob_if_unused
+        # can neither remove the file nor miss the new reference in between
+        stmt = insert(AttachmentBlob).values(
+            content_hash=content_hash,
+            storage_path=str(self._get_blob_path(content_hash)),
+            file_size=file_size,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[AttachmentBlob.content_hash],
+            set_={"content_hash": stmt.excluded.content_hash},
+        ).returning(AttachmentBlob.storage_path, AttachmentBlob.is_compressed)
+        storage_path, is_compressed = (await db.execute(stmt)).one()
+        
+        # Missing if this is new content, or if a delete removed it before we got the lock
+        stored_path = Path(storage_path)
+        if not stored_path.exists():
+            stored_path.parent.mkdir(parents=True, exist_ok=True)
+            data = lzma.compress(file_content, preset=9) if is_compressed else file_content
+            temp_path = stored_path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, stored_path)
         
         # Detect mime type
         mime_type, _ = mimetypes.guess_type(original_filename)
@@ -426,7 +440,7 @@ class TicketService:
         # Create attachment record
         attachment = TicketAttachment(
             message_id=message.id,
-            file_path=str(file_path),
+            content_hash=content_hash,
             original_filename=original_filename,
             file_size=file_size,
             mime_type=mime_type
@@ -439,6 +453,10 @@ class TicketService:
         
         return attachment
     
+    def _get_blob_path(self, content_hash: str) -> Path:
+        """Filesystem path for uncompressed blob content: /attachments/blobs/ab/abcdef..."""
+        return self.attachments_path / "blobs" / content_hash[:2] / content_hash
+    
     async def get_attachment(
         self,
         db: AsyncSession,
@@ -452,33 +470,49 @@ class TicketService:
     
     def get_attachment_content(self, attachment: TicketAttachment) -> bytes:
         """Read attachment content from filesystem"""
-        file_path = Path(attachment.file_path)
+        blob = attachment.blob
+        file_path = Path(blob.storage_path)
         
         if not file_path.exists():
             raise FileNotFoundError(f"Attachment file not found: {file_path}")
         
         # If compressed, decompress on read
-        if attachment.is_compressed:
+        if blob.is_compressed:
             with lzma.open(file_path, "rb") as f:
                 return f.read()
         else:
             with open(file_path, "rb") as f:
                 return f.read()
     
-    async def compress_attachment(
+    async def compress_blob(
         self,
         db: AsyncSession,
-        attachment: TicketAttachment
-    ) -> TicketAttachment:
-        """Compress an attachment using LZMA"""
-        if attachment.is_compressed:
-            return attachment
+        blob: AttachmentBlob
+    ) -> AttachmentBlob:
+        """Compress stored attachment content using LZMA"""
+        # Move the file under the row lock, like uploads and deletes do
+        result = await db.execute(
+            select(AttachmentBlob)
+            .where(AttachmentBlob.content_hash == blob.content_hash)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        if result.scalar_one_or_none() is None or blob.is_compressed:
+            # Deleted or already compressed since it was selected
+            await db.commit()
+            return blob
         
-        file_path = Path(attachment.file_path)
+        content_hash = blob.content_hash
+        file_path = Path(blob.storage_path)
         if not file_path.exists():
             logger.warning(f"Attachment file not found for compression: {file_path}")
-            return attachment
+            await db.commit()
+            return blob
         
+        # Write to a temp name and swap it in, so a failure never leaves a
+        # truncated .xz behind; the original stays until the row points away
+        compressed_path = file_path.with_suffix(file_path.suffix + ".xz")
+        temp_path = compressed_path.with_name(f"{compressed_path.name}.{uuid.uuid4().hex}.tmp")
         try:
             # Read original content
             with open(file_path, "rb") as f:
@@ -487,53 +521,81 @@ class TicketService:
             # Compress with LZMA preset 9 (maximum compression)
             compressed_content = lzma.compress(original_content, preset=9)
             
-            # Write compressed file with .xz extension
-            compressed_path = file_path.with_suffix(file_path.suffix + ".xz")
-            with open(compressed_path, "wb") as f:
+            with open(temp_path, "wb") as f:
                 f.write(compressed_content)
+            os.replace(temp_path, compressed_path)
             
-            # Remove original file
-            file_path.unlink()
-            
-            # Update attachment record
-            attachment.file_path = str(compressed_path)
-            attachment.compressed_size = len(compressed_content)
-            attachment.is_compressed = True
-            attachment.compressed_at = datetime.now(timezone.utc)
+            # Update blob record
+            blob.storage_path = str(compressed_path)
+            blob.compressed_size = len(compressed_content)
+            blob.is_compressed = True
+            blob.compressed_at = datetime.now(timezone.utc)
             
             await db.commit()
-            await db.refresh(attachment)
-            
-            compression_ratio = (1 - len(compressed_content) / len(original_content)) * 100
-            logger.info(
-                f"Attachment #{attachment.id} compressed: "
-                f"{attachment.file_size} -> {attachment.compressed_size} bytes "
-                f"({compression_ratio:.1f}% reduction)"
-            )
-            
-            return attachment
-            
         except Exception as e:
-            logger.error(f"Failed to compress attachment #{attachment.id}: {e}")
-            return attachment
+            await db.rollback()
+            temp_path.unlink(missing_ok=True)
+            compressed_path.unlink(missing_ok=True)
+            logger.error(f"Failed to compress attachment blob {content_hash[:12]}: {e}")
+            return blob
+        
+        # Remove original file
+        try:
+            file_path.unlink()
+        except OSError as e:
+            logger.warning(f"Failed to remove uncompressed attachment {file_path}: {e}")
+        
+        compression_ratio = (1 - len(compressed_content) / len(original_content)) * 100 if original_content else 0
+        logger.info(
+            f"Attachment blob {content_hash[:12]} compressed: "
+            f"{len(original_content)} -> {len(compressed_content)} bytes "
+            f"({compression_ratio:.1f}% reduction)"
+        )
+        
+        return blob
+    
+    async def _delete_blob_if_unused(self, db: AsyncSession, content_hash: str) -> bool:
+        """Delete a blob and its file once no attachment references it
+        
+        The blob row is locked before references are counted, so an upload
+        holding it (see add_attachment) commits first and its attachment is
+        counted. The file goes while the lock is still held; an upload
+        waiting on it then finds no row and writes the content again.
+        """
+        result = await db.execute(
+            select(AttachmentBlob.storage_path)
+            .where(AttachmentBlob.content_hash == content_hash)
+            .with_for_update()
+        )
+        storage_path = result.scalar_one_or_none()
+        # New statement, new snapshot: sees attachments committed while we waited
+        in_use = storage_path is not None and await db.scalar(
+            select(select(TicketAttachment.id).where(TicketAttachment.content_hash == content_hash).exists())
+        )
+        if storage_path is None or in_use:
+            await db.commit()
+            return False
+        
+        await db.execute(delete(AttachmentBlob).where(AttachmentBlob.content_hash == content_hash))
+        file_path = Path(storage_path)
+        if file_path.exists():
+            file_path.unlink()
+        await db.commit()
+        return True
     
     async def delete_attachment(
         self,
         db: AsyncSession,
         attachment: TicketAttachment
     ) -> bool:
-        """Delete an attachment from filesystem and database"""
-        file_path = Path(attachment.file_path)
-        
+        """Delete an attachment, and its stored content if no other attachment shares it"""
         try:
-            # Delete file if exists
-            if file_path.exists():
-                file_path.unlink()
-            
             # Delete database record
             await db.delete(attachment)
             await db.commit()
             
+            await self._delete_blob_if_unused(db, attachment.content_hash)
+            
             logger.info(f"Attachment #{attachment.id} deleted: {attachment.original_filename}")
             return True
             
@@ -544,29 +606,31 @@ class TicketService:
     # ============== SCHEDULED TASKS ==============
     
     async def compress_old_attachments(self, db: AsyncSession) -> int:
-        """Compress attachments older than configured days"""
+        """Compress attachment content older than configured days"""
         cutoff_date = datetime.now(timezone.utc) - timedelta(days=self.compress_after_days)
         
-        # Find uncompressed attachments older than cutoff
+        # Find uncompressed blobs older than cutoff; each is compressed once however many attachments share it
         result = await db.execute(
-            select(TicketAttachment).where(
+            select(AttachmentBlob).where(
                 and_(
-                    TicketAttachment.is_compressed == False,
-                    TicketAttachment.created_at < cutoff_date
+                    AttachmentBlob.is_compressed == False,
+                    AttachmentBlob.created_at < cutoff_date
                 )
             )
         )
-        attachments = result.scalars().all()
+        blobs = result.scalars().all()
         
         compressed_count = 0
-        for attachment in attachments:
+        for blob in blobs:
+            content_hash = blob.content_hash
             try:
-                await self.compress_attachment(db, attachment)
+                await self.compress_blob(db, blob)
                 compressed_count += 1
             except Exception as e:
-                logger.error(f"Failed to compress attachment #{attachment.id}: {e}")
+                await db.rollback()
+                logger.error(f"Failed to compress attachment blob {content_hash[:12]}: {e}")
         
-        logger.info(f"Compressed {compressed_count} attachments older than {self.compress_after_days} days")
+        logger.info(f"Compressed {compressed_count} attachment blobs older than {self.compress_after_days} days")
         return compressed_count
     
     async def delete_old_attachments(self, db: AsyncSession) -> int:
@@ -589,6 +653,24 @@ class TicketService:
         logger.info(f"Deleted {deleted_count} attachments older than {self.delete_after_days} days")
         return deleted_count
     
+    async def delete_orphaned_blobs(self, db: AsyncSession) -> int:
+        """Delete stored content left behind by attachments removed with their ticket or message"""
+        result = await db.execute(
+            select(AttachmentBlob.content_hash).where(
+                ~select(TicketAttachment.id)
+                .where(TicketAttachment.content_hash == AttachmentBlob.content_hash)
+                .exists()
+            )
+        )
+        deleted_count = 0
+        for content_hash in result.scalars().all():
+            if await self._delete_blob_if_unused(db, content_hash):
+                deleted_count += 1
+        
+        if deleted_count > 0:
+            logger.info(f"Deleted {deleted_count} unreferenced attachment blobs")
+        return deleted_count
+    
     async def cleanup_empty_directories(self) -> int:
         """Remove empty attachment directories"""
         removed_count = 0
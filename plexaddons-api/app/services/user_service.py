@@ -2,13 +2,17 @@ from typing import Optional, List
 import json
 from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from sqlalchemy.orm import selectinload
-from app.models import User, Addon, Version, SubscriptionTier, Ticket, TicketMessage, TicketAttachment
+from sqlalchemy import select, func, update, literal
+from app.models import User, Addon, Version, SubscriptionTier
 from app.config import get_settings
+from app.core.rate_limit import get_redis_client
+from app.core.user_cache import get_cached_user_by_discord_id, invalidate_user_cache
 
 settings = get_settings()
 
+# Cached per-user storage/addon/version stats
+USER_STATS_CACHE_TTL = 60
+
 
 def sanitize_ilike_pattern(search: str) -> str:
     """Escape special characters in ILIKE patterns to prevent SQL injection."""
@@ -30,13 +34,6 @@ AVAILABLE_BADGES = {
 EARLY_ADOPTER_CUTOFF = datetime(2025, 12, 20, tzinfo=timezone.utc)
 
 
-def _calculate_string_size(s: Optional[str]) -> int:
-    """Calculate byte size of a string."""
-    if not s:
-        return 0
-    return len(s.encode('utf-8'))
-
-
 class UserService:
     """Service for user management operations."""
 
@@ -56,82 +53,70 @@ class UserService:
     @staticmethod
     async def get_user_by_discord_id(db: AsyncSession, discord_id: str) -> Optional[User]:
         """Get user by Discord ID."""
-        result = await db.execute(select(User).where(User.discord_id == discord_id))
-        return result.scalar_one_or_none()
+        return await get_cached_user_by_discord_id(db, discord_id)
+
+    @staticmethod
+    async def other_admin_exists(db: AsyncSession, user_id: int) -> bool:
+        """Check whether any admin other than the given user exists."""
+        result = await db.execute(
+            select(literal(1))
+            .where(User.is_admin == True, User.id != user_id)
+            .limit(1)
+        )
+        return result.scalar() is not None
 
     @staticmethod
     async def update_user(db: AsyncSession, user: User, **kwargs) -> User:
         """Update user fields. Only allows fields in UPDATABLE_FIELDS."""
-        for key, value in kwargs.items():
-            if key not in UserService.UPDATABLE_FIELDS:
-                continue
-            if value is not None:
-                setattr(user, key, value)
+        values = {
+            key: value for key, value in kwargs.items()
+            if key in UserService.UPDATABLE_FIELDS and value is not None
+        }
+        if not values:
+            return user
+        
+        # Single UPDATE ... RETURNING instead of UPDATE + refresh SELECT
+        result = await db.execute(
+            update(User)
+            .where(User.id == user.id)
+            .values(**values)
+            .returning(User)
+            .execution_options(populate_existing=True)
+        )
+        user = result.scalar_one()
         await db.commit()
-        await db.refresh(user)
+        await invalidate_user_cache(user.id)
         return user
     
     @staticmethod
-    async def calculate_storage_used(db: AsyncSession, user_id: int) -> int:
+    async def get_storage_used(db: AsyncSession, user_id: int) -> int:
         """
-        Calculate total storage used by a user from actual database content.
+        Get a user's storage usage in bytes.
         
-        Counts bytes from:
-        - Addon: name, slug, description, homepage
-        - Version: version, download_url, changelog_url, description, changelog_content
-        - TicketAttachment: file_size (actual file storage)
+        users.storage_used_bytes is maintained by database triggers on addons,
+        versions and ticket attachments (see app/models/storage_triggers.py),
+        so this is a primary key lookup rather than a SUM over their content.
         """
-        total_bytes = 0
-        
-        # Fetch all addons with their versions for this user
-        result = await db.execute(
-            select(Addon)
-            .options(selectinload(Addon.versions))
-            .where(Addon.owner_id == user_id)
-        )
-        addons = result.scalars().all()
-        
-        for addon in addons:
-            # Addon data
-            total_bytes += _calculate_string_size(addon.name)
-            total_bytes += _calculate_string_size(addon.slug)
-            total_bytes += _calculate_string_size(addon.description)
-            total_bytes += _calculate_string_size(addon.homepage)
-            
-            # Version data
-            for version in addon.versions:
-                total_bytes += _calculate_string_size(version.version)
-                total_bytes += _calculate_string_size(version.download_url)
-                total_bytes += _calculate_string_size(version.changelog_url)
-                total_bytes += _calculate_string_size(version.description)
-                total_bytes += _calculate_string_size(version.changelog_content)
-        
-        # Calculate ticket attachment storage
-        # Sum file_size for all attachments on tickets owned by this user
-        attachment_size_result = await db.execute(
-            select(func.coalesce(func.sum(TicketAttachment.file_size), 0))
-            .select_from(TicketAttachment)
-            .join(TicketMessage, TicketAttachment.message_id == TicketMessage.id)
-            .join(Ticket, TicketMessage.ticket_id == Ticket.id)
-            .where(Ticket.user_id == user_id)
-        )
-        attachment_bytes = attachment_size_result.scalar() or 0
-        total_bytes += attachment_bytes
-        
-        return total_bytes
+        result = await db.execute(select(User.storage_used_bytes).where(User.id == user_id))
+        return result.scalar() or 0
     
     @staticmethod
-    async def update_storage_used(db: AsyncSession, user: User) -> User:
-        """Recalculate and update user's storage usage."""
-        storage_used = await UserService.calculate_storage_used(db, user.id)
-        user.storage_used_bytes = storage_used
-        await db.commit()
-        await db.refresh(user)
+    async def refresh_storage_used(db: AsyncSession, user: User) -> User:
+        """Reload the trigger-maintained storage usage and drop cached copies."""
+        await db.refresh(user, ["storage_used_bytes"])
+        await invalidate_user_cache(user.id)
+        await UserService.invalidate_user_stats(user.id)
         return user
     
     @staticmethod
     async def get_user_stats(db: AsyncSession, user_id: int) -> dict:
-        """Get user statistics."""
+        """Get user statistics, cached in Redis until the user's content changes."""
+        redis = get_redis_client()
+        if redis:
+            cached = await redis.get(f"user_stats:{user_id}")
+            if cached:
+                return json.loads(cached)
+        
         # Count addons
         addon_count_result = await db.execute(
             select(func.count(Addon.id)).where(Addon.owner_id == user_id)
@@ -148,33 +133,34 @@ class UserService:
         version_count = version_count_result.scalar() or 0
         
         # Get storage used
-        storage_used = await UserService.calculate_storage_used(db, user_id)
+        storage_used = await UserService.get_storage_used(db, user_id)
         
-        return {
+        stats = {
             "addon_count": addon_count,
             "version_count": version_count,
             "storage_used_bytes": storage_used,
         }
+        
+        if redis:
+            await redis.set(f"user_stats:{user_id}", json.dumps(stats), ex=USER_STATS_CACHE_TTL)
+        return stats
+    
+    @staticmethod
+    async def invalidate_user_stats(user_id: int) -> None:
+        """Drop cached stats. Call after addon, version or attachment changes."""
+        redis = get_redis_client()
+        if redis:
+            await redis.delete(f"user_stats:{user_id}")
     
     @staticmethod
     def get_storage_quota_for_tier(tier: SubscriptionTier) -> int:
         """Get storage quota for a subscription tier."""
-        quotas = {
-            SubscriptionTier.FREE: settings.storage_quota_free,
-            SubscriptionTier.PRO: settings.storage_quota_pro,
-            SubscriptionTier.PREMIUM: settings.storage_quota_premium,
-        }
-        return quotas.get(tier, settings.storage_quota_free)
+        return settings.tier_storage_quota.get(tier, settings.storage_quota_free)
     
     @staticmethod
     def get_version_limit_for_tier(tier: SubscriptionTier) -> int:
         """Get version history limit for a subscription tier."""
-        limits = {
-            SubscriptionTier.FREE: settings.version_limit_free,
-            SubscriptionTier.PRO: settings.version_limit_pro,
-            SubscriptionTier.PREMIUM: settings.version_limit_premium,
-        }
-        return limits.get(tier, settings.version_limit_free)
+        return settings.tier_version_limit.get(tier, settings.version_limit_free)
     
     @staticmethod
     async def update_user_tier(db: AsyncSession, user: User, tier: SubscriptionTier) -> User:
@@ -188,23 +174,18 @@ class UserService:
         
         await db.commit()
         await db.refresh(user)
+        await invalidate_user_cache(user.id)
         return user
     
     @staticmethod
     def _parse_badges(user: User) -> List[str]:
-        """Parse badges from JSON string to list."""
-        if not user.badges:
-            return []
-        try:
-            badges = json.loads(user.badges)
-            return badges if isinstance(badges, list) else []
-        except (json.JSONDecodeError, TypeError):
-            return []
+        """Get a copy of the user's badges list (safe to mutate)."""
+        return list(user.badges) if isinstance(user.badges, list) else []
     
     @staticmethod
     def _save_badges(user: User, badges: List[str]) -> None:
-        """Save badges list as JSON string."""
-        user.badges = json.dumps(list(set(badges)))  # Remove duplicates
+        """Save badges list (assigning a new list marks the column dirty)."""
+        user.badges = list(set(badges))  # Remove duplicates
     
     @staticmethod
     async def get_badges(db: AsyncSession, user: User) -> List[str]:
@@ -220,6 +201,7 @@ class UserService:
             UserService._save_badges(user, badges)
             await db.commit()
             await db.refresh(user)
+            await invalidate_user_cache(user.id)
         return user
     
     @staticmethod
@@ -231,6 +213,7 @@ class UserService:
             UserService._save_badges(user, badges)
             await db.commit()
             await db.refresh(user)
+            await invalidate_user_cache(user.id)
         return user
     
     @staticmethod
@@ -268,6 +251,7 @@ class UserService:
                 UserService._save_badges(user, badges)
                 await db.commit()
                 await db.refresh(user)
+                await invalidate_user_cache(user.id)
         return user
     
     @staticmethod
@@ -333,6 +317,7 @@ class UserService:
             if commit:
                 await db.commit()
                 await db.refresh(user)
+                await invalidate_user_cache(user.id)
         
         return user
     
@@ -1,7 +1,8 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from datetime import date
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func, delete
+from sqlalchemy import select, func, delete, and_
+from sqlalchemy.orm import selectinload, undefer, undefer_group
 from app.models import Version, Addon, User, SubscriptionTier
 from app.schemas import VersionCreate, VersionUpdate
 from app.services.user_service import UserService
@@ -17,6 +18,8 @@ from app.core.exceptions import (
 from app.utils import calculate_storage_size
 from app.utils.semver import is_valid_version
 
+_VERSION_COLUMNS = [column.key for column in Version.__table__.columns]
+
 
 class VersionService:
     """Service for version management operations."""
@@ -24,9 +27,19 @@ class VersionService:
     @staticmethod
     async def get_version_by_id(db: AsyncSession, version_id: int) -> Optional[Version]:
         """Get version by ID."""
-        result = await db.execute(select(Version).where(Version.id == version_id))
+        result = await db.execute(
+            select(Version)
+            .options(undefer_group("content"))
+            .where(Version.id == version_id)
+        )
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def refresh_version(db: AsyncSession, version: Version) -> None:
+        """Refresh a version, including its deferred content columns."""
+        # A plain refresh() expires deferred columns without reloading them
+        await db.refresh(version, _VERSION_COLUMNS)
+    
     @staticmethod
     async def get_version_by_addon_and_version(
         db: AsyncSession,
@@ -36,22 +49,58 @@ class VersionService:
         """Get a specific version of an addon."""
         result = await db.execute(
             select(Version)
+            .options(undefer_group("content"))
             .where(Version.addon_id == addon_id)
             .where(Version.version == version_str)
         )
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_addon_and_version_by_slug(
+        db: AsyncSession,
+        slug: str,
+        version_str: str,
+    ) -> Tuple[Optional[Addon], Optional[Version]]:
+        """Get an addon by slug and one of its versions in a single query."""
+        result = await db.execute(
+            select(Addon, Version)
+            .options(selectinload(Addon.owner), undefer(Version.changelog_content))
+            .outerjoin(Version, and_(Version.addon_id == Addon.id, Version.version == version_str))
+            .where(Addon.slug == slug)
+        )
+        row = result.one_or_none()
+        if not row:
+            return None, None
+        return row[0], row[1]
+    
     @staticmethod
     async def get_latest_version(db: AsyncSession, addon_id: int) -> Optional[Version]:
         """Get the latest version of an addon."""
         result = await db.execute(
             select(Version)
+            .options(undefer_group("content"))
             .where(Version.addon_id == addon_id)
             .order_by(Version.release_date.desc(), Version.created_at.desc())
             .limit(1)
         )
         return result.scalar_one_or_none()
     
+    @staticmethod
+    async def get_latest_version_summary(db: AsyncSession, addon_id: int):
+        """
+        Get (version, release_date) of the latest version of an addon, or None.
+        
+        Selects only columns in idx_versions_latest_covering, so Postgres can
+        answer it with an index-only scan.
+        """
+        result = await db.execute(
+            select(Version.version, Version.release_date)
+            .where(Version.addon_id == addon_id)
+            .order_by(Version.release_date.desc(), Version.created_at.desc())
+            .limit(1)
+        )
+        return result.one_or_none()
+    
     @staticmethod
     async def get_version_count(db: AsyncSession, addon_id: int) -> int:
         """Get the number of versions for an addon."""
@@ -83,7 +132,7 @@ class VersionService:
         existing_size: int = 0,
     ) -> bool:
         """Check if user has storage quota for new content."""
-        current_usage = await UserService.calculate_storage_used(db, user.id)
+        current_usage = await UserService.get_storage_used(db, user.id)
         # Subtract existing size if updating
         current_usage -= existing_size
         return (current_usage + new_content_size) <= user.storage_quota_bytes
@@ -123,7 +172,7 @@ class VersionService:
         await db.commit()
         
         # Update user storage
-        await UserService.update_storage_used(db, user)
+        await UserService.refresh_storage_used(db, user)
         
         return deleted_count
     
@@ -178,14 +227,14 @@ class VersionService:
         )
         db.add(version)
         await db.commit()
-        await db.refresh(version)
+        await VersionService.refresh_version(db, version)
         
         # Update addon's updated_at
         addon.updated_at = version.created_at
         await db.commit()
         
         # Update user storage
-        await UserService.update_storage_used(db, user)
+        await UserService.refresh_storage_used(db, user)
         
         # Send webhook notification (Premium users only)
         await webhook_service.notify_version_released(db, addon, version, user)
@@ -221,10 +270,10 @@ class VersionService:
         version.storage_size_bytes = new_size
         
         await db.commit()
-        await db.refresh(version)
+        await VersionService.refresh_version(db, version)
         
         # Update user storage
-        await UserService.update_storage_used(db, user)
+        await UserService.refresh_storage_used(db, user)
         
         return version
     
@@ -239,7 +288,7 @@ class VersionService:
         await db.commit()
         
         # Update user storage
-        await UserService.update_storage_used(db, user)
+        await UserService.refresh_storage_used(db, user)
     
     @staticmethod
     async def list_versions(
@@ -258,6 +307,7 @@ class VersionService:
         # Get versions
         result = await db.execute(
             select(Version)
+            .options(undefer_group("content"))
             .where(Version.addon_id == addon_id)
             .order_by(Version.release_date.desc(), Version.created_at.desc())
             .offset(skip)
@@ -29,10 +29,29 @@ class WebhookEvent:
 class WebhookService:
     """Service for sending webhook notifications to Premium users."""
     
+    _client: Optional[httpx.AsyncClient] = None
+    
+    @classmethod
+    def _get_client(cls) -> httpx.AsyncClient:
+        """Get the shared HTTP client (reuses connections across deliveries)."""
+        if cls._client is None or cls._client.is_closed:
+            cls._client = httpx.AsyncClient(
+                limits=httpx.Limits(max_connections=500, max_keepalive_connections=100),
+                timeout=httpx.Timeout(10.0, connect=5.0),
+            )
+        return cls._client
+    
+    @classmethod
+    async def close(cls) -> None:
+        """Close the shared HTTP client."""
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+    
     @staticmethod
     def generate_webhook_secret() -> str:
         """Generate a secure webhook secret."""
-        return secrets.token_hex(32)
+        return secrets.token_urlsafe(32)
     
     @staticmethod
     def sign_payload(payload: str, secret: str) -> str:
@@ -183,13 +202,13 @@ class WebhookService:
             headers["X-PlexAddons-Timestamp"] = str(int(datetime.now(timezone.utc).timestamp()))
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    user.webhook_url,
-                    content=payload_json,
-                    headers=headers,
-                )
-                return 200 <= response.status_code < 300
+            client = WebhookService._get_client()
+            response = await client.post(
+                user.webhook_url,
+                content=payload_json,
+                headers=headers,
+            )
+            return 200 <= response.status_code < 300
         except Exception as e:
             # Log error but don't fail the operation
             print(f"Webhook delivery failed for user {user.id}: {e}")
@@ -368,24 +387,24 @@ class WebhookService:
             headers["X-PlexAddons-Timestamp"] = str(int(datetime.now(timezone.utc).timestamp()))
         
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    user.webhook_url,
-                    content=payload_json,
-                    headers=headers,
-                )
-                
-                if 200 <= response.status_code < 300:
-                    return {
-                        "success": True,
-                        "status_code": response.status_code,
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": f"Received status code {response.status_code}",
-                        "status_code": response.status_code,
-                    }
+            client = WebhookService._get_client()
+            response = await client.post(
+                user.webhook_url,
+                content=payload_json,
+                headers=headers,
+            )
+            
+            if 200 <= response.status_code < 300:
+                return {
+                    "success": True,
+                    "status_code": response.status_code,
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": f"Received status code {response.status_code}",
+                    "status_code": response.status_code,
+                }
         except httpx.TimeoutException:
             return {
                 "success": False,
@@ -19,6 +19,11 @@ def slugify(text: str) -> str:
     return text
 
 
+def is_discord_id(value: str) -> bool:
+    """Check that a string is a Discord snowflake (fits a signed 64-bit integer)."""
+    return value.isascii() and value.isdigit() and int(value) < 2**63
+
+
 def calculate_storage_size(content: str) -> int:
     """Calculate the storage size of content in bytes."""
     if not content:
@@ -364,6 +364,12 @@ export interface DailyStats {
   unique_users: number;
 }
 
+export interface WeeklyStats {
+  week: string;
+  check_count: number;
+  unique_users: number;
+}
+
 export interface VersionDistribution {
   version: string;
   version_id: number;
@@ -380,6 +386,7 @@ export interface AddonAnalytics {
   total_checks: number;
   total_unique_users: number;
   daily_stats: DailyStats[];
+  weekly_stats: WeeklyStats[];
   version_distribution: VersionDistribution[];
 }
 